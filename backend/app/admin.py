@@ -7,11 +7,19 @@ from . import models
 
 models_to_register = [
     models.Document,
+    models.DocumentMetadata,
+    models.CoreferenceAnnotation,
+    models.PronounAttribution,
     models.PronounSeries,
     models.Gender,
     models.Corpus,
     models.ProximityAnalysis,
     models.FrequencyAnalysis,
+    models.ProximityResult,
+    models.FrequencyResult,
+    models.CooccurrenceMatrix,
+    models.AnalysisJob,
+    models.ImportRun,
 ]
 
 for model in models_to_register:
@@ -0,0 +1,195 @@
+"""
+Sparse co-occurrence matrices of the pronouns of every Gender and the words around them (see
+`CooccurrenceMatrix`), persisted per corpus and window so that proximity queries slice them instead of
+walking every token list again.
+
+A matrix records the Documents it has counted and the version of their tokens: bringing it up to date
+only counts the Documents added to the corpus since, and counts it again from scratch if one of the counted
+Documents changed. Each Document is walked once for all of the windows: the words around each pronoun are
+counted by their distance from it, and the counts of a window are the sums of the counts of the distances
+up to it (see `windows.count_windows`).
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import (
+    CooccurrenceMatrix,
+    Corpus,
+    Document,
+    Gender,
+    PronounSeries,
+)
+from .inputs import get_gender_pronoun_sets
+from .progress import ProgressTracker
+from .windows import count_windows
+
+
+def get_rows():
+    """
+    :return: A list of the [gender_id, pronoun_type] rows of the matrices, and a list of the sorted pronouns
+             of each row
+    """
+    genders = list(Gender.objects.order_by('pk'))
+    pronoun_sets = get_gender_pronoun_sets(genders)
+    rows = []
+    row_pronouns = []
+    for gender in genders:
+        for pronoun_type in PronounSeries.PRONOUN_TYPES:
+            rows.append([gender.pk, pronoun_type])
+            row_pronouns.append(sorted(pronoun_sets[gender.pk][pronoun_type]))
+    return rows, row_pronouns
+
+
+def count_cooccurrences(pos_tags, row_pronouns, word_windows):
+    """
+    Counts the words around the pronouns of each row in one pass over a Document, for several windows.
+
+    :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
+        part-of-speech tag (str).
+    :param row_pronouns: a list of the pronouns of each row (see `get_rows`)
+    :param word_windows: a collection of positive ints: the numbers of words to look at on each side of a pronoun
+    :return: A dict mapping each window to a `Counter` of (row index, (word, tag)) pairs, with the same counts
+             as `proximity.generate_token_counter` for the pronouns of the row
+    """
+    pronoun_rows = {}
+    for row, pronouns in enumerate(row_pronouns):
+        for pronoun in pronouns:
+            pronoun_rows.setdefault(pronoun, []).append(row)
+
+    words = [word.lower() for word, _ in pos_tags]
+    columns = [(word, pos_tag) for word, (_, pos_tag) in zip(words, pos_tags)]
+    return count_windows(words, columns, pronoun_rows.get, word_windows)
+
+
+def get_document_versions(doc_ids):
+    """
+    :param doc_ids: a collection of Document primary keys
+    :return: A dict mapping each Document ID (as a str, like the keys of `CooccurrenceMatrix.document_versions`)
+             to the [content hash, pipeline stages, tokenizer] its tokens were computed from
+    """
+    documents = Document.objects.filter(pk__in=doc_ids).values_list(
+        'pk', 'content_hash', 'pipeline_stages', 'tokenizer'
+    )
+    return {str(pk): [content_hash, stages, tokenizer] for pk, content_hash, stages, tokenizer in documents}
+
+
+class StaleMatrix(Exception):
+    """
+    Raised when a co-occurrence matrix was built, but its Corpus, its Documents or the pronouns of the Genders
+    changed since.
+    """
+
+
+def get_max_window():
+    """
+    :return: The largest word window matrices are built for (`settings.COOCCURRENCE_MAX_WINDOW`), since
+             counting a window walks that many tokens on each side of every pronoun
+    """
+    return getattr(settings, 'COOCCURRENCE_MAX_WINDOW', max(CooccurrenceMatrix.DEFAULT_WINDOWS))
+
+
+def needs_recount(matrix, rows, row_pronouns, doc_ids, versions):
+    """
+    :param matrix: a `CooccurrenceMatrix`
+    :param rows: the current rows, as returned by `get_rows`
+    :param row_pronouns: the current pronouns of the rows
+    :param doc_ids: the set of the IDs of the Documents of the Corpus
+    :param versions: their versions, as returned by `get_document_versions`
+    :return: True if the matrix must be counted again from scratch: Documents were removed from the Corpus,
+             the text or the pipeline of a counted Document changed, or the pronouns of the Genders changed
+    """
+    counted = set(matrix.document_ids)
+    return (
+        matrix.rows != rows
+        or matrix.row_pronouns != row_pronouns
+        or bool(counted - doc_ids)
+        or any(matrix.document_versions.get(str(doc_id)) != versions[str(doc_id)] for doc_id in counted)
+    )
+
+
+def update_matrices(corpus_id, word_windows=None, progress=None):
+    """
+    Creates or brings up to date the co-occurrence matrices of a Corpus. Only the Documents added to the Corpus
+    since a matrix was last updated are counted; a matrix is counted again from scratch if Documents were
+    removed from the Corpus, if the text or the pipeline of a counted Document changed, or if the pronouns of
+    the Genders changed.
+
+    :param corpus_id: the ID of a Corpus instance
+    :param word_windows: a collection of positive ints (`CooccurrenceMatrix.DEFAULT_WINDOWS` if None)
+    :param progress: an optional `ProgressTracker`, advanced after each counted Document
+    :return: A dict mapping each window to its up to date `CooccurrenceMatrix`
+    :raises ValueError: if a window is not positive, or is larger than `get_max_window()`
+    """
+    word_windows = sorted(set(word_windows or CooccurrenceMatrix.DEFAULT_WINDOWS))
+    if word_windows[0] < 1 or word_windows[-1] > get_max_window():
+        raise ValueError(f'Word windows must be between 1 and {get_max_window()}.')
+    progress = progress or ProgressTracker()
+
+    rows, row_pronouns = get_rows()
+    doc_ids = set(Corpus.objects.get(pk=corpus_id).document_ids())
+    versions = get_document_versions(doc_ids)
+
+    matrices = {}
+    cells = {}
+    pending = {}
+    stale = set()
+    for word_window in word_windows:
+        matrix = (
+            CooccurrenceMatrix.objects.filter(corpus_id=corpus_id, word_window=word_window).first()
+            or CooccurrenceMatrix(corpus_id=corpus_id, word_window=word_window)
+        )
+        counted = set(matrix.document_ids)
+        if matrix.pk is None or needs_recount(matrix, rows, row_pronouns, doc_ids, versions):
+            matrix.rows, matrix.row_pronouns = rows, row_pronouns
+            counted = set()
+            cells[word_window] = Counter()
+            stale.add(word_window)
+        else:
+            cells[word_window] = Counter(matrix.get_cells())
+        matrix.document_ids = sorted(counted)
+        matrices[word_window] = matrix
+        for doc_id in doc_ids - counted:
+            pending.setdefault(doc_id, []).append(word_window)
+            stale.add(word_window)
+
+    progress.start(len(pending))
+    for doc_id in sorted(pending):
+        progress.check_cancelled()
+        pos_tags, tags_status = Document.objects.values_list('part_of_speech_tags', 'tags_status').get(pk=doc_id)
+        if tags_status != Document.ARTIFACT_COMPLETE:
+            pos_tags = Document.objects.get(pk=doc_id).ensure_part_of_speech_tags()
+        for word_window, counter in count_cooccurrences(pos_tags, row_pronouns, pending[doc_id]).items():
+            cells[word_window].update(counter)
+        progress.advance(len(pos_tags))
+
+    with transaction.atomic():
+        for word_window in stale:
+            matrix = matrices[word_window]
+            matrix.set_cells(cells[word_window])
+            matrix.document_ids = sorted(doc_ids)
+            matrix.document_versions = versions
+            matrix.save()
+    return matrices
+
+
+def get_matrix(corpus_id, word_window):
+    """
+    Reads the persisted matrix of a Corpus without counting anything: matrices are built and brought up to
+    date by `update_matrices` (e.g. through the `build_cooccurrence_matrices` command).
+
+    :param corpus_id: the ID of a Corpus instance
+    :param word_window: a positive int
+    :return: The up to date `CooccurrenceMatrix` of the Corpus for the window
+    :raises CooccurrenceMatrix.DoesNotExist: if the matrix was never built
+    :raises StaleMatrix: if the matrix is out of date
+    """
+    matrix = CooccurrenceMatrix.objects.get(corpus_id=corpus_id, word_window=word_window)
+    rows, row_pronouns = get_rows()
+    doc_ids = set(Corpus.objects.get(pk=corpus_id).document_ids())
+    if set(matrix.document_ids) != doc_ids or needs_recount(
+        matrix, rows, row_pronouns, doc_ids, get_document_versions(doc_ids)
+    ):
+        raise StaleMatrix(f'The co-occurrence matrix of corpus {corpus_id} for window {word_window} is out of date.')
+    return matrix
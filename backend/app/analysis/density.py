@@ -0,0 +1,124 @@
+"""
+Where the pronouns of each Gender occur along the documents of a corpus: the density of their pronouns (the
+share of the tokens that are one of them) over equal position bins of each document, or over a sliding window
+of tokens centered on evenly spaced positions.
+
+Each document's tokens are mapped once to an indicator matrix (tokens x genders), whose prefix sums give the
+number of pronouns of each Gender in any range of tokens in constant time, so every bin or window of every
+Gender is computed at once with NumPy.
+"""
+import numpy as np
+
+from ..models import (
+    Document,
+    Gender,
+)
+from .inputs import (
+    get_document_ids,
+    get_gender_pronouns,
+)
+from .progress import ProgressTracker
+
+
+def get_prefix_sums(tokens, pronoun_columns, membership):
+    """
+    :param tokens: the list of the tokens of a Document
+    :param pronoun_columns: a dictionary keying each lowercase pronoun to its row in `membership`
+    :param membership: a (pronouns + 1) x genders int array, 1 where the pronoun is one of the Gender's; its last
+                       row, for the tokens that are not pronouns, is all zeros
+    :return: a (tokens + 1) x genders int array of the number of pronouns of each Gender before each token
+    """
+    codes = np.fromiter(
+        (pronoun_columns.get(token.lower(), -1) for token in tokens), dtype=np.int64, count=len(tokens)
+    )
+    prefix_sums = np.zeros((len(tokens) + 1, membership.shape[1]), dtype=np.int64)
+    np.cumsum(membership[codes], axis=0, out=prefix_sums[1:])
+    return prefix_sums
+
+
+def get_ranges(word_count, bins, window=None):
+    """
+    :param word_count: the number of tokens of a Document
+    :param bins: the number of position bins
+    :param window: an optional number of tokens; if given, the ranges are windows of this many tokens centered on
+                   the middles of the bins (and clipped to the Document) rather than the bins themselves
+    :return: two int arrays of the starts and ends of the [start, end) token ranges
+    """
+    edges = np.linspace(0, word_count, bins + 1).astype(np.int64)
+    if window is None:
+        return edges[:-1], edges[1:]
+    starts = (edges[:-1] + edges[1:]) // 2 - window // 2
+    return np.clip(starts, 0, word_count), np.clip(starts + window, 0, word_count)
+
+
+def get_densities(prefix_sums, starts, ends):
+    """
+    :param prefix_sums: the prefix sums of a Document, as returned by `get_prefix_sums`
+    :param starts: an int array of the starts of token ranges
+    :param ends: an int array of the ends of token ranges
+    :return: a ranges x genders float array of the share of the tokens of each range that are pronouns of each
+             Gender (0 for empty ranges)
+    """
+    counts = prefix_sums[ends] - prefix_sums[starts]
+    sizes = (ends - starts)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(sizes > 0, counts / sizes, 0.0)
+
+
+def run_analysis(corpus_id, gender_ids, bins=100, window=None, progress=None):
+    """
+    Computes the pronoun density curves of each Gender for each Document of a Corpus, and their average over
+    the Corpus, position being relative to the length of each Document.
+
+    :param corpus_id: the ID of a Corpus instance
+    :param gender_ids: a list of integers representing Gender primary keys
+    :param bins: the number of equal position bins (or of window positions) per Document
+    :param window: an optional number of tokens of a sliding window (see `get_ranges`); the bins themselves if None
+    :param progress: an optional `ProgressTracker` that is advanced after each Document, and that may stop the
+                     analysis between Documents by raising `AnalysisCancelled`
+    :return: a dictionary of the number of bins, the window, the curves of each Document (keyed by Document ID,
+             then by Gender primary key) and the curves of the Corpus (keyed by Gender primary key), the mean of
+             the curves of its Documents that have tokens
+    :raises ValueError: if the number of bins or the window is not positive
+    """
+    if bins < 1 or (window is not None and window < 1):
+        raise ValueError('The number of bins and the window must be positive.')
+    progress = progress or ProgressTracker()
+    genders = list(Gender.objects.filter(pk__in=gender_ids).order_by('pk'))
+    gender_pronouns = get_gender_pronouns(genders)
+    pronouns = sorted(set().union(*gender_pronouns.values()))
+    pronoun_columns = {pronoun: column for column, pronoun in enumerate(pronouns)}
+    membership = np.array(
+        [[pronoun in gender_pronouns[gender.pk] for gender in genders] for pronoun in pronouns] + [[0] * len(genders)],
+        dtype=np.int64
+    ).reshape(len(pronouns) + 1, len(genders))
+
+    doc_ids = get_document_ids(corpus_id)
+    progress.start(len(doc_ids))
+    documents = {}
+    total = np.zeros((bins, len(genders)), dtype=np.float64)
+    counted = 0
+
+    for pk in doc_ids:
+        progress.check_cancelled()
+        tokens, tokens_status = Document.objects.values_list('tokenized_text', 'tokens_status').get(pk=pk)
+        if tokens_status != Document.ARTIFACT_COMPLETE:
+            doc = Document.objects.get(pk=pk)
+            doc.ensure_artifacts('tokens')
+            tokens = doc.tokenized_text
+
+        prefix_sums = get_prefix_sums(tokens, pronoun_columns, membership)
+        densities = get_densities(prefix_sums, *get_ranges(len(tokens), bins, window))
+        documents[pk] = {gender.pk: densities[:, column].tolist() for column, gender in enumerate(genders)}
+        if tokens:
+            total += densities
+            counted += 1
+        progress.advance(len(tokens))
+
+    mean = total / counted if counted else total
+    return {
+        'bins': bins,
+        'window': window,
+        'documents': documents,
+        'corpus': {gender.pk: mean[:, column].tolist() for column, gender in enumerate(genders)},
+    }
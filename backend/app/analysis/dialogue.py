@@ -0,0 +1,178 @@
+"""
+Pronoun counts and proximity counts of a corpus, split between dialogue (the tokens inside the quotations
+found at ingestion, see `Document.quote_spans`) and narration (every other token).
+
+Whether a token is inside a quotation is an interval lookup: a binary search of its index in the sorted
+starts of the quotations.
+"""
+from bisect import bisect_right
+from collections import Counter
+from itertools import chain
+from more_itertools import windowed
+
+from ..models import (
+    Document,
+    Gender,
+    PronounSeries,
+)
+from .inputs import (
+    get_document_ids,
+    get_gender_pronoun_sets,
+    get_gender_pronouns,
+)
+from .progress import ProgressTracker
+
+DIALOGUE = 'dialogue'
+NARRATION = 'narration'
+
+
+class QuoteIndex:
+    """
+    Looks up whether token indices are inside the quotations of a Document.
+    """
+
+    def __init__(self, quote_spans):
+        """
+        :param quote_spans: a list of the [start, end) token index ranges of the quotations, in order
+        """
+        self.starts = [start for start, _ in quote_spans]
+        self.ends = [end for _, end in quote_spans]
+
+    def region(self, index):
+        """
+        :param index: the index of a token
+        :return: `DIALOGUE` if the token is inside a quotation, `NARRATION` otherwise
+        """
+        quote = bisect_right(self.starts, index) - 1
+        return DIALOGUE if quote >= 0 and index < self.ends[quote] else NARRATION
+
+    def word_counts(self, word_count):
+        """
+        :param word_count: the number of tokens of the Document
+        :return: a dictionary of the numbers of tokens in dialogue and in narration
+        """
+        dialogue = sum(end - start for start, end in zip(self.starts, self.ends))
+        return {DIALOGUE: dialogue, NARRATION: word_count - dialogue}
+
+
+def count_pronouns(tokens, quote_index, pronouns):
+    """
+    :param tokens: the list of the tokens of a Document
+    :param quote_index: the `QuoteIndex` of the Document
+    :param pronouns: a set of lowercase pronouns
+    :return: a dictionary keying `DIALOGUE` and `NARRATION` to a Counter of the pronouns in them
+    """
+    output = {DIALOGUE: Counter(), NARRATION: Counter()}
+    for index, token in enumerate(tokens):
+        token = token.lower()
+        if token in pronouns:
+            output[quote_index.region(index)][token] += 1
+    return output
+
+
+def generate_token_counters(pos_tags, quote_index, pronoun_set, word_window):
+    """
+    Like `proximity.generate_token_counter`, with the words around each pronoun counted in the dialogue or the
+    narration, depending on where the pronoun is.
+
+    :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
+        part-of-speech tag (str).
+    :param quote_index: the `QuoteIndex` of the Document
+    :param pronoun_set: A set of strings (pronouns) of one type of pronoun
+    :param word_window: An integer describing the number of words to look at on each side of a gendered word
+    :return: a dictionary keying `DIALOGUE` and `NARRATION` to a dict mapping part of speech tags to Counters
+    """
+    output = {DIALOGUE: {}, NARRATION: {}}
+    padding = [None] * word_window
+
+    for index, tagged_tokens in enumerate(windowed(chain(padding, pos_tags, padding), 2 * word_window + 1)):
+        candidate = tagged_tokens[word_window][0].lower()
+        if candidate not in pronoun_set:
+            continue
+
+        region = output[quote_index.region(index)]
+        for tagged_token in tagged_tokens:
+            if tagged_token is not None:
+                word = tagged_token[0].lower()
+                if word != candidate:
+                    region.setdefault(tagged_token[1], Counter())[word] += 1
+
+    return output
+
+
+def run_analysis(corpus_id, gender_ids, word_window=None, progress=None):
+    """
+    Splits the pronoun counts of the Documents of a Corpus, and optionally their proximity counts, between
+    dialogue and narration.
+
+    :param corpus_id: the ID of a Corpus instance
+    :param gender_ids: a list of integers representing Gender primary keys
+    :param word_window: an optional number of words to look at on each side of the pronouns; the proximity
+                        counts are left out if None
+    :param progress: an optional `ProgressTracker` that is advanced after each Document, and that may stop the
+                     analysis between Documents by raising `AnalysisCancelled`
+    :return: a dictionary mapping the Document IDs to a dictionary keying `DIALOGUE` and `NARRATION` to their
+             number of words (`word_count`), the count of each Gender's pronouns (`count`, keyed by Gender
+             primary key) and their frequency over the words of the region (`frequency`), and, with a word
+             window, the proximity counts of each Gender per pronoun type (`proximity`)
+    """
+    results = {}
+    progress = progress or ProgressTracker()
+    genders = list(Gender.objects.filter(pk__in=gender_ids))
+    gender_pronouns = get_gender_pronouns(genders)
+    pronoun_sets = get_gender_pronoun_sets(genders) if word_window is not None else None
+    pronouns = set().union(*gender_pronouns.values())
+    doc_ids = get_document_ids(corpus_id)
+    progress.start(len(doc_ids))
+
+    for pk in doc_ids:
+        progress.check_cancelled()
+        tokens, quote_spans, quotes_status = (
+            Document.objects.values_list('tokenized_text', 'quote_spans', 'quotes_status').get(pk=pk)
+        )
+        if quotes_status != Document.ARTIFACT_COMPLETE:
+            doc = Document.objects.get(pk=pk)
+            quote_spans = doc.ensure_quote_spans()
+            tokens = doc.tokenized_text
+        quote_index = QuoteIndex(quote_spans)
+        pronoun_counts = count_pronouns(tokens, quote_index, pronouns)
+        word_counts = quote_index.word_counts(len(tokens))
+
+        output = {}
+        for region in (DIALOGUE, NARRATION):
+            count = {
+                gender.pk: Counter({
+                    pronoun: pronoun_counts[region][pronoun] for pronoun in gender_pronouns[gender.pk]
+                })
+                for gender in genders
+            }
+            output[region] = {
+                'word_count': word_counts[region],
+                'count': count,
+                'frequency': {
+                    gender_id: {
+                        pronoun: pronoun_count / word_counts[region] if word_counts[region] else 0
+                        for pronoun, pronoun_count in gender_count.items()
+                    }
+                    for gender_id, gender_count in count.items()
+                },
+            }
+
+        if word_window is not None:
+            pos_tags, tags_status = Document.objects.values_list('part_of_speech_tags', 'tags_status').get(pk=pk)
+            if tags_status != Document.ARTIFACT_COMPLETE:
+                pos_tags = Document.objects.get(pk=pk).ensure_part_of_speech_tags()
+            for region in (DIALOGUE, NARRATION):
+                output[region]['proximity'] = {gender.pk: {} for gender in genders}
+            for gender in genders:
+                for pronoun_type in PronounSeries.PRONOUN_TYPES:
+                    counters = generate_token_counters(
+                        pos_tags, quote_index, pronoun_sets[gender.pk][pronoun_type], word_window
+                    )
+                    for region, counter in counters.items():
+                        output[region]['proximity'][gender.pk][pronoun_type] = counter
+
+        results[pk] = output
+        progress.advance(len(tokens))
+
+    return results
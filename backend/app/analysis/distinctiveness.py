@@ -0,0 +1,215 @@
+"""
+Statistics of how distinctive the words near the pronouns of each Gender are, compared with the words near
+the pronouns of the other Genders.
+
+The proximity counts are turned into a (genders x vocabulary) table once, and every statistic is computed
+for the whole table at once with NumPy, comparing each row with the sum of the other rows:
+
+- `log_likelihood`: Dunning's log-likelihood ratio (G²), signed positive for words over-represented
+  near the Gender's pronouns;
+- `log_odds`: the z-scores of the log-odds ratios with an informative Dirichlet prior (Monroe, Colaresi and
+  Quinn, 2008), the prior being the pooled counts of every Gender unless another one is given;
+- `pmi`: the pointwise mutual information of the word and the Gender (-inf where the word never occurs).
+"""
+import numpy as np
+
+
+def get_count_table(gender_counts, min_count=1):
+    """
+    :param gender_counts: a dictionary keying Genders (or their keys) to a dictionary of word counts
+    :param min_count: the minimum number of occurrences, summed over the Genders, of the words to keep
+    :return: a list of the keys of `gender_counts`, a list of the words, and a (keys x words) int array of
+             their counts
+    """
+    keys = list(gender_counts)
+    vocabulary = sorted({word for counts in gender_counts.values() for word in counts})
+    word_indices = {word: index for index, word in enumerate(vocabulary)}
+
+    table = np.zeros((len(keys), len(vocabulary)), dtype=np.int64)
+    for row, key in enumerate(keys):
+        counts = gender_counts[key]
+        if counts:
+            table[row, [word_indices[word] for word in counts]] = list(counts.values())
+
+    kept = table.sum(axis=0) >= min_count
+    return keys, [word for word, keep in zip(vocabulary, kept) if keep], table[:, kept]
+
+
+def merge_proximity_results(results, pos_tags=None):
+    """
+    Sums the per-document results of a proximity analysis over documents, pronoun types and part of speech
+    tags.
+
+    :param results: the results of `proximity.run_analysis`, or of a `ProximityAnalysis`
+    :param pos_tags: an optional collection of part of speech tags to keep (every tag if None)
+    :return: a dictionary keying each Gender (or its key) to a dictionary of word counts
+    """
+    gender_counts = {}
+    for document_results in results.values():
+        for gender, pronoun_type_results in document_results.items():
+            counts = gender_counts.setdefault(gender, {})
+            for tag_counts in pronoun_type_results.values():
+                for tag, word_counts in tag_counts.items():
+                    if pos_tags is not None and tag not in pos_tags:
+                        continue
+                    for word, count in word_counts.items():
+                        counts[word] = counts.get(word, 0) + count
+    return gender_counts
+
+
+def get_matrix_count_table(matrix, pronoun_types=None, pos_tags=None, min_count=1):
+    """
+    Sums the cells of a `CooccurrenceMatrix` per Gender and word, without going through dictionaries.
+
+    :param matrix: a `CooccurrenceMatrix`
+    :param pronoun_types: an optional collection of the pronoun types of the rows to keep (every type if None)
+    :param pos_tags: an optional collection of part of speech tags to keep (every tag if None)
+    :param min_count: the minimum number of occurrences, summed over the Genders, of the words to keep
+    :return: a list of Gender primary keys, a list of the words, and a (genders x words) int array of
+             their counts, like `get_count_table`
+    """
+    keys = sorted({gender_id for gender_id, _ in matrix.rows})
+    vocabulary = sorted({word for word, _ in matrix.columns})
+    word_indices = {word: index for index, word in enumerate(vocabulary)}
+
+    row_genders = np.array([keys.index(gender_id) for gender_id, _ in matrix.rows], dtype=np.int64)
+    row_kept = np.array(
+        [pronoun_types is None or pronoun_type in pronoun_types for _, pronoun_type in matrix.rows], dtype=bool
+    )
+    column_words = np.array([word_indices[word] for word, _ in matrix.columns], dtype=np.int64)
+    column_kept = np.array([pos_tags is None or tag in pos_tags for _, tag in matrix.columns], dtype=bool)
+
+    rows = np.array(matrix.row_indices, dtype=np.int64)
+    columns = np.array(matrix.column_indices, dtype=np.int64)
+    counts = np.array(matrix.counts, dtype=np.int64)
+    kept = row_kept[rows] & column_kept[columns] if len(counts) else np.zeros(0, dtype=bool)
+
+    table = np.zeros((len(keys), len(vocabulary)), dtype=np.int64)
+    np.add.at(table, (row_genders[rows[kept]], column_words[columns[kept]]), counts[kept])
+
+    kept_words = table.sum(axis=0) >= min_count
+    return keys, [word for word, keep in zip(vocabulary, kept_words) if keep], table[:, kept_words]
+
+
+def _split(table):
+    """
+    :param table: a (genders x words) array of counts
+    :return: the counts of each Gender and the counts of the other Genders, and their totals per Gender, as
+             float arrays
+    """
+    table = np.asarray(table, dtype=np.float64)
+    counts = table
+    other_counts = table.sum(axis=0) - table
+    totals = table.sum(axis=1, keepdims=True)
+    other_totals = table.sum() - totals
+    return counts, other_counts, totals, other_totals
+
+
+def _xlogy(x, y):
+    """
+    :return: x * log(y), with 0 where x is 0
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(x > 0, x * np.log(np.where(x > 0, y, 1)), 0.0)
+
+
+def log_likelihood(table):
+    """
+    :param table: a (genders x words) array of counts
+    :return: a (genders x words) array of Dunning's log-likelihood ratios (G²) of each word for each Gender
+             against the other Genders, negative where the word is under-represented for the Gender
+    """
+    counts, other_counts, totals, other_totals = _split(table)
+    word_totals = counts + other_counts
+    grand_total = totals + other_totals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = totals * word_totals / grand_total
+        other_expected = other_totals * word_totals / grand_total
+        scores = 2 * (
+            _xlogy(counts, counts / expected)
+            + _xlogy(other_counts, other_counts / other_expected)
+            + _xlogy(totals - counts, (totals - counts) / (totals - expected))
+            + _xlogy(other_totals - other_counts, (other_totals - other_counts) / (other_totals - other_expected))
+        )
+        over_represented = counts * other_totals >= other_counts * totals
+    return np.where(over_represented, scores, -scores)
+
+
+def log_odds(table, prior=None):
+    """
+    :param table: a (genders x words) array of counts
+    :param prior: an optional array of the pseudo-counts of the words (the pooled counts of every Gender if
+                  None)
+    :return: a (genders x words) array of the z-scores of the log-odds ratios of each word for each Gender
+             against the other Genders, with the informative Dirichlet prior
+    """
+    counts, other_counts, totals, other_totals = _split(table)
+    prior = (counts + other_counts)[0] if prior is None else np.asarray(prior, dtype=np.float64)
+    prior_total = prior.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = (
+            np.log((counts + prior) / (totals + prior_total - counts - prior))
+            - np.log((other_counts + prior) / (other_totals + prior_total - other_counts - prior))
+        )
+        variance = 1 / (counts + prior) + 1 / (other_counts + prior)
+        return np.nan_to_num(delta / np.sqrt(variance))
+
+
+def pmi(table):
+    """
+    :param table: a (genders x words) array of counts
+    :return: a (genders x words) array of the pointwise mutual information of each Gender and word
+    """
+    counts, other_counts, totals, other_totals = _split(table)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(counts * (totals + other_totals) / (totals * (counts + other_counts)))
+
+
+METRICS = {
+    'log_likelihood': log_likelihood,
+    'log_odds': log_odds,
+    'pmi': pmi,
+}
+
+
+def top_k(keys, vocabulary, table, scores, k):
+    """
+    :param keys: the Genders (or their keys) of the rows of the table
+    :param vocabulary: the words of the columns of the table
+    :param table: a (genders x words) array of counts
+    :param scores: a (genders x words) array of scores
+    :param k: the number of words to return per Gender
+    :return: a dictionary keying each Gender to a list of its k highest scoring words that occur near its
+             pronouns, as (word, score, count) tuples, in decreasing order of score
+    """
+    table = np.asarray(table)
+    scores = np.where(table > 0, scores, -np.inf)
+    k = min(k, scores.shape[1])
+    output = {}
+    for row, key in enumerate(keys):
+        if k == 0:
+            output[key] = []
+            continue
+        best = np.argpartition(-scores[row], k - 1)[:k]
+        best = best[np.argsort(-scores[row][best], kind='stable')]
+        output[key] = [
+            (vocabulary[column], float(scores[row, column]), int(table[row, column]))
+            for column in best if table[row, column] > 0
+        ]
+    return output
+
+
+def run_analysis(gender_counts, metric='log_likelihood', k=20, min_count=1):
+    """
+    :param gender_counts: a dictionary keying Genders (or their keys) to a dictionary of word counts, e.g.
+                          from `merge_proximity_results`
+    :param metric: one of `METRICS`
+    :param k: the number of words to return per Gender
+    :param min_count: the minimum number of occurrences, summed over the Genders, of the words to score
+    :return: a dictionary keying each Gender to its k most distinctive words (see `top_k`)
+    :raises ValueError: if the metric is not one of `METRICS`
+    """
+    if metric not in METRICS:
+        raise ValueError(f'Unknown metric {metric!r}.')
+    keys, vocabulary, table = get_count_table(gender_counts, min_count)
+    return top_k(keys, vocabulary, table, METRICS[metric](table), k)
@@ -1,9 +1,13 @@
 from collections import Counter
 from ..models import (
-    Corpus,
     Document,
     Gender
 )
+from .inputs import (
+    get_document_ids,
+    get_gender_pronouns,
+)
+from .progress import ProgressTracker
 
 
 def _get_gender_word_frequencies_relative(gender_word_counts):
@@ -37,7 +41,7 @@ def _get_gender_word_frequencies_relative(gender_word_counts):
     return output
 
 
-def run_single_analysis(doc_obj, genders):
+def run_single_analysis(doc_obj, genders, gender_pronouns=None):
     """
     This method generates a dictionary that includes a Counter (count) that keys
     Document instances to Gender instances to Counter instances representing the total
@@ -50,14 +54,20 @@ def run_single_analysis(doc_obj, genders):
 
     :param doc_obj: an instance of the Document model
     :param genders: a list of Gender objects
+    :param gender_pronouns: an optional dictionary keying each Gender's primary key to its pronouns, to
+                            avoid querying them again for every Document
     :return: a dictionary containing the frequency analyses of the Document instance
     """
     count = Counter()
     frequency = {}
 
+    if gender_pronouns is None:
+        gender_pronouns = {gender.pk: gender.pronouns for gender in genders}
+
     for gender in genders:
-        count[gender] = doc_obj.get_count_of_words(gender.pronouns)
-        frequency[gender] = doc_obj.get_word_freqs(gender.pronouns)
+        pronouns = gender_pronouns[gender.pk]
+        count[gender] = doc_obj.get_count_of_words(pronouns)
+        frequency[gender] = doc_obj.get_word_freqs(pronouns)
     relative = _get_gender_word_frequencies_relative(count)
 
     output = {
@@ -69,7 +79,7 @@ def run_single_analysis(doc_obj, genders):
     return output
 
 
-def run_analysis(corpus_id, gender_ids):
+def run_analysis(corpus_id, gender_ids, progress=None):
     """
         This method generates a dictionary of dictionaries for each Document instance in the Corpus.
         Each dictionary maps the type of frequency analysis (count, frequency, relative) to the
@@ -77,11 +87,19 @@ def run_analysis(corpus_id, gender_ids):
 
         :param corpus_id: the ID of a Corpus instance
         :param gender_ids: a list of integers representing Gender primary keys
+        :param progress: an optional `ProgressTracker` that is advanced after each Document, and that
+                         may stop the analysis between Documents by raising `AnalysisCancelled`
         :return: a dictionary mapping the Document IDs to the frequency analyses of the Document instance
     """
     results = {}
-    genders = Gender.objects.filter(id__in=gender_ids)
-    doc_ids = Corpus.objects.filter(pk=corpus_id).values_list('documents__pk', flat=True)
+    progress = progress or ProgressTracker()
+    genders = list(Gender.objects.filter(id__in=gender_ids))
+    gender_pronouns = get_gender_pronouns(genders)
+    doc_ids = get_document_ids(corpus_id)
+    progress.start(len(doc_ids))
     for pk in doc_ids:
-        results[pk] = run_single_analysis(Document.objects.get(id=pk), genders)
+        progress.check_cancelled()
+        doc_obj = Document.objects.get(id=pk)
+        results[pk] = run_single_analysis(doc_obj, genders, gender_pronouns)
+        progress.advance(doc_obj.word_count or 0)
     return results
@@ -0,0 +1,58 @@
+"""
+Inputs that the analysis functions compile from the database before looping over documents, cached
+across analyses until the models they are compiled from change.
+"""
+from .. import caching
+from ..models import (
+    Corpus,
+    Gender,
+    PronounSeries,
+)
+
+
+def get_document_ids(corpus_id):
+    """
+    :param corpus_id: the ID of a Corpus instance
+    :return: A list of the IDs of the Documents in the Corpus
+    """
+    return Corpus(pk=corpus_id).document_ids()
+
+
+def get_gender_pronouns(genders):
+    """
+    :param genders: an iterable of Gender instances
+    :return: A dictionary keying each Gender's primary key to the set of its pronouns
+    """
+    gender_ids = sorted(gender.pk for gender in genders)
+    return caching.get_or_set(
+        [Gender, PronounSeries], 'gender_pronouns', ','.join(map(str, gender_ids)),
+        lambda: {gender.pk: gender.pronouns for gender in Gender.objects.filter(pk__in=gender_ids)}
+    )
+
+
+def get_gender_pronoun_sets(genders):
+    """
+    :param genders: an iterable of Gender instances
+    :return: A dictionary keying each Gender's primary key to a dictionary keying each pronoun type
+             (see `PronounSeries.PRONOUN_TYPES`) to the set of the Gender's pronouns of that type
+    """
+    gender_ids = sorted(gender.pk for gender in genders)
+
+    def compile_pronoun_sets():
+        pronoun_sets = {
+            gender_id: {pronoun_type: set() for pronoun_type in PronounSeries.PRONOUN_TYPES}
+            for gender_id in gender_ids
+        }
+        series_values = (
+            Gender.pronoun_series.through.objects
+            .filter(gender_id__in=gender_ids)
+            .values_list('gender_id', *[f'pronounseries__{name}' for name in PronounSeries.PRONOUN_TYPES])
+        )
+        for gender_id, *pronouns in series_values:
+            for pronoun_type, pronoun in zip(PronounSeries.PRONOUN_TYPES, pronouns):
+                pronoun_sets[gender_id][pronoun_type].add(pronoun)
+        return pronoun_sets
+
+    return caching.get_or_set(
+        [Gender, PronounSeries], 'gender_pronoun_sets', ','.join(map(str, gender_ids)), compile_pronoun_sets
+    )
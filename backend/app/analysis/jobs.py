@@ -0,0 +1,150 @@
+"""
+Runs `AnalysisJob`s in the background and persists their results.
+"""
+import threading
+
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Model
+from django.utils import timezone
+
+from ..models import (
+    AnalysisJob,
+    FrequencyAnalysis,
+    ProximityAnalysis,
+)
+from . import (
+    frequency,
+    proximity,
+)
+from .progress import (
+    AnalysisCancelled,
+    JobProgressTracker,
+)
+from .results import (
+    save_frequency_rows,
+    save_proximity_rows,
+)
+
+
+def _jsonable_results(results):
+    """
+    Analysis functions key their results by model instances (e.g. `Gender`s), which cannot be
+    stored in a JSONField; this replaces every such key by the instance's primary key.
+
+    :param results: a (possibly nested) dictionary returned by an analysis function
+    :return: the same dictionary with model instance keys replaced by primary keys
+    """
+    if not isinstance(results, dict):
+        return results
+
+    return {
+        key.pk if isinstance(key, Model) else key: _jsonable_results(value)
+        for key, value in results.items()
+    }
+
+
+def _save_proximity_analysis(job, word_window, results):
+    """
+    Stores the results of a proximity analysis of a job, and their rows.
+
+    :param job: an `AnalysisJob`
+    :param word_window: the word window the results were counted for (None for a sentence window)
+    :param results: the results returned by `proximity.run_analysis`
+    :return: the new `ProximityAnalysis`
+    """
+    analysis = ProximityAnalysis.objects.create(
+        corpus_id=job.corpus_id,
+        word_window=word_window,
+        sentence_window=job.sentence_window,
+        top_k=job.top_k,
+        min_count=job.min_count,
+        pos_filter=job.pos_filter,
+        results=_jsonable_results(results)
+    )
+    analysis.genders.set({gender.pk for document_results in results.values() for gender in document_results})
+    save_proximity_rows(analysis, analysis.results)
+    return analysis
+
+
+def run_job(job_id):
+    """
+    Runs the analysis described by an `AnalysisJob` to completion in the current thread, keeping
+    its progress up to date, and stores the results in a new `FrequencyAnalysis` or
+    `ProximityAnalysis` instance (one per window for a job with several `word_windows`, all walked
+    in a single pass).
+
+    :param job_id: the primary key of a pending `AnalysisJob`
+    :return: None
+    """
+    job = AnalysisJob.objects.get(pk=job_id)
+    AnalysisJob.objects.filter(pk=job_id).update(status=AnalysisJob.RUNNING, started=timezone.now())
+    tracker = JobProgressTracker(job)
+
+    try:
+        gender_ids = list(job.genders.values_list('pk', flat=True))
+        if job.analysis_type == AnalysisJob.FREQUENCY:
+            results = _jsonable_results(frequency.run_analysis(job.corpus_id, gender_ids, progress=tracker))
+            with transaction.atomic():
+                analysis = FrequencyAnalysis.objects.create(corpus_id=job.corpus_id, results=results)
+                analysis.genders.set(gender_ids)
+                save_frequency_rows(analysis, results)
+            finished_fields = {'frequency_analysis': analysis}
+        elif job.word_windows:
+            window_results = proximity.run_multi_window_analysis(
+                job.corpus_id,
+                job.word_windows,
+                progress=tracker,
+                top_k=job.top_k,
+                min_count=job.min_count,
+                pos_filter=job.pos_filter,
+            )
+            with transaction.atomic():
+                analyses = [
+                    _save_proximity_analysis(job, word_window, results)
+                    for word_window, results in sorted(window_results.items())
+                ]
+                job.proximity_analyses.set(analyses)
+            finished_fields = {}
+        else:
+            results = proximity.run_analysis(
+                job.corpus_id,
+                job.word_window,
+                progress=tracker,
+                sentence_window=job.sentence_window,
+                top_k=job.top_k,
+                min_count=job.min_count,
+                pos_filter=job.pos_filter,
+            )
+            with transaction.atomic():
+                analysis = _save_proximity_analysis(job, job.word_window, results)
+            finished_fields = {'proximity_analysis': analysis}
+        finished_fields['status'] = AnalysisJob.COMPLETE
+    except AnalysisCancelled:
+        finished_fields = {'status': AnalysisJob.CANCELLED}
+    except Exception as err:  # pylint: disable=broad-except
+        finished_fields = {'status': AnalysisJob.FAILED, 'error': str(err)}
+
+    AnalysisJob.objects.filter(pk=job_id).update(finished=timezone.now(), eta_seconds=None, **finished_fields)
+
+
+def _run_job_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # Each thread gets its own database connection, which would otherwise stay open
+        connection.close()
+
+
+def start_job(job):
+    """
+    Starts running an `AnalysisJob` in a background thread and returns immediately.
+
+    :param job: a pending `AnalysisJob` instance
+    :return: the started `threading.Thread`
+    """
+    thread = threading.Thread(target=_run_job_in_thread, args=(job.pk,), daemon=True)
+    thread.start()
+    return thread
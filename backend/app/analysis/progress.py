@@ -0,0 +1,131 @@
+"""
+Progress reporting and cooperative cancellation for the per-document analysis loops.
+"""
+import time
+
+from ..models import AnalysisJob
+
+
+class AnalysisCancelled(Exception):
+    """
+    Raised between documents when the analysis being tracked has been asked to stop.
+    """
+
+
+class ProgressTracker:
+    """
+    Counts the documents and tokens an analysis has processed and estimates its throughput
+    and remaining time. The base tracker only keeps these numbers in memory and can never be
+    cancelled, so analyses use it when nobody is watching.
+    """
+
+    def __init__(self):
+        self.documents_total = 0
+        self.documents_processed = 0
+        self.tokens_processed = 0
+        self.start_time = None
+
+    def start(self, documents_total):
+        """
+        Resets the counters at the beginning of an analysis.
+
+        :param documents_total: the number of documents the analysis will process
+        :return: None
+        """
+        self.documents_total = documents_total
+        self.documents_processed = 0
+        self.tokens_processed = 0
+        self.start_time = time.monotonic()
+        self.report()
+
+    def advance(self, tokens=0):
+        """
+        Records that one more document has been processed.
+
+        :param tokens: the number of tokens in the processed document
+        :return: None
+        """
+        self.documents_processed += 1
+        self.tokens_processed += tokens
+        self.report(final=self.documents_processed == self.documents_total)
+
+    def check_cancelled(self):
+        """
+        Called by the analysis loops between documents; raises `AnalysisCancelled` if the
+        analysis should stop.
+        """
+
+    @property
+    def elapsed(self):
+        """
+        :return: The number of seconds since `start` was called, as a float.
+        """
+        if self.start_time is None:
+            return 0.0
+        return time.monotonic() - self.start_time
+
+    @property
+    def tokens_per_second(self):
+        """
+        :return: The average throughput so far, or None before any time has passed.
+        """
+        elapsed = self.elapsed
+        if not elapsed:
+            return None
+        return self.tokens_processed / elapsed
+
+    @property
+    def eta_seconds(self):
+        """
+        :return: The estimated number of seconds left, assuming the remaining documents take as
+                 long on average as the processed ones did; None before the first document.
+        """
+        if not self.documents_processed:
+            return None
+        remaining = self.documents_total - self.documents_processed
+        return self.elapsed / self.documents_processed * remaining
+
+    def report(self, final=False):
+        """
+        Hook for publishing the current counters; the base tracker does not publish anything.
+
+        :param final: True if this is the last report of the analysis
+        :return: None
+        """
+
+
+class JobProgressTracker(ProgressTracker):
+    """
+    A `ProgressTracker` that persists its counters onto an `AnalysisJob` row, so that other
+    requests (e.g. the progress event stream) can follow along, and that stops the analysis once
+    the job has been asked to cancel.
+    """
+
+    def __init__(self, job, report_interval=0.5):
+        """
+        :param job: the `AnalysisJob` instance being run
+        :param report_interval: the minimum number of seconds between two writes of the counters
+        """
+        super().__init__()
+        self.job = job
+        self.report_interval = report_interval
+        self.last_report = None
+
+    def check_cancelled(self):
+        if AnalysisJob.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+            raise AnalysisCancelled(f'Analysis job {self.job.pk} was cancelled.')
+
+    def report(self, final=False):
+        now = time.monotonic()
+        if not final and self.last_report is not None and now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+
+        # Only the counters are written, so a concurrent cancel request is never overwritten
+        AnalysisJob.objects.filter(pk=self.job.pk).update(
+            documents_total=self.documents_total,
+            documents_processed=self.documents_processed,
+            tokens_processed=self.tokens_processed,
+            tokens_per_second=self.tokens_per_second,
+            eta_seconds=self.eta_seconds,
+        )
@@ -1,3 +1,4 @@
+import heapq
 from collections import Counter
 from itertools import chain
 from more_itertools import windowed
@@ -5,38 +6,113 @@ from more_itertools import windowed
 from ..models import (
     Document,
     Gender,
-    Corpus,
     PronounSeries,
 )
+from .inputs import (
+    get_document_ids,
+    get_gender_pronoun_sets,
+)
+from .progress import ProgressTracker
+from .windows import count_windows
 
 
-def run_analysis(corpus_id, word_window):
+def run_analysis(corpus_id, word_window, progress=None, sentence_window=None, top_k=None, min_count=1,
+                 pos_filter=None):
     """
     Generates a dictionary of dictionaries for each `Document` object. Each dictionary maps a `Gender` to a word count
     of words within a specified window of that `Gender`'s pronouns.
 
     :param corpus_id: An int representing a `Corpus` instance
     :param word_window: An integer describing the number of words to look at of each side of a gendered word
+    :param progress: An optional `ProgressTracker` that is advanced after each `Document`, and that may stop the
+        analysis between `Document`s by raising `AnalysisCancelled`
+    :param sentence_window: An optional integer; if given, the window is the sentence of each gendered word and this
+        number of sentences on each side of it (0 for the same sentence only) instead of `word_window` words
+    :param top_k: An optional integer; if given, only the `top_k` most frequent words of each part of speech tag are
+        kept for each pronoun type of each `Gender` in each `Document` (see `prune_token_counter`)
+    :param min_count: The minimum number of occurrences of the words to keep
+    :param pos_filter: An optional collection of the part of speech tags of the words to count, e.g.
+        `common.NLTK_TAGS_ADJECTIVES` (every tag if None)
 
     :return: A dict mapping `Document` ids to a dict mapping strings (`Gender` labels) to a `Counter` instance.
         The dict is of the following form: {int: {Gender: {str: {str, Counter(str, int)}}}}
     """
     results = {}
+    progress = progress or ProgressTracker()
     genders = set(Gender.objects.all())
+    pronoun_sets = get_gender_pronoun_sets(genders)
 
-    doc_ids = Corpus.objects.filter(pk=corpus_id).values_list('documents__pk', flat=True)
+    doc_ids = get_document_ids(corpus_id)
+    progress.start(len(doc_ids))
 
     for key in doc_ids:
+        progress.check_cancelled()
+        pos_tags, tags_status, sentence_offsets, sentences_status = Document.objects.values_list(
+            'part_of_speech_tags', 'tags_status', 'sentence_offsets', 'sentences_status'
+        ).get(pk=key)
+        if tags_status != Document.ARTIFACT_COMPLETE:
+            pos_tags = Document.objects.get(pk=key).ensure_part_of_speech_tags()
+        if sentence_window is not None and sentences_status != Document.ARTIFACT_COMPLETE:
+            sentence_offsets = Document.objects.get(pk=key).ensure_sentence_offsets()
         results[key] = generate_gender_token_counters(
-            Document.objects.values_list('part_of_speech_tags', flat=True).filter(pk=key).get(),
+            pos_tags,
             genders,
-            word_window
+            word_window,
+            pronoun_sets,
+            sentence_offsets if sentence_window is not None else None,
+            sentence_window,
+            top_k,
+            min_count,
+            pos_filter
         )
+        progress.advance(len(pos_tags))
 
     return results
 
 
-def generate_gender_token_counters(pos_tags, genders, word_window):
+def run_multi_window_analysis(corpus_id, word_windows, progress=None, top_k=None, min_count=1, pos_filter=None):
+    """
+    Like `run_analysis`, for several word windows at once: each `Document` is walked once, up to the largest window,
+    rather than once per window.
+
+    :param corpus_id: An int representing a `Corpus` instance
+    :param word_windows: A collection of integers describing the numbers of words to look at of each side of a
+        gendered word
+    :param progress: An optional `ProgressTracker` that is advanced after each `Document`, and that may stop the
+        analysis between `Document`s by raising `AnalysisCancelled`
+    :param top_k: An optional integer; if given, only the `top_k` most frequent words of each part of speech tag are
+        kept, in each window
+    :param min_count: The minimum number of occurrences of the words to keep
+    :param pos_filter: An optional collection of the part of speech tags of the words to count (every tag if None)
+
+    :return: A dict mapping each word window to the results of `run_analysis` for that window
+    """
+    word_windows = sorted(set(word_windows))
+    results = {word_window: {} for word_window in word_windows}
+    progress = progress or ProgressTracker()
+    genders = set(Gender.objects.all())
+    pronoun_sets = get_gender_pronoun_sets(genders)
+
+    doc_ids = get_document_ids(corpus_id)
+    progress.start(len(doc_ids))
+
+    for key in doc_ids:
+        progress.check_cancelled()
+        pos_tags, tags_status = Document.objects.values_list('part_of_speech_tags', 'tags_status').get(pk=key)
+        if tags_status != Document.ARTIFACT_COMPLETE:
+            pos_tags = Document.objects.get(pk=key).ensure_part_of_speech_tags()
+        doc_results = generate_multi_window_gender_token_counters(
+            pos_tags, genders, word_windows, pronoun_sets, top_k, min_count, pos_filter
+        )
+        for word_window, doc_result in doc_results.items():
+            results[word_window][key] = doc_result
+        progress.advance(len(pos_tags))
+
+    return results
+
+
+def generate_gender_token_counters(pos_tags, genders, word_window, pronoun_sets=None, sentence_offsets=None,
+                                   sentence_window=None, top_k=None, min_count=1, pos_filter=None):
     """
     Generates a dictionary mapping `Gender`s to a word count of words within a specified window of the `Gender`'s
     pronouns.
@@ -45,6 +121,17 @@ def generate_gender_token_counters(pos_tags, genders, word_window):
         part-of-speech tag (str).
     :param genders: A set of Gender objects
     :param word_window: An integer describing the number of words to look at of each side of a gendered word
+    :param pronoun_sets: An optional dict mapping each `Gender`'s primary key to a dict mapping a 'PRONOUN_TYPE' to
+        the set of the `Gender`'s pronouns of that type (see `inputs.get_gender_pronoun_sets`)
+    :param sentence_offsets: An optional list of the indices of the first token of each sentence; if given, the
+        windows are `sentence_window` sentences on each side of a gendered word (see
+        `generate_sentence_token_counter`)
+    :param sentence_window: An integer describing the number of sentences to look at on each side of the sentence
+        of a gendered word
+    :param top_k: An optional integer; if given, only the `top_k` most frequent words of each part of speech tag are
+        kept (see `prune_token_counter`)
+    :param min_count: The minimum number of occurrences of the words to keep
+    :param pos_filter: An optional collection of the part of speech tags of the words to count (every tag if None)
 
     :return: A dict mapping a `Gender` instance to a dict mapping a 'PRONOUN_TYPE' to a dict instance
      mapping part of speech tag to a `Counter` instance.
@@ -53,27 +140,157 @@ def generate_gender_token_counters(pos_tags, genders, word_window):
 
     results = {}
 
+    if pronoun_sets is None:
+        pronoun_sets = get_gender_pronoun_sets(genders)
+
     for gender in genders:
         results[gender] = dict()
 
         for PRONOUN_TYPE in PronounSeries.PRONOUN_TYPES:
-            pronoun_set = gender.pronoun_series.values_list(PRONOUN_TYPE, flat=True)
-            doc_result = generate_token_counter(pos_tags, pronoun_set, word_window)
-            results[gender][PRONOUN_TYPE] = doc_result
+            pronoun_set = pronoun_sets[gender.pk][PRONOUN_TYPE]
+            if sentence_offsets is None:
+                doc_result = generate_token_counter(pos_tags, pronoun_set, word_window, pos_filter)
+            else:
+                doc_result = generate_sentence_token_counter(
+                    pos_tags, sentence_offsets, pronoun_set, sentence_window, pos_filter
+                )
+            results[gender][PRONOUN_TYPE] = prune_tag_counters(doc_result, top_k, min_count)
+
+    return results
+
+
+def generate_multi_window_gender_token_counters(pos_tags, genders, word_windows, pronoun_sets=None, top_k=None,
+                                                min_count=1, pos_filter=None):
+    """
+    Like `generate_gender_token_counters`, for several word windows at once, in a single pass over the text.
+
+    :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
+        part-of-speech tag (str).
+    :param genders: A set of Gender objects
+    :param word_windows: A collection of integers describing the numbers of words to look at of each side of a
+        gendered word
+    :param pronoun_sets: An optional dict mapping each `Gender`'s primary key to a dict mapping a 'PRONOUN_TYPE' to
+        the set of the `Gender`'s pronouns of that type (see `inputs.get_gender_pronoun_sets`)
+    :param top_k: An optional integer; if given, only the `top_k` most frequent words of each part of speech tag are
+        kept (see `prune_token_counter`)
+    :param min_count: The minimum number of occurrences of the words to keep
+    :param pos_filter: An optional collection of the part of speech tags of the words to count (every tag if None)
+
+    :return: A dict mapping each word window to the results of `generate_gender_token_counters` for that window
+    """
+    if pronoun_sets is None:
+        pronoun_sets = get_gender_pronoun_sets(genders)
+
+    pronoun_keys = {}
+    for gender in genders:
+        for PRONOUN_TYPE in PronounSeries.PRONOUN_TYPES:
+            for pronoun in pronoun_sets[gender.pk][PRONOUN_TYPE]:
+                pronoun_keys.setdefault(pronoun, []).append((gender, PRONOUN_TYPE))
+
+    results = {}
+    for word_window, counter in generate_window_counters(pos_tags, pronoun_keys, word_windows, pos_filter).items():
+        window_results = {
+            gender: {PRONOUN_TYPE: {} for PRONOUN_TYPE in PronounSeries.PRONOUN_TYPES} for gender in genders
+        }
+        for ((gender, PRONOUN_TYPE), (pos_tag, word)), count in counter.items():
+            window_results[gender][PRONOUN_TYPE].setdefault(pos_tag, Counter())[word] = count
+        results[word_window] = {
+            gender: {
+                PRONOUN_TYPE: prune_tag_counters(doc_result, top_k, min_count)
+                for PRONOUN_TYPE, doc_result in gender_results.items()
+            }
+            for gender, gender_results in window_results.items()
+        }
+    return results
+
+
+def generate_multi_window_token_counter(pos_tags, pronoun_set, word_windows):
+    """
+    Like `generate_token_counter`, for several word windows at once, in a single pass over the text.
+
+    :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
+        part-of-speech tag (str).
+    :param pronoun_set: A set of strings (pronouns) of one type of pronoun
+    :param word_windows: A collection of integers describing the numbers of words to look at on each side of a
+        gendered word
 
+    :return: A dict mapping each word window to a 'Dict' instance mapping the part of speech tag to a 'Counter'
+        instance, as returned by `generate_token_counter` for that window
+    """
+    results = {}
+    pronoun_keys = {pronoun: [None] for pronoun in pronoun_set}
+    for word_window, counter in generate_window_counters(pos_tags, pronoun_keys, word_windows).items():
+        output = results[word_window] = {}
+        for (_, (pos_tag, word)), count in counter.items():
+            output.setdefault(pos_tag, Counter())[word] = count
     return results
 
 
-def generate_token_counter(pos_tags, pronoun_set, word_window):
+def generate_window_counters(pos_tags, pronoun_keys, word_windows, pos_filter=None):
+    """
+    Counts the words within each word window of the gendered words in one pass over the text (see
+    `windows.count_windows`).
+
+    :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
+        part-of-speech tag (str).
+    :param pronoun_keys: A dict mapping each lowercase pronoun to the list of the keys its counts are recorded under
+    :param word_windows: A collection of integers describing the numbers of words to look at on each side of a
+        gendered word
+    :param pos_filter: An optional collection of the part of speech tags of the words to count (every tag if None)
+
+    :return: A dict mapping each word window to a 'Counter' instance of (key, (part of speech tag, word)) pairs,
+        counting the words (other than the gendered word itself) within that window of a gendered word
+    """
+    words = [word.lower() for word, _ in pos_tags]
+    columns = [
+        (pos_tag, word) if pos_filter is None or pos_tag in pos_filter else None
+        for word, (_, pos_tag) in zip(words, pos_tags)
+    ]
+    return count_windows(words, columns, pronoun_keys.get, word_windows)
+
+
+def prune_tag_counters(tag_counters, top_k=None, min_count=1):
+    """
+    :param tag_counters: A dict mapping part of speech tags to 'Counter' instances
+    :param top_k: An optional integer describing the number of words to keep per tag (every word if None)
+    :param min_count: The minimum number of occurrences of the words to keep
+    :return: The dict of the pruned 'Counter's (see `prune_token_counter`), without the tags left without any word
+    """
+    if top_k is None and min_count <= 1:
+        return tag_counters
+    pruned = {pos_tag: prune_token_counter(counter, top_k, min_count) for pos_tag, counter in tag_counters.items()}
+    return {pos_tag: counter for pos_tag, counter in pruned.items() if counter}
+
+
+def prune_token_counter(counter, top_k=None, min_count=1):
+    """
+    Keeps the most frequent words of a 'Counter' instance, selected with a heap rather than by sorting every word.
+    The words are pruned once a document has been counted, since their counts are only final then; the words
+    outside of the `pos_filter` of an analysis are not counted in the first place.
+
+    :param counter: A 'Counter' instance mapping words to their number of occurrences
+    :param top_k: An optional integer describing the number of words to keep (every word if None); ties are broken
+        alphabetically
+    :param min_count: The minimum number of occurrences of the words to keep
+
+    :return: A 'Counter' instance of at most `top_k` words occurring at least `min_count` times
+    """
+    items = ((word, count) for word, count in counter.items() if count >= min_count)
+    if top_k is None:
+        return Counter(dict(items))
+    return Counter(dict(heapq.nsmallest(top_k, items, key=lambda item: (-item[1], item[0]))))
+
+
+def generate_token_counter(pos_tags, pronoun_set, word_window, pos_filter=None):
     # pylint: disable=too-many-locals
     """
     Generates a 'Counter' instance mapping words to their frequency within a text.
 
     :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
         part-of-speech tag (str).
-    :param pronoun_set: A QuerySet that returns a set of strings (pronouns) when evaluated, filtered by the type of
-        pronoun
+    :param pronoun_set: A set of strings (pronouns) of one type of pronoun
     :param word_window: An integer describing the number of words to look at on each side of a gendered word
+    :param pos_filter: An optional collection of the part of speech tags of the words to count (every tag if None)
 
     :return: A 'Dict' instance mapping the part of speech tag to a 'Counter' instance,
         which features the numbered occurrences of words around a gendered pronoun.
@@ -88,7 +305,7 @@ def generate_token_counter(pos_tags, pronoun_set, word_window):
         if candidate in pronoun_set:
 
             for index, tagged_token in enumerate(tagged_tokens):
-                if tagged_token is not None:
+                if tagged_token is not None and (pos_filter is None or tagged_token[1] in pos_filter):
 
                     word = tagged_token[0].lower()
                     if word != candidate:
@@ -98,3 +315,45 @@ def generate_token_counter(pos_tags, pronoun_set, word_window):
                         output[pos_tag][word] += 1
 
     return output
+
+
+def generate_sentence_token_counter(pos_tags, sentence_offsets, pronoun_set, sentence_window=0, pos_filter=None):
+    """
+    Generates a 'Counter' instance mapping words to their frequency within the sentences around gendered words,
+    using the sentence boundaries found at ingestion rather than splitting the text into sentences again.
+
+    :param pos_tags: A list of 2-element tuples: the first element is a word (str), and the second element is a
+        part-of-speech tag (str).
+    :param sentence_offsets: A list of the indices of the first token of each sentence, in order
+    :param pronoun_set: A set of strings (pronouns) of one type of pronoun
+    :param sentence_window: An integer describing the number of sentences to look at on each side of the sentence
+        of a gendered word (0 for the same sentence only)
+    :param pos_filter: An optional collection of the part of speech tags of the words to count (every tag if None)
+
+    :return: A 'Dict' instance mapping the part of speech tag to a 'Counter' instance,
+        which features the numbered occurrences of words around a gendered pronoun, like `generate_token_counter`.
+
+    """
+    output = {}
+    # The token index each sentence ends at, and the sentence of the current token, advanced along the tokens
+    sentence_ends = list(sentence_offsets[1:]) + [len(pos_tags)]
+    sentence = 0
+
+    for index, tagged_token in enumerate(pos_tags):
+        while sentence < len(sentence_ends) - 1 and index >= sentence_ends[sentence]:
+            sentence += 1
+        candidate = tagged_token[0].lower()
+
+        if candidate in pronoun_set:
+            start = sentence_offsets[max(sentence - sentence_window, 0)] if sentence_offsets else 0
+            end = sentence_ends[min(sentence + sentence_window, len(sentence_ends) - 1)]
+
+            for word, pos_tag in pos_tags[start:end]:
+                if pos_filter is not None and pos_tag not in pos_filter:
+                    continue
+                word = word.lower()
+                if word != candidate:
+                    output.setdefault(pos_tag, Counter())
+                    output[pos_tag][word] += 1
+
+    return output
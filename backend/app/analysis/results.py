@@ -0,0 +1,139 @@
+"""
+The results of frequency and proximity analyses as rows of `FrequencyResult` and `ProximityResult`, written
+along with the analyses, and the indexed queries that slice and sum them without loading the analyses' results.
+"""
+from django.db.models import Sum
+from more_itertools import chunked
+
+from ..models import (
+    Document,
+    FrequencyResult,
+    Gender,
+    ProximityResult,
+)
+
+# The number of rows inserted per query
+BATCH_SIZE = 5000
+# The fields the rows can be filtered and grouped by, and the fields of the rows
+PROXIMITY_DIMENSIONS = ['document', 'gender', 'pronoun_type', 'pos', 'word']
+PROXIMITY_FIELDS = PROXIMITY_DIMENSIONS + ['count']
+FREQUENCY_DIMENSIONS = ['document', 'gender', 'pronoun']
+FREQUENCY_FIELDS = FREQUENCY_DIMENSIONS + ['count', 'frequency', 'relative']
+
+
+def iter_proximity_rows(results):
+    """
+    :param results: the results of a proximity analysis, keyed by primary keys (see `jobs._jsonable_results`)
+    :return: a generator of (document id, gender id, pronoun type, part of speech tag, word, count) tuples
+    """
+    for doc_id, document_results in results.items():
+        for gender_id, gender_results in document_results.items():
+            for pronoun_type, tag_counts in gender_results.items():
+                for pos, word_counts in tag_counts.items():
+                    for word, count in word_counts.items():
+                        yield int(doc_id), int(gender_id), pronoun_type, pos, word, count
+
+
+def iter_frequency_rows(results):
+    """
+    :param results: the results of a frequency analysis, keyed by primary keys (see `jobs._jsonable_results`)
+    :return: a generator of (document id, gender id, pronoun, count, frequency, relative frequency) tuples
+    """
+    for doc_id, document_results in results.items():
+        for gender_id, counts in document_results['count'].items():
+            frequencies = document_results['frequency'][gender_id]
+            relatives = document_results['relative'][gender_id]
+            for pronoun, count in counts.items():
+                yield int(doc_id), int(gender_id), pronoun, count, frequencies[pronoun], relatives[pronoun]
+
+
+def _save_rows(model, analysis, rows, batch_size):
+    """
+    Inserts the rows of an analysis in batches, leaving out the rows of `Document`s and `Gender`s deleted since
+    it ran.
+
+    :return: the number of rows inserted
+    """
+    doc_ids = set(Document.objects.values_list('pk', flat=True))
+    gender_ids = set(Gender.objects.values_list('pk', flat=True))
+    rows = (row for row in rows if row['document_id'] in doc_ids and row['gender_id'] in gender_ids)
+    inserted = 0
+    for batch in chunked(rows, batch_size):
+        model.objects.bulk_create([model(analysis=analysis, **row) for row in batch])
+        inserted += len(batch)
+    return inserted
+
+
+def save_proximity_rows(analysis, results, batch_size=BATCH_SIZE):
+    """
+    :param analysis: a `ProximityAnalysis`
+    :param results: its results, keyed by primary keys
+    :param batch_size: the number of rows inserted per query
+    :return: the number of `ProximityResult`s inserted
+    """
+    max_length = ProximityResult._meta.get_field('word').max_length
+    rows = (
+        {
+            'document_id': doc_id,
+            'gender_id': gender_id,
+            'pronoun_type': pronoun_type,
+            'pos': pos,
+            'word': word[:max_length],
+            'count': count,
+        }
+        for doc_id, gender_id, pronoun_type, pos, word, count in iter_proximity_rows(results)
+    )
+    return _save_rows(ProximityResult, analysis, rows, batch_size)
+
+
+def save_frequency_rows(analysis, results, batch_size=BATCH_SIZE):
+    """
+    :param analysis: a `FrequencyAnalysis`
+    :param results: its results, keyed by primary keys
+    :param batch_size: the number of rows inserted per query
+    :return: the number of `FrequencyResult`s inserted
+    """
+    rows = (
+        {
+            'document_id': doc_id,
+            'gender_id': gender_id,
+            'pronoun': pronoun,
+            'count': count,
+            'frequency': frequency,
+            'relative': relative,
+        }
+        for doc_id, gender_id, pronoun, count, frequency, relative in iter_frequency_rows(results)
+    )
+    return _save_rows(FrequencyResult, analysis, rows, batch_size)
+
+
+def filter_rows(rows, dimensions, criteria):
+    """
+    :param rows: a queryset of `ProximityResult`s or `FrequencyResult`s
+    :param dimensions: the fields the rows can be filtered by (`PROXIMITY_DIMENSIONS` or `FREQUENCY_DIMENSIONS`)
+    :param criteria: a dictionary keying some of the dimensions to lists of the values to keep
+    :return: the rows matching every criterion
+    :raises ValueError: if a criterion is not one of the dimensions
+    """
+    for name, values in criteria.items():
+        if name not in dimensions:
+            raise ValueError(f'Unknown field {name!r}.')
+        rows = rows.filter(**{f'{name}__in': values})
+    return rows
+
+
+def aggregate_rows(rows, dimensions, group_by, limit=None):
+    """
+    :param rows: a queryset of `ProximityResult`s or `FrequencyResult`s
+    :param dimensions: the fields the rows can be grouped by (`PROXIMITY_DIMENSIONS` or `FREQUENCY_DIMENSIONS`)
+    :param group_by: a list of dimensions
+    :param limit: an optional maximum number of groups
+    :return: a list of dictionaries keying the dimensions of each group and `total`, the sum of its counts, in
+             decreasing order of total
+    :raises ValueError: if a field to group by is not one of the dimensions
+    """
+    for name in group_by:
+        if name not in dimensions:
+            raise ValueError(f'Unknown field {name!r}.')
+    groups = rows.values(*group_by).annotate(total=Sum('count')).order_by('-total', *group_by)
+    return list(groups if limit is None else groups[:limit])
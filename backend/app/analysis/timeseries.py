@@ -0,0 +1,97 @@
+"""
+Pronoun counts of a corpus over time, bucketed by publication year.
+
+Only the small per-document pronoun counts (`Document.pronoun_counts`) and the years and word counts of the
+documents are read, in a single query filtered in SQL, so that the documents' texts and full word counters are
+never loaded; the counts are then summed per bucket with vectorized NumPy reductions. The few documents whose
+word counts are still pending are counted from their tokens instead.
+"""
+from collections import Counter
+
+import numpy as np
+
+from ..models import (
+    Corpus,
+    Document,
+    Gender,
+)
+from .inputs import get_gender_pronouns
+
+BUCKET_SIZES = {
+    'year': 1,
+    'decade': 10,
+    'century': 100,
+}
+
+
+def run_analysis(corpus_id, gender_ids, bucket='year'):
+    """
+    Sums the pronoun counts and word counts of the documents of a corpus that have a year, per year, decade
+    or century.
+
+    :param corpus_id: the ID of a Corpus instance
+    :param gender_ids: a list of integers representing Gender primary keys
+    :param bucket: one of `BUCKET_SIZES`
+    :return: a dictionary of lists aligned with the list of buckets (the first year of each bucket, in order):
+             the number of documents and of words per bucket, and for each Gender (keyed by primary key),
+             the total count of its pronouns and their frequency (count over words) per bucket, and the
+             count of each of its pronouns per bucket
+    :raises ValueError: if the bucket is not one of `BUCKET_SIZES`
+    """
+    if bucket not in BUCKET_SIZES:
+        raise ValueError(f'Unknown bucket {bucket!r}.')
+
+    genders = list(Gender.objects.filter(pk__in=gender_ids).order_by('pk'))
+    gender_pronouns = get_gender_pronouns(genders)
+    pronouns = sorted(set().union(*gender_pronouns.values()))
+
+    dated_documents = Corpus.objects.get(pk=corpus_id).get_documents().filter(year__isnull=False)
+    documents = dated_documents.filter(counts_status=Document.ARTIFACT_COMPLETE)
+    # Pronoun counts left pending (e.g. after a PronounSeries changed) are computed once, here
+    Document.ensure_pronoun_counts(documents)
+
+    rows = list(documents.values_list('year', 'word_count', 'pronoun_counts'))
+    # The documents whose word counts are pending are counted in memory, without saving anything, so that
+    # they are not left out of the results
+    for document in dated_documents.exclude(counts_status=Document.ARTIFACT_COMPLETE).iterator():
+        tokens = document.read_tokens()
+        rows.append((document.year, len(tokens), Document.count_pronouns(Counter(tokens), pronouns)))
+    years = np.array([year for year, _, _ in rows], dtype=np.int64)
+    word_counts = np.array([word_count or 0 for _, word_count, _ in rows], dtype=np.int64)
+    pronoun_counts = np.array(
+        [[doc_pronoun_counts.get(pronoun, 0) for pronoun in pronouns] for _, _, doc_pronoun_counts in rows],
+        dtype=np.int64
+    ).reshape(len(rows), len(pronouns))
+
+    buckets, bucket_index = np.unique(years // BUCKET_SIZES[bucket] * BUCKET_SIZES[bucket], return_inverse=True)
+    bucket_documents = np.bincount(bucket_index, minlength=len(buckets))
+    bucket_words = np.bincount(bucket_index, weights=word_counts, minlength=len(buckets)).astype(np.int64)
+    bucket_pronoun_counts = np.zeros((len(buckets), len(pronouns)), dtype=np.int64)
+    np.add.at(bucket_pronoun_counts, bucket_index, pronoun_counts)
+
+    # A pronouns x genders indicator matrix turns the per-pronoun sums into per-gender sums
+    membership = np.array(
+        [[pronoun in gender_pronouns[gender.pk] for gender in genders] for pronoun in pronouns], dtype=np.int64
+    ).reshape(len(pronouns), len(genders))
+    gender_counts = bucket_pronoun_counts @ membership
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gender_frequencies = np.where(bucket_words[:, None] > 0, gender_counts / bucket_words[:, None], 0.0)
+
+    return {
+        'bucket': bucket,
+        'buckets': buckets.tolist(),
+        'documents': bucket_documents.tolist(),
+        'word_counts': bucket_words.tolist(),
+        'genders': {
+            gender.pk: {
+                'label': gender.label,
+                'counts': gender_counts[:, column].tolist(),
+                'frequencies': gender_frequencies[:, column].tolist(),
+                'pronouns': {
+                    pronoun: bucket_pronoun_counts[:, pronouns.index(pronoun)].tolist()
+                    for pronoun in sorted(gender_pronouns[gender.pk])
+                },
+            }
+            for column, gender in enumerate(genders)
+        },
+    }
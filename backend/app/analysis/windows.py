@@ -0,0 +1,57 @@
+"""
+Counting the words within several windows of a set of words in one pass over a text: the words around each
+center word are counted by their distance from it, and the counts of a window are the sums of the counts of the
+distances up to it. The proximity analyses, the co-occurrence matrices and `Document.get_multi_word_windows`
+differ only in what they count the words under, which the caller gives.
+"""
+from collections import Counter
+
+
+def count_distances(words, columns, center_keys, max_window, skip_words=frozenset()):
+    """
+    :param words: the list of the lowercase words of a text
+    :param columns: a list of what to count each word as (e.g. the word, or a (word, tag) pair), None for the words
+        not to count
+    :param center_keys: a function mapping a lowercase word to the list of the keys the words around it are counted
+        under, or to None (or an empty list) if it is not a center word; e.g. the `get` method of a dict
+    :param max_window: the largest number of words to look at on each side of a center word
+    :param skip_words: words not counted around the center words, besides the center word itself
+    :return: a list of `max_window + 1` `Counter`s of (key, column) pairs, one per distance (the first one, for
+        the distance 0, is empty)
+    """
+    distance_counters = [Counter() for _ in range(max_window + 1)]
+    for index, candidate in enumerate(words):
+        keys = center_keys(candidate)
+        if not keys:
+            continue
+        for distance in range(1, max_window + 1):
+            counter = distance_counters[distance]
+            for neighbour in (index - distance, index + distance):
+                if 0 <= neighbour < len(words):
+                    word = words[neighbour]
+                    column = columns[neighbour]
+                    if column is not None and word != candidate and word not in skip_words:
+                        for key in keys:
+                            counter[key, column] += 1
+    return distance_counters
+
+
+def count_windows(words, columns, center_keys, word_windows, skip_words=frozenset()):
+    """
+    Counts the words around the center words of a text for several windows at once (see `count_distances`).
+
+    :param word_windows: a collection of non-negative ints, the numbers of words to look at on each side of a
+        center word
+    :return: a dict mapping each window to a `Counter` of (key, column) pairs
+    """
+    word_windows = set(word_windows)
+    distance_counters = count_distances(
+        words, columns, center_keys, max(word_windows, default=0), skip_words
+    )
+    output = {}
+    cumulative = Counter()
+    for distance, counter in enumerate(distance_counters):
+        cumulative.update(counter)
+        if distance in word_windows:
+            output[distance] = Counter(cumulative)
+    return output
@@ -8,3 +8,7 @@ from django.apps import AppConfig
 class Config(AppConfig):
     # noinspection PyUnresolvedReferences
     name = 'app'
+
+    def ready(self):
+        # Registers the signal receivers
+        from . import signals  # pylint: disable=import-outside-toplevel, unused-import
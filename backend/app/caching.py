@@ -0,0 +1,113 @@
+"""
+Caching of serialized API responses and compiled analysis inputs.
+
+Cache keys embed a version number per model. The signal receivers in `signals.py` bump the version of a
+model whenever one of its rows changes, which invalidates every cached value computed from that model at
+once, without having to track down the individual keys.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'app'
+
+# Sentinel for telling a cache miss from a cached None
+_MISSING = object()
+
+_stats_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def _version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def get_model_version(model):
+    """
+    :param model: a model class
+    :return: The current cache version of the model, as an int
+    """
+    version = cache.get(_version_key(model))
+    if version is None:
+        # Starting from the current time rather than from 1 ensures that a version evicted from the
+        # cache can never come back to a number under which stale values were stored
+        version = int(time.time() * 1000000)
+        if not cache.add(_version_key(model), version, timeout=None):
+            version = cache.get(_version_key(model), version)
+    return version
+
+
+def bump_model_version(*models):
+    """
+    Invalidates every cached value computed from the given models.
+
+    :param models: model classes
+    :return: None
+    """
+    for model in models:
+        try:
+            cache.incr(_version_key(model))
+        except ValueError:
+            get_model_version(model)
+
+
+def get_or_set(models, namespace, identifier, compute):
+    """
+    Returns a cached value, computing and caching it on a miss.
+
+    :param models: the model classes the value is computed from
+    :param namespace: a str naming the kind of value, under which hits and misses are counted
+    :param identifier: a str identifying the value within its namespace
+    :param compute: a function of no arguments that computes the value
+    :return: The cached or computed value
+    """
+    versions = '.'.join(str(get_model_version(model)) for model in models)
+    key = f'{KEY_PREFIX}:{namespace}:{identifier}:{versions}'
+
+    value = cache.get(key, _MISSING)
+    with _stats_lock:
+        if value is _MISSING:
+            _misses[namespace] += 1
+        else:
+            _hits[namespace] += 1
+
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, getattr(settings, 'CACHE_TIMEOUT', None))
+    return value
+
+
+def get_stats():
+    """
+    Hit and miss counts of this process since it started (or since `reset_stats`).
+
+    :return: a dictionary with the overall counts and hit rate, and the counts per namespace
+    """
+    with _stats_lock:
+        namespaces = sorted(set(_hits) | set(_misses))
+        hits = sum(_hits.values())
+        misses = sum(_misses.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else None,
+            'namespaces': {
+                namespace: {'hits': _hits[namespace], 'misses': _misses[namespace]}
+                for namespace in namespaces
+            },
+        }
+
+
+def reset_stats():
+    """
+    Resets the hit and miss counts.
+
+    :return: None
+    """
+    with _stats_lock:
+        _hits.clear()
+        _misses.clear()
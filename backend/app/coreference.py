@@ -0,0 +1,268 @@
+"""
+Offline coreference resolution of Documents with neuralcoref, and attribution of their pronouns to the
+entities they refer to.
+
+Resolving coreferences is far slower than the rest of the NLP pipeline, so it is run in batches, in a pool
+of processes, by the `resolve_coreferences` command rather than at ingestion, and its output is persisted:
+the clusters as a `CoreferenceAnnotation` per Document, computed once per version of the Document's tokens
+(and copied between Documents with identical tokens), and the pronoun attributions as `PronounAttribution`
+rows that analyses can join against.
+
+neuralcoref runs on the Document's own tokens, so that the mention spans are indices into
+`Document.tokenized_text`, a chunk of whole sentences at a time (the sentences found at ingestion, see
+`Document.sentence_offsets`, since the pipeline drops the punctuation that ends them).
+spaCy and neuralcoref are only imported when coreferences are resolved.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from joblib import (
+    Parallel,
+    delayed,
+    effective_n_jobs,
+)
+from more_itertools import chunked
+
+from .models import (
+    CoreferenceAnnotation,
+    Document,
+    PronounAttribution,
+    PronounSeries,
+)
+
+# The approximate number of tokens resolved at a time; neuralcoref's cost grows quadratically with the
+# number of mentions, and coreferences rarely span thousands of tokens
+CHUNK_SIZE = 2000
+
+
+@lru_cache(maxsize=None)
+def get_nlp():
+    """
+    Loads the spaCy model set by `settings.COREF_SPACY_MODEL`, with neuralcoref added to its pipeline, once
+    per process.
+
+    :return: a spaCy `Language`
+    """
+    # pylint: disable=import-outside-toplevel
+    import neuralcoref
+    import spacy
+
+    nlp = spacy.load(getattr(settings, 'COREF_SPACY_MODEL', 'en_core_web_sm'))
+    neuralcoref.add_to_pipe(nlp)
+    return nlp
+
+
+def find_chunk_starts(sentence_offsets, chunk_size=CHUNK_SIZE):
+    """
+    :param sentence_offsets: the index of the first token of each sentence, in order
+    :param chunk_size: the approximate number of tokens per chunk
+    :return: a list of the indices the chunks start at, starting with 0; apart from the first one, each
+             chunk starts at the first sentence that starts at least `chunk_size` tokens after the previous chunk
+    """
+    starts = [0]
+    for offset in sentence_offsets:
+        if offset - starts[-1] >= chunk_size:
+            starts.append(offset)
+    return starts
+
+
+def resolve_clusters(tokens, sentence_offsets, chunk_size=CHUNK_SIZE):
+    """
+    Resolves the coreferences of a list of tokens with neuralcoref, a chunk of sentences at a time.
+
+    :param tokens: a list of tokens (str)
+    :param sentence_offsets: the index of the first token of each sentence, in order
+    :param chunk_size: the approximate number of tokens per chunk
+    :return: a list of clusters, each a list of (start, end) token spans of its mentions, the representative
+             mention first
+    """
+    # pylint: disable=import-outside-toplevel
+    from spacy.tokens import Doc
+
+    nlp = get_nlp()
+    clusters = []
+    starts = find_chunk_starts(sentence_offsets, chunk_size)
+    for start, end in zip(starts, starts[1:] + [len(tokens)]):
+        doc = Doc(nlp.vocab, words=tokens[start:end])
+        for _, component in nlp.pipeline:
+            doc = component(doc)
+        for cluster in doc._.coref_clusters:
+            main = (cluster.main.start, cluster.main.end)
+            mentions = [main] + [
+                (mention.start, mention.end) for mention in cluster.mentions
+                if (mention.start, mention.end) != main
+            ]
+            clusters.append([(start + mention_start, start + mention_end) for mention_start, mention_end in mentions])
+    return clusters
+
+
+def attribute_pronouns(tokens, clusters, pronouns):
+    """
+    Attributes the pronouns that are mentions of a cluster to the first mention of the cluster that is not
+    a pronoun, its entity; the pronouns of clusters made of pronouns only are left out.
+
+    :param tokens: a list of tokens (str)
+    :param clusters: a list of clusters, as returned by `resolve_clusters`
+    :param pronouns: a collection of lowercase pronouns
+    :return: a list of (token index, pronoun, entity, cluster index) tuples, the pronouns and entities lowercase
+    """
+    max_length = PronounAttribution._meta.get_field('entity').max_length
+
+    def is_pronoun(mention):
+        start, end = mention
+        return end - start == 1 and tokens[start].lower() in pronouns
+
+    attributions = []
+    for cluster, mentions in enumerate(clusters):
+        entity = next((mention for mention in mentions if not is_pronoun(mention)), None)
+        if entity is None:
+            continue
+        entity = ' '.join(tokens[entity[0]:entity[1]]).lower()[:max_length]
+        attributions.extend(
+            (start, tokens[start].lower(), entity, cluster)
+            for start, end in mentions if is_pronoun((start, end))
+        )
+    return attributions
+
+
+def save_clusters(document, clusters, pronouns=None):
+    """
+    Persists the coreference clusters of a Document and the attributions of its pronouns, replacing any
+    previous ones.
+
+    :param document: a Document whose tokens are complete
+    :param clusters: a list of clusters, as returned by `resolve_clusters`
+    :param pronouns: the pronouns to attribute (`PronounSeries.get_vocabulary()` if None)
+    :return: the `CoreferenceAnnotation`
+    """
+    pronouns = set(PronounSeries.get_vocabulary() if pronouns is None else pronouns)
+    annotation = CoreferenceAnnotation(
+        document=document,
+        content_hash=document.content_hash,
+        pipeline_stages=document.pipeline_stages,
+        tokenizer=document.tokenizer,
+    )
+    annotation.set_clusters(clusters)
+    with transaction.atomic():
+        CoreferenceAnnotation.objects.filter(document=document).delete()
+        annotation.save()
+        _save_attributions(document, attribute_pronouns(document.tokenized_text, clusters, pronouns))
+    return annotation
+
+
+def reattribute_pronouns(annotations, pronouns=None):
+    """
+    Attributes the pronouns of already annotated Documents again from their stored clusters, e.g. after the
+    pronoun series changed, without resolving their coreferences again.
+
+    :param annotations: a queryset of `CoreferenceAnnotation`s
+    :param pronouns: the pronouns to attribute (`PronounSeries.get_vocabulary()` if None)
+    :return: the number of Documents whose pronouns were attributed
+    """
+    pronouns = set(PronounSeries.get_vocabulary() if pronouns is None else pronouns)
+    count = 0
+    for annotation in annotations.select_related('document').iterator():
+        with transaction.atomic():
+            _save_attributions(
+                annotation.document,
+                attribute_pronouns(annotation.document.tokenized_text, annotation.get_clusters(), pronouns)
+            )
+        count += 1
+    return count
+
+
+def _save_attributions(document, attributions):
+    PronounAttribution.objects.filter(document=document).delete()
+    PronounAttribution.objects.bulk_create([
+        PronounAttribution(document=document, token_index=index, pronoun=pronoun, entity=entity, cluster=cluster)
+        for index, pronoun, entity, cluster in attributions
+    ])
+
+
+def annotate_documents(doc_ids, n_jobs=None, batch_size=None, progress=None):
+    """
+    Resolves the coreferences of the given Documents that have no current `CoreferenceAnnotation`, in a pool
+    of processes. Documents whose tokens are identical to those of an annotated Document copy its clusters
+    instead, and each batch is persisted as soon as it is resolved.
+
+    :param doc_ids: a list of Document primary keys
+    :param n_jobs: the number of processes (all of the CPUs if None); 1 resolves them serially
+    :param batch_size: the number of Documents resolved between two commits (twice the number of
+                       processes if None)
+    :param progress: an optional function called with the number of Documents annotated so far
+    :return: the number of Documents annotated
+    """
+    n_jobs = effective_n_jobs(-1 if n_jobs is None else n_jobs)
+    batch_size = batch_size or 2 * n_jobs
+    pronouns = PronounSeries.get_vocabulary()
+    current = {
+        annotation.document_id: annotation
+        for annotation in CoreferenceAnnotation.objects.filter(document__in=doc_ids)
+    }
+
+    # Documents with identical tokens are resolved once, keyed by the version of their tokens
+    pending = {}
+    for document in Document.objects.filter(pk__in=doc_ids).order_by('pk').defer('text', 'part_of_speech_tags'):
+        if document.pk in current and current[document.pk].is_current(document):
+            continue
+        key = (document.content_hash, repr(document.pipeline_stages), document.tokenizer)
+        pending.setdefault(key, []).append(document)
+
+    annotated = 0
+    for batch in chunked(pending.values(), batch_size):
+        to_resolve = []
+        for documents in batch:
+            documents[0].ensure_artifacts('tokens')
+            for document in documents[1:]:
+                document.tokenized_text = documents[0].tokenized_text
+            duplicate = CoreferenceAnnotation.objects.filter(
+                content_hash=documents[0].content_hash,
+                tokenizer=documents[0].tokenizer,
+                # A JSONField compared with None matches a JSON null rather than a missing value
+                **(
+                    {'pipeline_stages__isnull': True} if documents[0].pipeline_stages is None
+                    else {'pipeline_stages': documents[0].pipeline_stages}
+                )
+            ).exclude(document__in=documents).first()
+            if duplicate is not None:
+                for document in documents:
+                    save_clusters(document, duplicate.get_clusters(), pronouns)
+                annotated += len(documents)
+            else:
+                documents[0].ensure_artifacts('sentences')
+                to_resolve.append(documents)
+
+        if len(to_resolve) == 1 or n_jobs == 1:
+            results = [
+                resolve_clusters(documents[0].tokenized_text, documents[0].sentence_offsets) for documents in to_resolve
+            ]
+        else:
+            results = Parallel(n_jobs=n_jobs)(
+                delayed(resolve_clusters)(documents[0].tokenized_text, documents[0].sentence_offsets)
+                for documents in to_resolve
+            )
+        for documents, clusters in zip(to_resolve, results):
+            for document in documents:
+                save_clusters(document, clusters, pronouns)
+            annotated += len(documents)
+        if progress:
+            progress(annotated)
+    return annotated
+
+
+def count_entity_pronouns(doc_ids, pronouns):
+    """
+    :param doc_ids: a list of Document primary keys
+    :param pronouns: a collection of pronouns, e.g. `Gender.pronouns`
+    :return: a dictionary keying the entities the pronouns of the Documents refer to to their number of pronouns
+    """
+    return dict(
+        PronounAttribution.objects
+        .filter(document__in=doc_ids, pronoun__in=[pronoun.lower() for pronoun in pronouns])
+        .values('entity')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'entity')
+        .values_list('entity', 'count')
+    )
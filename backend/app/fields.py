@@ -1,9 +1,17 @@
 """
 Custom fields for the gender analysis web app.
 """
+import json
+import zlib
+
 from django.db import models
+from django.db.models.fields.json import KeyTransform
 from django.utils.translation import gettext_lazy
 
+# The zlib compression level of the compressed fields: 6 is zlib's default, and compresses text and JSON
+# almost as well as 9 in a fraction of the time
+COMPRESSION_LEVEL = 6
+
 
 class LowercaseCharField(models.CharField):
     """
@@ -27,3 +35,102 @@ class LowercaseCharField(models.CharField):
         setattr(model_instance, self.attname, chars_lower)
 
         return chars_lower
+
+
+def compress(text):
+    """
+    :param text: a str
+    :return: the UTF-8 encoding of the str, compressed with zlib
+    """
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress(value):
+    """
+    :param value: a value read from a compressed column (bytes, or a memoryview on some backends)
+    :return: the decompressed str
+    """
+    return zlib.decompress(value).decode('utf-8')
+
+
+class CompressedLookupsMixin:
+    """
+    Restricts the lookups of a compressed field to `isnull`: the other lookups of text and JSON fields (e.g.
+    `icontains` or a key transform) would compare the compressed bytes, and match nothing or the wrong rows,
+    so they raise a FieldError instead.
+    """
+
+    def get_lookup(self, lookup_name):
+        if lookup_name != 'isnull':
+            return None
+        return super().get_lookup(lookup_name)
+
+    def get_transform(self, name):
+        return None
+
+
+class CompressedTextField(CompressedLookupsMixin, models.TextField):
+    """
+    A subclass of models.TextField that stores the text compressed with zlib in a binary column, and
+    decompresses it when it is read. The column can only be looked up by whether it is null.
+    """
+
+    description = gettext_lazy('Text compressed with zlib')
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(compress(value))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress(value)
+
+
+class CompressedJSONField(CompressedLookupsMixin, models.JSONField):
+    """
+    A subclass of models.JSONField that stores the JSON compressed with zlib in a binary column, and
+    decompresses and parses it when it is read. Unlike a JSONField, the column cannot be queried by key:
+    it can only be looked up by whether it is null.
+    """
+
+    description = gettext_lazy('A JSON object compressed with zlib')
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(compress(value))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return json.loads(decompress(value), cls=self.decoder)
+
+
+class ObjectKeyTransform(KeyTransform):
+    """
+    A KeyTransform of a JSONField that always reads a key of the top level object, where KeyTransform reads an
+    all-digit key (e.g. a token such as '1984') as an index into an array. It cannot be chained or used in a lookup
+    (the lookups of KeyTransform still read all-digit keys as indices).
+    """
+
+    def as_mysql(self, compiler, connection):
+        lhs, params = self.preprocess_lhs(compiler, connection, lhs_only=True)
+        return 'JSON_EXTRACT(%s, %%s)' % lhs, tuple(params) + ('$.' + json.dumps(self.key_name),)
+
+    as_sqlite = as_mysql
+
+    def as_postgresql(self, compiler, connection):
+        lhs, params = self.preprocess_lhs(compiler, connection, lhs_only=True)
+        return '(%s %s %%s)' % (lhs, self.postgres_operator), tuple(params) + (self.key_name,)
@@ -0,0 +1,144 @@
+"""
+Streaming import of directories of text files (e.g. Project Gutenberg dumps) as Documents.
+
+The files are read one at a time, in the order of a CSV manifest (or in file name order without one), and
+their Documents are committed in batches. Each batch is committed along with the position of the import
+in the manifest, recorded on its `ImportRun`, so an interrupted import resumes after the last committed
+batch instead of starting over.
+"""
+import csv
+import os
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from more_itertools import chunked
+
+from . import caching
+from .models import (
+    Corpus,
+    Document,
+    ImportRun,
+)
+
+# The manifest column holding the file names, relative to the source directory
+FILENAME_COLUMN = 'filename'
+# The manifest columns stored in Document fields; the other columns go to `Document.new_attributes`
+FIELD_COLUMNS = ['author', 'year', 'title']
+
+
+def parse_metadata(row):
+    """
+    :param row: a dictionary of the columns of a manifest row (without the file name)
+    :return: a dictionary of Document field values: `author`, `year` (an int, or None if it is missing or
+             not a number, in which case it is kept in `new_attributes`), `title` and `new_attributes`
+    """
+    fields = {
+        'author': (row.get('author') or '').strip(),
+        'title': (row.get('title') or '').strip(),
+        'year': None,
+        'new_attributes': {
+            key: value.strip()
+            for key, value in row.items()
+            if key and key not in FIELD_COLUMNS and value and value.strip()
+        },
+    }
+    year = (row.get('year') or '').strip()
+    if year:
+        try:
+            fields['year'] = int(year)
+        except ValueError:
+            fields['new_attributes']['year'] = year
+    return fields
+
+
+def iter_sources(source_dir, manifest=None):
+    """
+    Lists the files to import lazily.
+
+    :param source_dir: the directory holding the text files
+    :param manifest: an optional path to a CSV file with a `filename` column and metadata columns; without
+                     it, every .txt file of the directory is imported, titled after its file name
+    :return: a generator of (path, Document field values) tuples, always in the same order
+    """
+    if manifest:
+        with open(manifest, newline='', encoding='utf-8') as manifest_file:
+            for row in csv.DictReader(manifest_file):
+                filename = row.pop(FILENAME_COLUMN)
+                yield os.path.join(source_dir, filename), parse_metadata(row)
+        return
+
+    for filename in sorted(os.listdir(source_dir)):
+        if filename.endswith('.txt'):
+            yield os.path.join(source_dir, filename), parse_metadata({'title': filename[:-len('.txt')]})
+
+
+def run_import(run, progress=None):
+    """
+    Imports the files of an `ImportRun` from its last checkpoint on, committing a batch of Documents and
+    the new checkpoint at a time. If an error interrupts the import, the run is marked as failed, keeping
+    its last checkpoint, and the error is raised again.
+
+    :param run: an `ImportRun` that is not complete
+    :param progress: an optional function called with the run after each committed batch
+    :return: the run, complete
+    """
+    pipeline = run.get_pipeline()
+    sources = islice(iter_sources(run.source_dir, run.manifest), run.position, None)
+    ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.RUNNING, error='')
+
+    try:
+        for batch in chunked(sources, run.batch_size):
+            with transaction.atomic():
+                for path, fields in batch:
+                    with open(path, encoding='utf-8', errors='replace') as text_file:
+                        text = text_file.read()
+                    Document.objects.create_document(pipeline=pipeline, text=text, import_run=run, **fields)
+                ImportRun.objects.filter(pk=run.pk).update(
+                    position=F('position') + len(batch),
+                    modified=timezone.now(),
+                )
+            run.refresh_from_db()
+            if progress:
+                progress(run)
+    except BaseException as err:
+        ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.FAILED, error=repr(err))
+        raise
+
+    ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.COMPLETE, finished=timezone.now())
+    run.refresh_from_db()
+    return run
+
+
+def attach_to_corpus(run, title, description=''):
+    """
+    Creates a Corpus of every Document imported by a run, linking them all in one bulk insert rather
+    than one m2m `add` per Document.
+
+    :param run: a complete `ImportRun`
+    :param title: the title of the new Corpus
+    :param description: the description of the new Corpus
+    :return: the new Corpus
+    """
+    with transaction.atomic():
+        corpus = Corpus.objects.create(
+            title=title,
+            description=description,
+            pipeline_stages=run.pipeline_stages,
+            tokenizer=run.tokenizer,
+        )
+        through = Corpus.documents.through
+        links = []
+        content_hashes = []
+        for doc_id, content_hash in run.documents.values_list('pk', 'content_hash').iterator():
+            links.append(through(corpus_id=corpus.pk, document_id=doc_id))
+            content_hashes.append(content_hash)
+        through.objects.bulk_create(links)
+
+        # bulk_create sends no m2m_changed signal, so the receivers' work is done here
+        corpus.update_fingerprint(added=content_hashes)
+        ImportRun.objects.filter(pk=run.pk).update(corpus=corpus)
+    caching.bump_model_version(Corpus)
+    run.corpus = corpus
+    return corpus
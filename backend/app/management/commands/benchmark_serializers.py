@@ -0,0 +1,60 @@
+"""
+Compares the latency of serializing the document listing with SimpleDocumentSerializer and with the
+`values_list` fast path used by the list endpoints.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from app.models import Document
+from app.serializers import (
+    SimpleDocumentSerializer,
+    serialize_simple_document_rows,
+)
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000, 1000000],
+                            help='numbers of documents to benchmark with')
+
+    def handle(self, *args, **options):
+        # Everything happens in a transaction that is rolled back, so the benchmark rows are never kept
+        with transaction.atomic():
+            existing = Document.objects.count()
+            created = 0
+            for size in sorted(options['sizes']):
+                while created < size:
+                    batch = min(BATCH_SIZE, size - created)
+                    Document.objects.bulk_create(
+                        Document(title=f'Benchmark {created + i}', author='Anonymous', year=1850, word_count=1000)
+                        for i in range(batch)
+                    )
+                    created += batch
+                self.benchmark(existing + size)
+            transaction.set_rollback(True)
+
+    def benchmark(self, size):
+        queryset = Document.objects.all()
+        renderer = JSONRenderer()
+
+        start = time.perf_counter()
+        serializer_json = renderer.render(SimpleDocumentSerializer(queryset, many=True).data)
+        serializer_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast_json = renderer.render(serialize_simple_document_rows(queryset))
+        fast_seconds = time.perf_counter() - start
+
+        if fast_json != serializer_json:
+            self.stderr.write(f'{size} rows: the fast path output differs from the serializer output')
+        self.stdout.write(
+            f'{size:>9} rows: SimpleDocumentSerializer {serializer_seconds:8.3f}s, '
+            f'values_list {fast_seconds:8.3f}s ({serializer_seconds / fast_seconds:.1f}x faster)'
+        )
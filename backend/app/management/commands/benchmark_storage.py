@@ -0,0 +1,75 @@
+"""
+Compares the size of the compressed columns of the documents and analyses in the database with the size of
+their uncompressed values, and the latency of reading them (decompressing then parsing, against parsing only).
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from app.fields import decompress
+from app.models import (
+    Document,
+    FrequencyAnalysis,
+    ProximityAnalysis,
+)
+
+COMPRESSED_COLUMNS = [
+    (Document, 'text'),
+    (Document, 'tokenized_text'),
+    (Document, 'part_of_speech_tags'),
+    (FrequencyAnalysis, 'results'),
+    (ProximityAnalysis, 'results'),
+]
+
+
+def best_time(function, values, repeat):
+    """
+    :return: the shortest time, in seconds, of `repeat` runs of the function over the values
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in values:
+            function(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='the maximum number of rows read per column')
+        parser.add_argument('--repeat', type=int, default=3, help='number of runs to keep the best of')
+
+    def handle(self, *args, **options):
+        for model, name in COMPRESSED_COLUMNS:
+            column = connection.ops.quote_name(model._meta.get_field(name).column)
+            table = connection.ops.quote_name(model._meta.db_table)
+            sql = f'SELECT {column} FROM {table} WHERE {column} IS NOT NULL'
+            with connection.cursor() as cursor:
+                cursor.execute(sql + (f' LIMIT {int(options["limit"])}' if options['limit'] else ''))
+                # Values written before the column was compressed are left out
+                stored = [bytes(value) for value, in cursor.fetchall() if not isinstance(value, str)]
+            if not stored:
+                self.stdout.write(f'{model.__name__}.{name}: no compressed values')
+                continue
+
+            plain = [decompress(value) for value in stored]
+            compressed_size = sum(len(value) for value in stored)
+            plain_size = sum(len(value.encode('utf-8')) for value in plain)
+            if name == 'text':
+                read_plain, read_compressed = (lambda value: value), decompress
+            else:
+                read_plain, read_compressed = json.loads, lambda value: json.loads(decompress(value))
+            plain_seconds = best_time(read_plain, plain, options['repeat'])
+            compressed_seconds = best_time(read_compressed, stored, options['repeat'])
+
+            self.stdout.write(
+                f'{model.__name__}.{name}: {len(stored)} values, {plain_size:,} bytes -> {compressed_size:,} bytes '
+                f'({plain_size / compressed_size:.1f}x); read {plain_seconds * 1000:.1f}ms uncompressed, '
+                f'{compressed_seconds * 1000:.1f}ms compressed'
+            )
@@ -0,0 +1,56 @@
+"""
+Compares the latency of serial part of speech tagging (`nltk.pos_tag`) with chunked, parallel tagging on a
+long text: a text file, or the tokens of the documents in the database, repeated up to the requested length.
+"""
+import time
+
+import nltk
+from django.core.management.base import BaseCommand
+
+from app import tagging
+from app.models import Document
+from app.pipeline import Pipeline
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='a text file to benchmark with instead of the documents')
+        parser.add_argument('--tokens', type=int, default=1000000, help='the number of tokens to tag')
+        parser.add_argument('--jobs', type=int, nargs='+', default=[2, 4, -1],
+                            help='the numbers of processes to compare (-1 for all of the CPUs)')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as text_file:
+                tokens = Pipeline().run(text_file.read())[1]
+        else:
+            tokens = [
+                token
+                for doc_tokens in Document.objects.filter(tokenized_text__isnull=False)
+                .values_list('tokenized_text', flat=True)
+                for token in doc_tokens
+            ]
+        if not tokens:
+            self.stderr.write('No tokens to tag')
+            return
+        tokens = (tokens * (options['tokens'] // len(tokens) + 1))[:options['tokens']]
+        self.stdout.write(f'{len(tokens)} tokens')
+
+        start = time.perf_counter()
+        serial = nltk.pos_tag(tokens)
+        serial_seconds = time.perf_counter() - start
+        self.stdout.write(f'nltk.pos_tag: {serial_seconds:8.3f}s ({len(tokens) / serial_seconds:,.0f} tokens/s)')
+
+        for n_jobs in options['jobs']:
+            n_jobs = tagging.effective_n_jobs(n_jobs)
+            start = time.perf_counter()
+            parallel = tagging.pos_tag(tokens, n_jobs=n_jobs, chunk_size=-(-len(tokens) // n_jobs))
+            seconds = time.perf_counter() - start
+            self.stdout.write(
+                f'{n_jobs:>3} processes: {seconds:8.3f}s ({len(tokens) / seconds:,.0f} tokens/s, '
+                f'{serial_seconds / seconds:.1f}x)'
+            )
+            if parallel != serial:
+                self.stderr.write(f'The output with {n_jobs} processes differs from the serial output')
@@ -0,0 +1,61 @@
+"""
+Compares the latency of the text processing pipeline with the previous processing path (two regular
+expression passes for the quotes, then separate passes to filter punctuation, lowercase and count) on the
+texts of the documents in the database, or on a text file.
+"""
+import re
+import string
+import time
+from collections import Counter
+
+import nltk
+from django.core.management.base import BaseCommand
+
+from app.models import Document
+from app.pipeline import Pipeline
+
+
+def legacy_tokenize(text):
+    """
+    The processing path that `Pipeline` replaced, kept for comparison.
+    """
+    text = re.sub(r'[\“\”]', '\"', re.sub(r'[\‘\’]', '\'', text))
+    tokens = nltk.word_tokenize(text)
+    excluded_characters = set(string.punctuation)
+    tokenized_text = [word.lower() for word in tokens if word not in excluded_characters]
+    return text, tokenized_text, Counter(tokenized_text)
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='a text file to benchmark with instead of the documents')
+        parser.add_argument('--stages', nargs='+', help='the pipeline stages (the default pipeline if omitted)')
+        parser.add_argument('--repeat', type=int, default=3, help='number of runs to keep the best of')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as text_file:
+                texts = [text_file.read()]
+        else:
+            texts = list(Document.objects.values_list('text', flat=True))
+        pipeline = Pipeline(options['stages'])
+        word_count = sum(len(text.split()) for text in texts)
+
+        timings = {}
+        for name, process in [('legacy', legacy_tokenize), ('pipeline', pipeline.run)]:
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                outputs = [process(text) for text in texts]
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = (best, outputs)
+
+        (legacy_seconds, legacy_outputs), (pipeline_seconds, pipeline_outputs) = timings['legacy'], timings['pipeline']
+        self.stdout.write(f'{len(texts)} texts, about {word_count} words')
+        self.stdout.write(f'legacy:   {legacy_seconds:8.3f}s ({word_count / legacy_seconds:,.0f} words/s)')
+        self.stdout.write(f'pipeline: {pipeline_seconds:8.3f}s ({word_count / pipeline_seconds:,.0f} words/s)')
+        if pipeline.stages == Pipeline().stages and legacy_outputs != pipeline_outputs:
+            self.stderr.write('The default pipeline output differs from the legacy output')
@@ -0,0 +1,36 @@
+"""
+Builds the co-occurrence matrices of corpora, or brings them up to date by counting only the documents
+added since they were last built, so that proximity queries do not have to wait for them. Meant to be run
+in the background, e.g. after an import.
+"""
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from app.analysis import cooccurrence
+from app.models import (
+    CooccurrenceMatrix,
+    Corpus,
+)
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpora', type=int, nargs='*', help='the ids of the corpora (every corpus if omitted)')
+        parser.add_argument('--windows', type=int, nargs='+', default=CooccurrenceMatrix.DEFAULT_WINDOWS,
+                            help='the word windows to build matrices for')
+
+    def handle(self, *args, **options):
+        corpus_ids = options['corpora'] or list(Corpus.objects.order_by('pk').values_list('pk', flat=True))
+        for corpus_id in corpus_ids:
+            try:
+                matrices = cooccurrence.update_matrices(corpus_id, options['windows'])
+            except Corpus.DoesNotExist as err:
+                raise CommandError(f'Corpus {corpus_id} not found.') from err
+            except ValueError as err:
+                raise CommandError(str(err)) from err
+            for matrix in matrices.values():
+                self.stdout.write(repr(matrix))
@@ -0,0 +1,106 @@
+"""
+Compares the tokenizer engines on the texts of the documents in the database, or on a text file: the
+throughput of each engine, and how much the word counts they produce diverge from those of the reference
+engine (NLTK by default).
+"""
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from app.models import (
+    Document,
+    PronounSeries,
+)
+from app.pipeline import (
+    DEFAULT_TOKENIZER,
+    TOKENIZERS,
+    Pipeline,
+)
+
+
+def count_divergence(reference, other):
+    """
+    :param reference: a Counter of the tokens produced by the reference tokenizer
+    :param other: a Counter of the tokens produced by another tokenizer
+    :return: a tuple of the total variation distance between the relative frequencies of the two Counters
+             (0 when they are proportional, 1 when they have no token in common) and the Jaccard similarity
+             of their vocabularies
+    """
+    reference_total = sum(reference.values()) or 1
+    other_total = sum(other.values()) or 1
+    vocabulary = reference.keys() | other.keys()
+    distance = sum(
+        abs(reference[token] / reference_total - other[token] / other_total) for token in vocabulary
+    ) / 2
+    common = reference.keys() & other.keys()
+    jaccard = len(common) / len(vocabulary) if vocabulary else 1.0
+    return distance, jaccard
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='a text file to compare with instead of the documents')
+        parser.add_argument('--stages', nargs='+', help='the pipeline stages (the default pipeline if omitted)')
+        parser.add_argument('--reference', default=DEFAULT_TOKENIZER, help='the tokenizer to compare against')
+        parser.add_argument('--repeat', type=int, default=3, help='number of runs to keep the best of')
+        parser.add_argument('--top', type=int, default=10, help='number of most diverging words to list')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as text_file:
+                texts = [text_file.read()]
+        else:
+            texts = list(Document.objects.values_list('text', flat=True))
+        word_count = sum(len(text.split()) for text in texts)
+        self.stdout.write(f'{len(texts)} texts, about {word_count} words')
+
+        counters = {}
+        for tokenizer in sorted(TOKENIZERS):
+            pipeline = Pipeline(options['stages'], tokenizer)
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                counter = Counter()
+                for text in texts:
+                    counter.update(pipeline.run(text)[2])
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            counters[tokenizer] = counter
+            self.stdout.write(
+                f'{tokenizer:>10}: {best:8.3f}s ({word_count / best:,.0f} words/s), '
+                f'{sum(counter.values())} tokens, {len(counter)} distinct'
+            )
+
+        pronouns = set()
+        for row in PronounSeries.objects.values_list('subj', 'obj', 'pos_det', 'pos_pro', 'reflex'):
+            pronouns.update(pronoun for pronoun in row if pronoun)
+
+        reference = counters[options['reference']]
+        for tokenizer, counter in sorted(counters.items()):
+            if tokenizer == options['reference']:
+                continue
+            distance, jaccard = count_divergence(reference, counter)
+            self.stdout.write(f'\n{tokenizer} vs {options["reference"]}:')
+            self.stdout.write(f'  total variation distance of the counts: {distance:.4f}')
+            self.stdout.write(f'  vocabulary Jaccard similarity:          {jaccard:.4f}')
+
+            differences = Counter({
+                token: counter[token] - reference[token] for token in reference.keys() | counter.keys()
+            })
+            most_different = sorted(differences.items(), key=lambda item: (-abs(item[1]), item[0]))
+            self.stdout.write(f'  most diverging words ({tokenizer} count - {options["reference"]} count):')
+            for token, difference in most_different[:options['top']]:
+                if difference:
+                    self.stdout.write(f'    {token!r}: {difference:+d}')
+
+            pronoun_differences = {pronoun: differences[pronoun] for pronoun in sorted(pronouns)}
+            if any(pronoun_differences.values()):
+                self.stdout.write('  pronoun count differences:')
+                for pronoun, difference in pronoun_differences.items():
+                    if difference:
+                        self.stdout.write(f'    {pronoun}: {difference:+d}')
+            else:
+                self.stdout.write('  pronoun counts are identical')
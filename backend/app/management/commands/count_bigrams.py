@@ -0,0 +1,32 @@
+"""
+Computes the bigram counts of the documents whose bigram counts are still pending (e.g. documents added
+before the bigram counts were computed at ingestion), so that `words_associated` can read them from the
+database instead of counting the words from the tokens on every request.
+"""
+from django.core.management.base import BaseCommand
+
+from app.models import Document
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', type=int, help='only count the bigrams of the documents of this corpus')
+        parser.add_argument('--limit', type=int, help='the maximum number of documents to count the bigrams of')
+
+    def handle(self, *args, **options):
+        queryset = Document.objects.filter(bigrams_status=Document.ARTIFACT_PENDING).order_by('pk')
+        if options['corpus'] is not None:
+            queryset = queryset.filter(corpus=options['corpus'])
+        doc_ids = list(queryset.values_list('pk', flat=True)[:options['limit']])
+
+        counted = 0
+        for doc_id in doc_ids:
+            # Loaded one at a time, since the bigrams of a document may have been counted since the query
+            doc = Document.objects.get(pk=doc_id)
+            doc.ensure_artifacts('bigrams')
+            counted += 1
+            self.stdout.write(f'Counted the bigrams of {doc!r} ({counted}/{len(doc_ids)})')
+
+        self.stdout.write(f'{counted} documents counted')
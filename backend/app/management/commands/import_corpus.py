@@ -0,0 +1,65 @@
+"""
+Imports a directory of text files as documents, in batches, with their metadata read from an optional CSV
+manifest (a `filename` column, `author`, `year` and `title` columns, and any other columns, which are stored
+as new attributes). An interrupted import is resumed with --resume and the id of its run.
+"""
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from app import importer
+from app.models import ImportRun
+from app.pipeline import Pipeline
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_dir', nargs='?', help='the directory holding the text files')
+        parser.add_argument('--manifest', default='', help='a CSV manifest of the files and their metadata')
+        parser.add_argument('--batch-size', type=int, default=100, help='the number of documents per commit')
+        parser.add_argument('--stages', nargs='+', help='the pipeline stages (the default pipeline if omitted)')
+        parser.add_argument('--tokenizer', help='the tokenizer (the default tokenizer if omitted)')
+        parser.add_argument('--resume', type=int, help='the id of an interrupted import run to resume')
+        parser.add_argument('--corpus', help='the title of a new corpus to add the imported documents to')
+
+    def handle(self, *args, **options):
+        if options['resume'] is not None:
+            try:
+                run = ImportRun.objects.get(pk=options['resume'])
+            except ImportRun.DoesNotExist as err:
+                raise CommandError(f'Import run {options["resume"]} not found.') from err
+            if run.status == ImportRun.COMPLETE:
+                raise CommandError(f'Import run {run.pk} is already complete.')
+            self.stdout.write(f'Resuming {run!r}')
+        elif options['source_dir']:
+            try:
+                pipeline = Pipeline(options['stages'], options['tokenizer'])
+            except ValueError as err:
+                raise CommandError(str(err)) from err
+            run = ImportRun.objects.create(
+                source_dir=options['source_dir'],
+                manifest=options['manifest'],
+                pipeline_stages=pipeline.stages,
+                tokenizer=pipeline.tokenizer,
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(f'Starting import run {run.pk}')
+        else:
+            raise CommandError('Either a source directory or --resume is required.')
+
+        try:
+            run = importer.run_import(
+                run, progress=lambda run: self.stdout.write(f'{run.position} files imported')
+            )
+        except Exception as err:
+            raise CommandError(
+                f'Import run {run.pk} stopped: {err!r}. Resume it with --resume {run.pk}.'
+            ) from err
+
+        self.stdout.write(f'Import run {run.pk} complete: {run.position} documents')
+        if options['corpus']:
+            corpus = importer.attach_to_corpus(run, options['corpus'])
+            self.stdout.write(f'Added the documents to {corpus!r}')
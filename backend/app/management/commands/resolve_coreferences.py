@@ -0,0 +1,47 @@
+"""
+Resolves the coreferences of the documents that have not been resolved since their text last changed, in a
+pool of processes, and attributes their pronouns to the entities they refer to. With --reattribute, the
+pronouns of the resolved documents are attributed again from their stored clusters instead (e.g. after the
+pronoun series changed). Meant to be run in the background, e.g. after an import.
+"""
+from django.core.management.base import BaseCommand
+
+from app import coreference
+from app.models import (
+    CoreferenceAnnotation,
+    Document,
+)
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', type=int, help='only resolve the documents of this corpus')
+        parser.add_argument('--limit', type=int, help='the maximum number of documents to resolve')
+        parser.add_argument('--jobs', type=int, default=-1, help='the number of processes (-1 for all of the CPUs)')
+        parser.add_argument('--batch-size', type=int, help='the number of documents resolved per commit')
+        parser.add_argument('--reattribute', action='store_true',
+                            help='attribute the pronouns of the resolved documents again')
+
+    def handle(self, *args, **options):
+        if options['reattribute']:
+            annotations = CoreferenceAnnotation.objects.order_by('document')
+            if options['corpus'] is not None:
+                annotations = annotations.filter(document__corpus=options['corpus'])
+            count = coreference.reattribute_pronouns(annotations)
+            self.stdout.write(f'{count} documents attributed')
+            return
+
+        queryset = Document.objects.order_by('pk')
+        if options['corpus'] is not None:
+            queryset = queryset.filter(corpus=options['corpus'])
+        doc_ids = list(queryset.values_list('pk', flat=True)[:options['limit']])
+
+        annotated = coreference.annotate_documents(
+            doc_ids,
+            n_jobs=options['jobs'],
+            batch_size=options['batch_size'],
+            progress=lambda annotated: self.stdout.write(f'{annotated} documents resolved'),
+        )
+        self.stdout.write(f'{annotated} documents resolved')
@@ -0,0 +1,31 @@
+"""
+Computes the part of speech tags of the documents whose tags are still pending, so that the analyses
+needing them do not have to wait for NLTK. Meant to be run in the background, e.g. periodically.
+"""
+from django.core.management.base import BaseCommand
+
+from app.models import Document
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', type=int, help='only tag the documents of this corpus')
+        parser.add_argument('--limit', type=int, help='the maximum number of documents to tag')
+
+    def handle(self, *args, **options):
+        queryset = Document.objects.filter(tags_status=Document.ARTIFACT_PENDING).order_by('pk')
+        if options['corpus'] is not None:
+            queryset = queryset.filter(corpus=options['corpus'])
+        doc_ids = list(queryset.values_list('pk', flat=True)[:options['limit']])
+
+        tagged = 0
+        for doc_id in doc_ids:
+            # Loaded one at a time, since a document may have been tagged since the query
+            doc = Document.objects.get(pk=doc_id)
+            doc.ensure_part_of_speech_tags()
+            tagged += 1
+            self.stdout.write(f'Tagged {doc!r} ({tagged}/{len(doc_ids)})')
+
+        self.stdout.write(f'{tagged} documents tagged')
@@ -3,9 +3,117 @@ Custom managers for the gender analysis web app.
 """
 from django.db import models
 
+# The Document fields that can be filtered on directly, through their own indexes
+CORE_METADATA_FIELDS = ['author', 'year', 'title']
+# The lookups that can be resolved with an index (`startswith` on text, as a range of values)
+METADATA_LOOKUPS = ['exact', 'in', 'gt', 'gte', 'lt', 'lte', 'startswith']
+# The text fields among them
+CORE_TEXT_FIELDS = ['author', 'title']
+
+
+def prefix_range(column, prefix):
+    """
+    A `startswith` lookup as a range of values, which an index can resolve where a LIKE pattern (e.g. on
+    SQLite) cannot.
+
+    :param column: the name of a text field
+    :param prefix: a str
+    :return: a dictionary of the lookups matching the values of the field that start with the prefix
+    """
+    prefix = prefix.rstrip(chr(0x10ffff))
+    if not prefix:
+        return {}
+    return {f'{column}__gte': prefix, f'{column}__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)}
+
+
+def check_metadata_values(key, lookup, value):
+    """
+    Checks the type of the value of a metadata criterion (see `DocumentManager.filter_by_metadata`), so that a
+    value is never compared as something it is not (e.g. None as 'None', or a prefix with a number).
+
+    :param key: a field or attribute name
+    :param lookup: one of `METADATA_LOOKUPS`
+    :param value: the value to compare with
+    :return: the list of the values to compare with (the items of the value for `in`)
+    :raises ValueError: if the value does not fit the field or the lookup
+    """
+    if lookup == 'in':
+        if not isinstance(value, list):
+            raise ValueError(f'The value of {key}__in must be a list.')
+        values = value
+    else:
+        values = [value]
+
+    if key == 'year':
+        expected, types = 'integers', (int,)
+    elif key in CORE_TEXT_FIELDS or lookup == 'startswith':
+        expected, types = 'strings', (str,)
+    else:
+        expected, types = 'strings, numbers or booleans', (str, int, float, bool)
+    if lookup == 'startswith' and key not in CORE_TEXT_FIELDS and key in CORE_METADATA_FIELDS:
+        raise ValueError(f'Unsupported lookup {lookup!r} for {key!r}.')
+    if not all(isinstance(item, types) and (bool in types or not isinstance(item, bool)) for item in values):
+        raise ValueError(f'The values compared with {key!r} must be {expected}.')
+    return values
+
 
 class DocumentManager(models.Manager):
-    def create_document(self, **attributes):
+    def create_document(self, pipeline=None, **attributes):
+        """
+        Creates a Document and processes its text.
+
+        :param pipeline: an optional `Pipeline` to process the text with, e.g. the one of the Corpus the
+                         Document is created for
+        :param attributes: the field values of the Document
+        :return: the new Document
+        """
         doc = self.create(**attributes)
-        doc.get_tokenized_text_wc_and_pos()
+        doc.get_tokenized_text_wc_and_pos(pipeline)
         return doc
+
+    def filter_by_metadata(self, criteria):
+        """
+        Filters Documents by their core fields (`author`, `year`, `title`) and their `new_attributes`, without
+        reading the Document rows themselves: each criterion is resolved with an index, either of the
+        Document table or of the `DocumentMetadata` table.
+
+        >>> Document.objects.filter_by_metadata({'year__gte': 1850, 'year__lt': 1900, 'author_gender': 'female'})
+
+        :param criteria: a dictionary keying a field or attribute name, optionally followed by `__` and one of
+                         `METADATA_LOOKUPS` (`exact` if omitted), to the value to compare with; attributes are
+                         compared as numbers when the value is a number (or a list of numbers for `in`) and
+                         as text otherwise; `startswith` compares text only
+        :return: a queryset of the Documents matching every criterion
+        :raises ValueError: if a lookup is not supported, or a value does not fit its field or lookup (see
+                            `check_metadata_values`)
+        """
+        metadata_model = self.model._meta.get_field('metadata').related_model
+        queryset = self.all()
+        for criterion, value in criteria.items():
+            key, separator, lookup = criterion.rpartition('__')
+            if not separator:
+                key, lookup = criterion, 'exact'
+            elif lookup not in METADATA_LOOKUPS:
+                raise ValueError(f'Unsupported lookup {lookup!r}.')
+            values = check_metadata_values(key, lookup, value)
+
+            if key in CORE_METADATA_FIELDS:
+                if lookup == 'startswith':
+                    queryset = queryset.filter(**prefix_range(key, value))
+                else:
+                    queryset = queryset.filter(**{f'{key}__{lookup}': value})
+                continue
+
+            if all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in values):
+                column = 'value_number'
+            else:
+                # Compared as the attribute values are stored as text (e.g. True as 'true')
+                column = 'value_text'
+                values = [metadata_model.typed_values(item)[0] for item in values]
+                value = values if lookup == 'in' else values[0]
+            if lookup == 'startswith' and column == 'value_text':
+                matching = metadata_model.objects.filter(key=key, **prefix_range(column, value))
+            else:
+                matching = metadata_model.objects.filter(key=key, **{f'{column}__{lookup}': value})
+            queryset = queryset.filter(pk__in=matching.values('document_id'))
+        return queryset
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.5 on 2026-10-19 17:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_frequencyanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('analysis_type', models.CharField(choices=[('frequency', 'frequency'), ('proximity', 'proximity')], max_length=20)),
+                ('word_window', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('complete', 'complete'), ('cancelled', 'cancelled'), ('failed', 'failed')], default='pending', max_length=20)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True)),
+                ('documents_total', models.PositiveIntegerField(default=0)),
+                ('documents_processed', models.PositiveIntegerField(default=0)),
+                ('tokens_processed', models.PositiveIntegerField(default=0)),
+                ('tokens_per_second', models.FloatField(blank=True, null=True)),
+                ('eta_seconds', models.FloatField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('corpus', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_jobs', to='app.corpus')),
+                ('frequency_analysis', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.frequencyanalysis')),
+                ('genders', models.ManyToManyField(blank=True, related_name='analysis_jobs', to='app.Gender')),
+                ('proximity_analysis', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.proximityanalysis')),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.5 on 2026-10-19 17:55
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def compute_fingerprints(apps, schema_editor):
+    """
+    Hashes the text of the existing documents and sums those hashes into the corpus fingerprints.
+    """
+    Document = apps.get_model('app', 'Document')
+    Corpus = apps.get_model('app', 'Corpus')
+
+    for doc in Document.objects.only('pk', 'text').iterator():
+        doc.content_hash = hashlib.sha256(doc.text.encode('utf-8')).hexdigest()
+        doc.save(update_fields=['content_hash'])
+
+    for corpus in Corpus.objects.all():
+        value = sum(int(content_hash, 16) for content_hash in corpus.documents.values_list('content_hash', flat=True))
+        corpus.fingerprint = f'{value % 2 ** 256:064x}'
+        corpus.save(update_fields=['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corpus',
+            name='fingerprint',
+            field=models.CharField(default='0000000000000000000000000000000000000000000000000000000000000000', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(compute_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+def record_default_pipeline(apps, schema_editor):
+    """
+    Documents processed so far went through what is now the default pipeline.
+    """
+    Document = apps.get_model('app', 'Document')
+    Document.objects.filter(word_count__isnull=False).update(
+        pipeline_stages=['smart_quotes', 'drop_punctuation', 'lowercase']
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corpus',
+            name='pipeline_stages',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='pipeline_stages',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.RunPython(record_default_pipeline, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_pipeline_stages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corpus',
+            name='tokenizer',
+            field=models.CharField(default='nltk', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='tokenizer',
+            field=models.CharField(default='nltk', max_length=20),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:06
+
+from django.db import migrations, models
+
+
+def mark_processed_artifacts(apps, schema_editor):
+    """
+    Documents processed so far had all of their artifacts computed at ingestion.
+    """
+    Document = apps.get_model('app', 'Document')
+    Document.objects.filter(word_count__isnull=False).update(
+        tokens_status='complete', counts_status='complete', tags_status='complete'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_tokenizers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='counts_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('complete', 'complete')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='tags_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('complete', 'complete')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='tokens_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('complete', 'complete')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_processed_artifacts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_artifact_statuses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_dir', models.CharField(max_length=500)),
+                ('manifest', models.CharField(blank=True, max_length=500)),
+                ('pipeline_stages', models.JSONField(blank=True, default=None, null=True)),
+                ('tokenizer', models.CharField(default='nltk', max_length=20)),
+                ('batch_size', models.PositiveIntegerField(default=100)),
+                ('status', models.CharField(choices=[('running', 'running'), ('complete', 'complete'), ('failed', 'failed')], default='running', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('corpus', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_runs', to='app.corpus')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='import_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='app.importrun'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:12
+
+import json
+import math
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def typed_values(value):
+    """
+    :param value: an attribute value, as stored in `Document.new_attributes`
+    :return: a tuple of the value as text and the value as a float (None if it is not a number, or
+             a string of one)
+    """
+    if value is None:
+        return '', None
+    if isinstance(value, bool):
+        return str(value).lower(), None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)[:255], None
+
+    value_text = str(value)[:255]
+    try:
+        value_number = float(value)
+    except ValueError:
+        return value_text, None
+    return value_text, value_number if math.isfinite(value_number) else None
+
+
+def backfill_metadata(apps, schema_editor):
+    """
+    Creates the metadata rows of the existing documents' new attributes.
+    """
+    Document = apps.get_model('app', 'Document')
+    DocumentMetadata = apps.get_model('app', 'DocumentMetadata')
+    rows = []
+    for doc_id, new_attributes in Document.objects.values_list('pk', 'new_attributes').iterator():
+        for key, value in (new_attributes or {}).items():
+            value_text, value_number = typed_values(value)
+            rows.append(DocumentMetadata(
+                document_id=doc_id, key=key, value_text=value_text, value_number=value_number
+            ))
+    DocumentMetadata.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_importrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='author',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='title',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='year',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DocumentMetadata',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('value_text', models.CharField(max_length=255)),
+                ('value_number', models.FloatField(blank=True, null=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metadata', to='app.document')),
+            ],
+            options={
+                'verbose_name_plural': 'document metadata',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='documentmetadata',
+            index=models.Index(fields=['key', 'value_text'], name='app_documen_key_081110_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentmetadata',
+            index=models.Index(fields=['key', 'value_number'], name='app_documen_key_6f7f8c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentmetadata',
+            constraint=models.UniqueConstraint(fields=('document', 'key'), name='unique_document_metadata_key'),
+        ),
+        migrations.RunPython(backfill_metadata, migrations.RunPython.noop),
+    ]
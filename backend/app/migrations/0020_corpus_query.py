@@ -0,0 +1,18 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_document_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corpus',
+            name='query',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+    ]
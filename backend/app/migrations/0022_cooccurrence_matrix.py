@@ -0,0 +1,34 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_pronoun_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CooccurrenceMatrix',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word_window', models.PositiveIntegerField()),
+                ('rows', models.JSONField(default=list)),
+                ('row_pronouns', models.JSONField(default=list)),
+                ('columns', models.JSONField(default=list)),
+                ('row_indices', models.JSONField(default=list)),
+                ('column_indices', models.JSONField(default=list)),
+                ('counts', models.JSONField(default=list)),
+                ('document_ids', models.JSONField(default=list)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('corpus', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrence_matrices', to='app.corpus')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cooccurrencematrix',
+            constraint=models.UniqueConstraint(fields=('corpus', 'word_window'), name='unique_corpus_word_window'),
+        ),
+    ]
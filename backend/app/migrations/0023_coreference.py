@@ -0,0 +1,52 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:34
+
+import app.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_cooccurrence_matrix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronounAttribution',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_index', models.PositiveIntegerField()),
+                ('pronoun', app.fields.LowercaseCharField(max_length=40)),
+                ('entity', models.CharField(max_length=200)),
+                ('cluster', models.PositiveIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pronoun_attributions', to='app.document')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CoreferenceAnnotation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('pipeline_stages', models.JSONField(blank=True, default=None, null=True)),
+                ('tokenizer', models.CharField(default='nltk', max_length=20)),
+                ('mention_clusters', models.JSONField(default=list)),
+                ('mention_starts', models.JSONField(default=list)),
+                ('mention_ends', models.JSONField(default=list)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='coreference', to='app.document')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pronounattribution',
+            index=models.Index(fields=['document', 'pronoun'], name='app_pronoun_documen_12feea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pronounattribution',
+            index=models.Index(fields=['entity'], name='app_pronoun_entity_a9972d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pronounattribution',
+            constraint=models.UniqueConstraint(fields=('document', 'token_index'), name='unique_pronoun_attribution'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_coreference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='sentence_window',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='sentence_offsets',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='sentences_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('complete', 'complete')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='proximityanalysis',
+            name='sentence_window',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='proximityanalysis',
+            name='word_window',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
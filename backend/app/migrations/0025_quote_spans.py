@@ -0,0 +1,23 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_sentence_offsets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='quote_spans',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='quotes_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('complete', 'complete')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_bigram_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='min_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='pos_filter',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='top_k',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proximityanalysis',
+            name='min_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='proximityanalysis',
+            name='pos_filter',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='proximityanalysis',
+            name='top_k',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+from more_itertools import chunked
+
+
+def backfill_result_rows(apps, schema_editor):
+    """
+    Writes the rows of the results of the analyses run so far, leaving out the Documents and Genders deleted since,
+    5000 rows at a time.
+    """
+    Document = apps.get_model('app', 'Document')
+    ProximityAnalysis = apps.get_model('app', 'ProximityAnalysis')
+    ProximityResult = apps.get_model('app', 'ProximityResult')
+    FrequencyAnalysis = apps.get_model('app', 'FrequencyAnalysis')
+    FrequencyResult = apps.get_model('app', 'FrequencyResult')
+    Gender = apps.get_model('app', 'Gender')
+    doc_ids = set(Document.objects.values_list('pk', flat=True))
+    gender_ids = set(Gender.objects.values_list('pk', flat=True))
+
+    for analysis in ProximityAnalysis.objects.iterator():
+        rows = (
+            ProximityResult(
+                analysis=analysis, document_id=int(doc_id), gender_id=int(gender_id), pronoun_type=pronoun_type,
+                pos=pos, word=word[:255], count=count
+            )
+            for doc_id, document_results in analysis.results.items() if int(doc_id) in doc_ids
+            for gender_id, gender_results in document_results.items() if int(gender_id) in gender_ids
+            for pronoun_type, tag_counts in gender_results.items()
+            for pos, word_counts in tag_counts.items()
+            for word, count in word_counts.items()
+        )
+        for batch in chunked(rows, 5000):
+            ProximityResult.objects.bulk_create(batch)
+
+    for analysis in FrequencyAnalysis.objects.iterator():
+        rows = (
+            FrequencyResult(
+                analysis=analysis, document_id=int(doc_id), gender_id=int(gender_id), pronoun=pronoun, count=count,
+                frequency=document_results['frequency'][gender_id][pronoun],
+                relative=document_results['relative'][gender_id][pronoun]
+            )
+            for doc_id, document_results in analysis.results.items() if int(doc_id) in doc_ids
+            for gender_id, counts in document_results['count'].items() if int(gender_id) in gender_ids
+            for pronoun, count in counts.items()
+        )
+        for batch in chunked(rows, 5000):
+            FrequencyResult.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0027_proximity_pruning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProximityResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pronoun_type', models.CharField(max_length=20)),
+                ('pos', models.CharField(max_length=20)),
+                ('word', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField()),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='app.proximityanalysis')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proximity_results', to='app.document')),
+                ('gender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proximity_results', to='app.gender')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FrequencyResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pronoun', models.CharField(max_length=40)),
+                ('count', models.PositiveIntegerField()),
+                ('frequency', models.FloatField()),
+                ('relative', models.FloatField()),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='app.frequencyanalysis')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequency_results', to='app.document')),
+                ('gender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequency_results', to='app.gender')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='proximityresult',
+            index=models.Index(fields=['analysis', 'document', 'gender', 'pronoun_type', 'pos'], name='app_proximi_analysi_b24dec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proximityresult',
+            index=models.Index(fields=['analysis', 'word'], name='app_proximi_analysi_6010ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='frequencyresult',
+            index=models.Index(fields=['analysis', 'document', 'gender'], name='app_frequen_analysi_14e8a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='frequencyresult',
+            index=models.Index(fields=['analysis', 'pronoun'], name='app_frequen_analysi_2a4069_idx'),
+        ),
+        migrations.RunPython(backfill_result_rows, migrations.RunPython.noop),
+    ]
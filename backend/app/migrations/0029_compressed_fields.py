@@ -0,0 +1,99 @@
+# Generated by Django 3.1.5 on 2026-10-19 18:51
+
+import app.fields
+from django.db import migrations, models
+from more_itertools import chunked
+
+# The old field and the compressed field replacing it, by model and field name. The text and JSON columns
+# cannot be altered into binary columns in place (PostgreSQL has no cast from text or jsonb to bytea), so
+# each compressed field is added as a new column, the values are copied into it, and the old column is
+# dropped before the new one takes its name.
+COMPRESSED_FIELDS = {
+    'Document': {
+        'text': (
+            models.TextField(blank=True),
+            app.fields.CompressedTextField(blank=True),
+        ),
+        'tokenized_text': (
+            models.JSONField(blank=True, default=None, null=True),
+            app.fields.CompressedJSONField(blank=True, default=None, null=True),
+        ),
+        'part_of_speech_tags': (
+            models.JSONField(blank=True, default=list, null=True),
+            app.fields.CompressedJSONField(blank=True, default=list, null=True),
+        ),
+    },
+    'FrequencyAnalysis': {
+        'results': (models.JSONField(), app.fields.CompressedJSONField()),
+    },
+    'ProximityAnalysis': {
+        'results': (models.JSONField(), app.fields.CompressedJSONField()),
+    },
+}
+
+
+def compressed_name(name):
+    return f'compressed_{name}'
+
+
+def nullable(field):
+    _, _, args, kwargs = field.deconstruct()
+    return type(field)(*args, **{**kwargs, 'null': True})
+
+
+def copy_rows(source_name, target_name):
+    """
+    :param source_name: a function mapping the name of a replaced field to the name of the field to copy from
+    :param target_name: a function mapping the name of a replaced field to the name of the field to copy to
+    :return: a RunPython function copying the values of every replaced field, compressing or decompressing
+             them along the way
+    """
+    def copy(apps, schema_editor):
+        for model_name, fields in COMPRESSED_FIELDS.items():
+            model = apps.get_model('app', model_name)
+            sources = [source_name(name) for name in fields]
+            targets = [target_name(name) for name in fields]
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            for batch in chunked(pks, 200):
+                rows = list(model.objects.filter(pk__in=batch).only('pk', *sources))
+                for row in rows:
+                    for source, target in zip(sources, targets):
+                        setattr(row, target, getattr(row, source))
+                model.objects.bulk_update(rows, targets)
+    return copy
+
+
+def add_operations():
+    for model_name, fields in COMPRESSED_FIELDS.items():
+        for name, (old_field, new_field) in fields.items():
+            if not old_field.null:
+                # Nullable while both columns exist, so that the old column can be added back when unapplying
+                yield migrations.AlterField(model_name=model_name.lower(), name=name, field=nullable(old_field))
+            yield migrations.AddField(
+                model_name=model_name.lower(), name=compressed_name(name), field=nullable(new_field)
+            )
+
+
+def replace_operations():
+    for model_name, fields in COMPRESSED_FIELDS.items():
+        for name, (old_field, new_field) in fields.items():
+            yield migrations.RemoveField(model_name=model_name.lower(), name=name)
+            yield migrations.RenameField(model_name=model_name.lower(), old_name=compressed_name(name), new_name=name)
+            if not new_field.null:
+                yield migrations.AlterField(model_name=model_name.lower(), name=name, field=new_field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0028_analysis_result_rows'),
+    ]
+
+    operations = [
+        *add_operations(),
+        migrations.RunPython(
+            copy_rows(source_name=str, target_name=compressed_name),
+            copy_rows(source_name=compressed_name, target_name=str),
+        ),
+        *replace_operations(),
+    ]
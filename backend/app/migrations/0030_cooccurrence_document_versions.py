@@ -0,0 +1,18 @@
+# Generated by Django 3.1.5 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0029_compressed_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cooccurrencematrix',
+            name='document_versions',
+            field=models.JSONField(default=dict),
+        ),
+    ]
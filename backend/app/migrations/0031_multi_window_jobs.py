@@ -0,0 +1,23 @@
+# Generated by Django 3.1.5 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0030_cooccurrence_document_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='proximity_analyses',
+            field=models.ManyToManyField(blank=True, related_name='multi_window_jobs', to='app.ProximityAnalysis'),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='word_windows',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+    ]
@@ -1,18 +1,76 @@
 """
 Models for the gender analysis web app.
 """
+import hashlib
+import json
+import math
 import nltk
-import string
-import re
 from collections import Counter
 from itertools import chain
-from more_itertools import windowed
+from more_itertools import (
+    chunked,
+    windowed,
+)
 from django.db import models
-from .fields import LowercaseCharField
+from django.db.models import F
+from django.utils import timezone
+from . import (
+    caching,
+    tagging,
+)
+from .fields import (
+    CompressedJSONField,
+    CompressedTextField,
+    LowercaseCharField,
+    ObjectKeyTransform,
+)
+from .analysis.windows import count_windows
 from .managers import DocumentManager
+from .pipeline import (
+    DEFAULT_TOKENIZER,
+    Pipeline,
+    find_quote_spans,
+)
 
+# Corpus fingerprints are sums of their documents' content hashes, modulo this number
+FINGERPRINT_MODULUS = 2 ** 256
+EMPTY_FINGERPRINT = '0' * 64
 
-class PronounSeries(models.Model):
+
+class RevisionedModel(models.Model):
+    """
+    An abstract model whose rows carry a revision counter, incremented on every save, and the time
+    of their last modification. Views use them to answer conditional GET requests without loading
+    the rest of the row.
+    """
+
+    revision = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.revision += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'revision', 'modified'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_revisions(cls, queryset=None, **fields):
+        """
+        Updates rows in bulk without calling save(), while still counting it as a new revision.
+
+        :param queryset: a QuerySet of this model; all rows by default
+        :param fields: other field values to set, as for QuerySet.update()
+        :return: the number of updated rows
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(revision=F('revision') + 1, modified=timezone.now(), **fields)
+
+
+class PronounSeries(RevisionedModel):
     """
     A class that allows users to define a custom series of pronouns to be used in
     analysis functions
@@ -76,6 +134,16 @@ class PronounSeries(models.Model):
 
         yield from self.all_pronouns
 
+    @classmethod
+    def get_vocabulary(cls):
+        """
+        :return: A sorted list of the pronouns of every `PronounSeries`, cached until one of them changes
+        """
+        return caching.get_or_set(
+            [PronounSeries], 'pronoun_vocabulary', 'all',
+            lambda: sorted(set(chain.from_iterable(cls.objects.values_list(*cls.PRONOUN_TYPES))))
+        )
+
     def __repr__(self):
         """
         >>> PronounSeries.objects.create(
@@ -147,7 +215,7 @@ class PronounSeries(models.Model):
         return super().__hash__()
 
 
-class Gender(models.Model):
+class Gender(RevisionedModel):
     """
     This model defines a gender that analysis functions will use to operate.
     """
@@ -266,23 +334,89 @@ class Gender(models.Model):
         return subject_pronouns
 
 
-class Document(models.Model):
+class Document(RevisionedModel):
     """
     This model holds the full text and
     metadata (author, title, publication date, etc.) of a document.
     """
-    author = models.CharField(max_length=255, blank=True)
-    year = models.IntegerField(null=True, blank=True)
+    author = models.CharField(max_length=255, blank=True, db_index=True)
+    year = models.IntegerField(null=True, blank=True, db_index=True)
     new_attributes = models.JSONField(null=True, blank=True, default=dict)
-    text = models.TextField(blank=True)
-    title = models.CharField(max_length=255, blank=True)
+    # The text and its largest artifacts are stored compressed (see `fields.CompressedTextField`)
+    text = CompressedTextField(blank=True)
+    title = models.CharField(max_length=255, blank=True, db_index=True)
     word_count = models.PositiveIntegerField(blank=True, null=True, default=None)
-    tokenized_text = models.JSONField(null=True, blank=True, default=None)
+    tokenized_text = CompressedJSONField(null=True, blank=True, default=None)
     word_count_counter = models.JSONField(null=True, blank=True, default=dict)
-    part_of_speech_tags = models.JSONField(null=True, blank=True, default=list)
+    part_of_speech_tags = CompressedJSONField(null=True, blank=True, default=list)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    pipeline_stages = models.JSONField(null=True, blank=True, default=None)
+    tokenizer = models.CharField(max_length=20, default=DEFAULT_TOKENIZER)
+
+    # The artifacts derived from the text, each stored in some fields and tracked by its own status
+    # field (e.g. `tags_status`), so that the expensive ones are only computed once something needs them
+    ARTIFACT_PENDING = 'pending'
+    ARTIFACT_COMPLETE = 'complete'
+    ARTIFACT_STATUSES = [ARTIFACT_PENDING, ARTIFACT_COMPLETE]
+    ARTIFACTS = {
+        'tokens': ['tokenized_text', 'word_count'],
+        'sentences': ['sentence_offsets'],
+        'quotes': ['quote_spans'],
+        'counts': ['word_count_counter'],
+        'bigrams': ['bigram_counts'],
+        'tags': ['part_of_speech_tags'],
+        'pronouns': ['pronoun_counts'],
+    }
+    # The artifacts each artifact is computed from
+    ARTIFACT_DEPENDENCIES = {
+        'quotes': ['tokens'],
+        'counts': ['tokens'],
+        'bigrams': ['tokens'],
+        'tags': ['tokens'],
+        'pronouns': ['counts'],
+    }
+    # The artifacts computed when a Document is created; the others are computed on demand
+    INGESTION_ARTIFACTS = ['tokens', 'sentences', 'quotes', 'counts', 'bigrams', 'pronouns']
+
+    tokens_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    counts_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    tags_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    # The index in `tokenized_text` of the first token of each sentence, found while tokenizing
+    sentence_offsets = models.JSONField(null=True, blank=True, default=None)
+    sentences_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    # The [start, end) ranges of the indices in `tokenized_text` of the tokens of each quotation, in order
+    quote_spans = models.JSONField(null=True, blank=True, default=None)
+    quotes_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    # The counts of the tokens that follow each token of `tokenized_text`, as {token: {next token: count}}
+    bigram_counts = models.JSONField(null=True, blank=True, default=None)
+    bigrams_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    # The counts of the pronouns of every `PronounSeries` in the text (pronouns that do not occur are left out),
+    # a small subset of `word_count_counter` that corpus-wide aggregations can read quickly
+    pronoun_counts = models.JSONField(null=True, blank=True, default=None)
+    pronouns_status = models.CharField(
+        max_length=20, choices=[(name, name) for name in ARTIFACT_STATUSES], default=ARTIFACT_PENDING
+    )
+    import_run = models.ForeignKey(
+        'ImportRun', related_name='documents', null=True, blank=True, on_delete=models.SET_NULL
+    )
 
     objects = DocumentManager()
 
+    # Fields derived from the text by NLTK, which documents with identical text can share
+    NLP_ARTIFACT_FIELDS = list(chain.from_iterable(ARTIFACTS.values()))
+
     def __repr__(self):
         """
         :return: A console-friendly representation of a `Document` object.
@@ -296,6 +430,34 @@ class Document(models.Model):
         title = self.title if self.title else '(No title)'
         return f'Document {self.pk}: {title}'
 
+    @staticmethod
+    def hash_text(text):
+        """
+        :param text: a str
+        :return: The hex-encoded SHA-256 hash of the text
+        """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the Document, first refreshing its `content_hash` if its text may have changed. The
+        fingerprints of the corpora containing the Document follow any change of its content hash.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+
+        old_hash = self.content_hash
+        self.content_hash = self.hash_text(self.text)
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'content_hash'}
+        super().save(*args, **kwargs)
+
+        if old_hash and old_hash != self.content_hash:
+            for corpus in self.corpus_set.all():
+                corpus.update_fingerprint(added=[self.content_hash], removed=[old_hash])
+
     def _clean_quotes(self):
         """
         Scans through the text and replaces all of the smart quotes and apostrophes with their
@@ -304,28 +466,224 @@ class Document(models.Model):
         :param self: The Document to reformat
         :return: A string that is identical to `text`, except with its smart quotes exchanged
         """
-        self.text = re.sub(r'[\“\”]', '\"', re.sub(r'[\‘\’]', '\'', self.text))
+        self.text = Pipeline(['smart_quotes']).normalize(self.text)
         self.save()
         return self.text
 
-    def get_tokenized_text_wc_and_pos(self):
+    def get_pipeline(self):
+        """
+        :return: The `Pipeline` this Document's text was (or will be) processed with
+        """
+        return Pipeline(self.pipeline_stages, self.tokenizer)
+
+    def get_tokenized_text_wc_and_pos(self, pipeline=None, artifacts=None):
         """
         Tokenizes the text of a Document and returns it as a list of tokens, while removing all punctuation
         and converting everything to lowercase.
 
+        The text is normalized, tokenized and counted by a `Pipeline` (by default, the one the Document
+        was previously processed with). If another Document with the same cleaned text has already been
+        processed by the same pipeline, its artifacts are reused instead of running NLTK again. Part of
+        speech tags are not computed unless asked for: they are left pending until
+        `ensure_part_of_speech_tags` is called.
+
         :param self: The Document to tokenize
+        :param pipeline: an optional `Pipeline` to process the text with
+        :param artifacts: the names of the artifacts to compute (`INGESTION_ARTIFACTS` if None); the others
+                          are marked as pending
         :return: None
         """
-        self._clean_quotes()
-        tokens = nltk.word_tokenize(self.text)
-        excluded_characters = set(string.punctuation)
-        tokenized_text = [word.lower() for word in tokens if word not in excluded_characters]
-        self.tokenized_text = tokenized_text
-        self.word_count = len(self.tokenized_text)
-        self.word_count_counter = Counter(self.tokenized_text)
-        self.part_of_speech_tags = nltk.pos_tag(self.tokenized_text)
+        pipeline = pipeline or self.get_pipeline()
+        self.text = pipeline.normalize(self.text)
+        self.pipeline_stages = pipeline.stages
+        self.tokenizer = pipeline.tokenizer
+        for artifact in self.ARTIFACTS:
+            setattr(self, f'{artifact}_status', self.ARTIFACT_PENDING)
+
+        self._compute_artifacts(self.INGESTION_ARTIFACTS if artifacts is None else artifacts, pipeline)
         self.save()
 
+    def ensure_artifacts(self, *artifacts):
+        """
+        Computes and saves the given artifacts if they are still pending, along with the artifacts they
+        are computed from. Nothing is written if they are all complete already.
+
+        :param artifacts: names of `ARTIFACTS`
+        :return: None
+        """
+        updated_fields = self._compute_artifacts(artifacts, self.get_pipeline())
+        if updated_fields:
+            self.save(update_fields=updated_fields)
+
+    @classmethod
+    def ensure_pronoun_counts(cls, documents, batch_size=1000):
+        """
+        Computes the pending pronoun counts of many Documents from their word counts, in bulk updates rather
+        than one save per Document (so no signals are sent).
+
+        :param documents: a queryset of Documents whose word counts are complete
+        :param batch_size: the number of Documents updated per query
+        :return: None
+        """
+        vocabulary = PronounSeries.get_vocabulary()
+        pending = documents.filter(pronouns_status=cls.ARTIFACT_PENDING).only('pk', 'word_count_counter')
+        for batch in chunked(pending.iterator(), batch_size):
+            for doc in batch:
+                doc.pronoun_counts = cls.count_pronouns(doc.word_count_counter, vocabulary)
+                doc.pronouns_status = cls.ARTIFACT_COMPLETE
+            cls.objects.bulk_update(batch, ['pronoun_counts', 'pronouns_status'])
+
+    @staticmethod
+    def count_pronouns(word_count_counter, vocabulary):
+        """
+        :param word_count_counter: a dictionary of the counts of the words of a Document
+        :param vocabulary: a list of pronouns
+        :return: a dictionary of the counts of the pronouns of the vocabulary that occur in the Document
+        """
+        return {
+            pronoun: word_count_counter[pronoun]
+            for pronoun in vocabulary
+            if word_count_counter.get(pronoun)
+        }
+
+    @staticmethod
+    def count_bigrams(tokens):
+        """
+        :param tokens: a list of tokens (str)
+        :return: a dictionary keying each token that is followed by another one to a dictionary of the counts
+                 of the tokens that follow it
+        """
+        bigram_counts = {}
+        for word, next_word in zip(tokens, tokens[1:]):
+            following = bigram_counts.setdefault(word, {})
+            following[next_word] = following.get(next_word, 0) + 1
+        return bigram_counts
+
+    def ensure_sentence_offsets(self):
+        """
+        Finds the sentences of the Document, unless they have been found already (e.g. at ingestion).
+
+        :return: The index of the first token of each sentence, as a list of ints
+        """
+        self.ensure_artifacts('sentences')
+        return self.sentence_offsets
+
+    def ensure_quote_spans(self):
+        """
+        Finds the quotations of the Document, unless they have been found already (e.g. at ingestion).
+
+        :return: The [start, end) token index ranges of the quotations, as a list of pairs of ints
+        """
+        self.ensure_artifacts('quotes')
+        return self.quote_spans
+
+    def ensure_part_of_speech_tags(self):
+        """
+        Tags the tokens of the Document with NLTK's part of speech tagger, unless they have been tagged already.
+
+        :return: The part of speech tags, as a list of [token, tag] pairs
+        """
+        self.ensure_artifacts('tags')
+        return self.part_of_speech_tags
+
+    def _compute_artifacts(self, artifacts, pipeline):
+        """
+        Sets the fields of the pending artifacts among the given ones (without saving the Document), copying
+        them from a processed duplicate if there is one.
+
+        :param artifacts: names of `ARTIFACTS`
+        :param pipeline: the `Pipeline` the Document is processed with
+        :return: the names of the fields that were set, including the status fields
+        """
+        requested = {artifact for artifact in artifacts if self._is_pending(artifact)}
+        if not requested:
+            return []
+        # The pending artifacts that the requested ones are computed from are computed first
+        unresolved = list(requested)
+        while unresolved:
+            for dependency in self.ARTIFACT_DEPENDENCIES.get(unresolved.pop(), []):
+                if dependency not in requested and self._is_pending(dependency):
+                    requested.add(dependency)
+                    unresolved.append(dependency)
+        pending = [artifact for artifact in self.ARTIFACTS if artifact in requested]
+
+        copied = self._copy_duplicate_artifacts(pending)
+        for artifact in pending:
+            if artifact in copied:
+                continue
+            if artifact == 'tokens':
+                if 'sentences' in pending and 'sentences' not in copied:
+                    # The sentences are found in the same pass
+                    self.tokenized_text, self.sentence_offsets = pipeline.tokenize_sentences(self.text)
+                    self.sentences_status = self.ARTIFACT_COMPLETE
+                else:
+                    self.tokenized_text = list(pipeline.tokenize(self.text))
+                self.word_count = len(self.tokenized_text)
+            elif artifact == 'sentences':
+                if self._is_pending('sentences'):
+                    self.sentence_offsets = pipeline.tokenize_sentences(self.text)[1]
+            elif artifact == 'quotes':
+                self.quote_spans = find_quote_spans(self.text, self.tokenized_text)
+            elif artifact == 'counts':
+                self.word_count_counter = Counter(self.tokenized_text)
+            elif artifact == 'bigrams':
+                self.bigram_counts = self.count_bigrams(self.tokenized_text)
+            elif artifact == 'tags':
+                self.part_of_speech_tags = tagging.pos_tag(self.tokenized_text)
+            else:
+                self.pronoun_counts = self.count_pronouns(self.word_count_counter, PronounSeries.get_vocabulary())
+            setattr(self, f'{artifact}_status', self.ARTIFACT_COMPLETE)
+
+        return [
+            field
+            for artifact in self.ARTIFACTS if artifact in requested or artifact in copied
+            for field in self.ARTIFACTS[artifact] + [f'{artifact}_status']
+        ]
+
+    def _is_pending(self, artifact):
+        """
+        :param artifact: the name of an artifact
+        :return: True if the artifact has not been computed yet
+        """
+        return getattr(self, f'{artifact}_status') != self.ARTIFACT_COMPLETE
+
+    def _copy_duplicate_artifacts(self, artifacts=('tokens', 'counts')):
+        """
+        Looks up a Document processed by the same pipeline and tokenizer by the content hash of this Document's
+        text, and copies its NLP artifacts onto this Document (without saving it). The other artifacts the
+        duplicate has computed are copied as well, since they come for free.
+
+        :param artifacts: the names of the artifacts to copy, in dependency order; the duplicate must have
+                          computed the first of them
+        :return: the set of the names of the artifacts that were copied (empty if no duplicate was found)
+        """
+        duplicate = (
+            Document.objects
+            .filter(
+                content_hash=self.hash_text(self.text),
+                pipeline_stages=self.pipeline_stages,
+                tokenizer=self.tokenizer,
+                **{f'{artifacts[0]}_status': self.ARTIFACT_COMPLETE}
+            )
+            .exclude(pk=self.pk)
+            .values(*self.NLP_ARTIFACT_FIELDS, *(f'{artifact}_status' for artifact in self.ARTIFACTS))
+            .first()
+        )
+        if duplicate is None:
+            return set()
+
+        copied = {
+            artifact for artifact in self.ARTIFACTS
+            if self._is_pending(artifact) and duplicate[f'{artifact}_status'] == self.ARTIFACT_COMPLETE
+        }
+        for artifact in copied:
+            for field in self.ARTIFACTS[artifact]:
+                setattr(self, field, duplicate[field])
+            setattr(self, f'{artifact}_status', self.ARTIFACT_COMPLETE)
+        if 'counts' in copied:
+            self.word_count_counter = Counter(self.word_count_counter)
+        return copied
+
     def get_count_of_word(self, word):
         """
         Returns the number of instances of a word in the text.
@@ -384,7 +742,9 @@ class Document(models.Model):
 
     def words_associated(self, target_word):
         """
-        Returns a Counter of the words found after a given word.
+        Returns a Counter of the words found after a given word, looked up in the bigram counts of the Document.
+        If they are still pending, the words are counted from the tokens without saving anything: the bigram
+        counts are computed at ingestion, or by the `count_bigrams` command.
 
         In the case of double/repeated words, the counter would include the word itself and the next
         new word.
@@ -394,18 +754,27 @@ class Document(models.Model):
         :param target_word: Single word to search for in the document's text
         :return: a Python Counter() object with {associated_word: occurrences}
         """
-        target_word = target_word.lower()
-        word_count = Counter()
-        check = False
-        text = self.tokenized_text
+        if self._is_pending('bigrams'):
+            return self.count_following_words(target_word.lower())
+        return Counter(self.bigram_counts.get(target_word.lower(), {}))
 
-        for word in text:
-            if check:
-                word_count[word] += 1
-                check = False
-            if word == target_word:
-                check = True
-        return word_count
+    def read_tokens(self):
+        """
+        :return: The tokens of the Document, tokenized in memory if they are still pending (nothing is saved)
+        """
+        if self._is_pending('tokens'):
+            return list(self.get_pipeline().tokenize(self.text))
+        return self.tokenized_text
+
+    def count_following_words(self, target_word):
+        """
+        Counts the words found after a given word in the tokens of the Document (see `read_tokens`).
+
+        :param target_word: a lowercase word
+        :return: a Counter of the words found after the word
+        """
+        tokens = self.read_tokens()
+        return Counter(next_word for word, next_word in zip(tokens, tokens[1:]) if word == target_word)
 
     def get_word_windows(self, search_terms, window_size=2):
         """
@@ -437,6 +806,28 @@ class Document(models.Model):
 
         return counter
 
+    def get_multi_word_windows(self, search_terms, window_sizes):
+        """
+        Like `get_word_windows`, for several window sizes at once: the text is walked once, counting the words at
+        each distance from the search terms, and the counts are summed up to each window size.
+
+        This is not case sensitive.
+
+        :param search_terms: String or list of strings to search for
+        :param window_sizes: list of integers representing numbers of words to search for in either direction
+        :return: a dictionary keying each window size to a Python Counter object
+        """
+        if isinstance(search_terms, str):
+            search_terms = [search_terms]
+
+        search_terms = set(i.lower() for i in search_terms)
+        text = self.tokenized_text
+        center_keys = dict.fromkeys(search_terms, [None]).get
+        return {
+            window_size: Counter({word: count for (_, word), count in counter.items()})
+            for window_size, counter in count_windows(text, text, center_keys, window_sizes, search_terms).items()
+        }
+
     def get_word_freq(self, word):
         """
         Returns the frequency of appearance of a word in the document
@@ -467,7 +858,7 @@ class Document(models.Model):
         :return: a dictionary keying NLTK tag strings to Counter instances.
         """
         stop_words = set(nltk.corpus.stopwords.words('english'))
-        document_pos_tags = self.part_of_speech_tags
+        document_pos_tags = self.ensure_part_of_speech_tags()
         words_set = {word.lower() for word in words}
         output = {}
 
@@ -503,15 +894,184 @@ class Document(models.Model):
             self.get_tokenized_text_wc_and_pos()
         self.save()
 
+    def sync_metadata(self):
+        """
+        Makes the `DocumentMetadata` rows of the Document match its `new_attributes`.
+
+        :return: None
+        """
+        new_attributes = self.new_attributes or {}
+        current = {row.key: row for row in self.metadata.all()}
+        self.metadata.exclude(key__in=list(new_attributes)).delete()
+
+        added = []
+        for key, value in new_attributes.items():
+            value_text, value_number = DocumentMetadata.typed_values(value)
+            row = current.get(key)
+            if row is None:
+                added.append(DocumentMetadata(
+                    document=self, key=key, value_text=value_text, value_number=value_number
+                ))
+            elif (row.value_text, row.value_number) != (value_text, value_number):
+                row.value_text, row.value_number = value_text, value_number
+                row.save(update_fields=['value_text', 'value_number'])
+        DocumentMetadata.objects.bulk_create(added)
+
+
+class DocumentMetadata(models.Model):
+    """
+    This model holds one of the `new_attributes` of a Document, with its value both as text and, when it is
+    a number, as a number, so that documents can be filtered by their attributes using indexes alone.
+    The rows are kept in sync with `Document.new_attributes` whenever a Document is saved.
+    """
+
+    document = models.ForeignKey(Document, related_name='metadata', on_delete=models.CASCADE)
+    key = models.CharField(max_length=100)
+    value_text = models.CharField(max_length=255)
+    value_number = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'document metadata'
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'key'], name='unique_document_metadata_key'),
+        ]
+        indexes = [
+            models.Index(fields=['key', 'value_text']),
+            models.Index(fields=['key', 'value_number']),
+        ]
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of a `DocumentMetadata` object.
+        """
+        return f'<DocumentMetadata {self.document_id}: {self.key}={self.value_text!r}>'
+
+    @staticmethod
+    def typed_values(value):
+        """
+        :param value: an attribute value, as stored in `Document.new_attributes`
+        :return: a tuple of the value as text and the value as a float (None if it is not a number, or
+                 a string of one)
+        """
+        if value is None:
+            return '', None
+        if isinstance(value, bool):
+            return str(value).lower(), None
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, sort_keys=True)[:255], None
+
+        value_text = str(value)[:255]
+        try:
+            value_number = float(value)
+        except ValueError:
+            return value_text, None
+        return value_text, value_number if math.isfinite(value_number) else None
+
+
+class CoreferenceAnnotation(models.Model):
+    """
+    This model holds the coreference clusters of a Document's tokens, computed once per version of its tokens
+    (the content hash of its text, its pipeline and its tokenizer) since resolving them is expensive. Every
+    mention is a [start, end) span of token indices; the mentions are stored as parallel lists of their
+    cluster indices, starts and ends, the representative mention of each cluster first.
+    """
+
+    document = models.OneToOneField(Document, related_name='coreference', on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    pipeline_stages = models.JSONField(null=True, blank=True, default=None)
+    tokenizer = models.CharField(max_length=20, default=DEFAULT_TOKENIZER)
+    mention_clusters = models.JSONField(default=list)
+    mention_starts = models.JSONField(default=list)
+    mention_ends = models.JSONField(default=list)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of a `CoreferenceAnnotation` object.
+        """
+        return f'<CoreferenceAnnotation {self.document_id}: {len(set(self.mention_clusters))} clusters>'
+
+    def is_current(self, document):
+        """
+        :param document: the annotated Document
+        :return: True if the clusters were computed from the Document's current tokens
+        """
+        return (
+            self.content_hash == document.content_hash
+            and self.pipeline_stages == document.pipeline_stages
+            and self.tokenizer == document.tokenizer
+        )
+
+    def get_clusters(self):
+        """
+        :return: A list of clusters, each a list of (start, end) mention spans, the representative mention first
+        """
+        clusters = [[] for _ in range(max(self.mention_clusters, default=-1) + 1)]
+        for cluster, start, end in zip(self.mention_clusters, self.mention_starts, self.mention_ends):
+            clusters[cluster].append((start, end))
+        return clusters
+
+    def set_clusters(self, clusters):
+        """
+        Replaces the clusters of the annotation, without saving it.
+
+        :param clusters: a list of clusters, each a list of (start, end) mention spans, the representative
+                         mention first
+        :return: None
+        """
+        self.mention_clusters, self.mention_starts, self.mention_ends = [], [], []
+        for cluster, mentions in enumerate(clusters):
+            for start, end in mentions:
+                self.mention_clusters.append(cluster)
+                self.mention_starts.append(start)
+                self.mention_ends.append(end)
+
 
-class Corpus(models.Model):
+class PronounAttribution(models.Model):
+    """
+    This model attributes a pronoun of a Document to the entity it refers to, the representative mention of
+    its coreference cluster (see `CoreferenceAnnotation`), so that analyses can count the pronouns of a
+    Gender per character with a join.
+    """
+
+    document = models.ForeignKey(Document, related_name='pronoun_attributions', on_delete=models.CASCADE)
+    token_index = models.PositiveIntegerField()
+    pronoun = LowercaseCharField(max_length=40)
+    entity = models.CharField(max_length=200)
+    cluster = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'token_index'], name='unique_pronoun_attribution'),
+        ]
+        indexes = [
+            models.Index(fields=['document', 'pronoun']),
+            models.Index(fields=['entity']),
+        ]
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of a `PronounAttribution` object.
+        """
+        return f'<PronounAttribution {self.document_id}: {self.pronoun} ({self.token_index}) -> {self.entity!r}>'
+
+
+class Corpus(RevisionedModel):
     """
     This model holds associations to other Documents and their
     metadata (author, title, publication date, etc.).
+
+    A Corpus either lists its Documents in `documents`, or is defined by a `query`: metadata criteria
+    (see `DocumentManager.filter_by_metadata`) that its Documents match, resolved when its Documents are
+    needed, so that Documents matching it join it without any write to the Corpus.
     """
     title = models.CharField(max_length=30)
     description = models.CharField(max_length=500, blank=True)
     documents = models.ManyToManyField(Document, blank=True)
+    fingerprint = models.CharField(max_length=64, default=EMPTY_FINGERPRINT, editable=False)
+    pipeline_stages = models.JSONField(null=True, blank=True, default=None)
+    tokenizer = models.CharField(max_length=20, default=DEFAULT_TOKENIZER)
+    query = models.JSONField(null=True, blank=True, default=None)
 
     class Meta:
         verbose_name_plural = "Corpora"
@@ -529,56 +1089,430 @@ class Corpus(models.Model):
         """
         return self.title
 
+    def get_pipeline(self):
+        """
+        :return: The `Pipeline` that documents added to this Corpus are processed with
+        """
+        return Pipeline(self.pipeline_stages, self.tokenizer)
+
+    @property
+    def is_dynamic(self):
+        """
+        :return: True if the Corpus is defined by a query rather than by a list of `Document`s
+        """
+        return self.query is not None
+
+    def document_ids(self):
+        """
+        Resolves the membership of the Corpus, cached until a Corpus or a `Document` changes.
+
+        :return: A sorted list of the IDs of the `Document`s in the Corpus
+        """
+        return caching.get_or_set([Corpus], 'corpus_document_ids', self.pk, self._resolve_document_ids)
+
+    def _resolve_document_ids(self):
+        # The query is read again, since the cached membership must match the saved Corpus
+        query = Corpus.objects.values_list('query', flat=True).get(pk=self.pk)
+        if query is None:
+            return list(
+                Corpus.documents.through.objects
+                .filter(corpus_id=self.pk)
+                .order_by('document_id')
+                .values_list('document_id', flat=True)
+            )
+        return list(Document.objects.filter_by_metadata(query).order_by('pk').values_list('pk', flat=True))
+
+    def get_documents(self):
+        """
+        :return: A QuerySet of the `Document`s in the Corpus, resolved in the database rather than from a list
+                 of IDs, for queries over large corpora
+        """
+        if self.is_dynamic:
+            return Document.objects.filter_by_metadata(self.query)
+        return Document.objects.filter(corpus=self.pk)
+
+    def words_associated(self, target_words):
+        """
+        Merges the bigram counts of the `Document`s of the Corpus for each of the given words, reading only
+        the counts of the tokens that follow them. The words following them in the `Document`s whose bigram
+        counts are still pending are counted from their tokens, without saving anything.
+
+        Note: the method is not case sensitive and words always return lowercase.
+
+        :param target_words: a list of words to search for in the texts of the Corpus
+        :return: a dictionary keying each word to a Counter of the words found after it in the Corpus
+        """
+        documents = self.get_documents()
+        target_words = [target_word.lower() for target_word in target_words]
+        output = {target_word: Counter() for target_word in target_words}
+
+        for document in documents.filter(bigrams_status=Document.ARTIFACT_PENDING).iterator():
+            for target_word in output:
+                output[target_word].update(document.count_following_words(target_word))
+
+        documents = documents.filter(bigrams_status=Document.ARTIFACT_COMPLETE)
+        for target_word, counter in output.items():
+            following = (
+                documents
+                .annotate(following=ObjectKeyTransform(target_word, 'bigram_counts'))
+                .values_list('following', flat=True)
+            )
+            # The documents without the word read as None
+            for word_counts in following.iterator():
+                if word_counts:
+                    counter.update(word_counts)
+        return output
+
+    def get_fingerprint(self):
+        """
+        :return: The fingerprint of the Corpus; the fingerprint of a Corpus defined by a query is computed
+                 from its current `Document`s (and cached like its membership)
+        """
+        if not self.is_dynamic:
+            return self.fingerprint
+
+        def compute():
+            content_hashes = Document.objects.filter_by_metadata(self.query).values_list('content_hash', flat=True)
+            return self.combine_fingerprint(EMPTY_FINGERPRINT, content_hashes.iterator())
+
+        return caching.get_or_set([Corpus], 'corpus_fingerprint', self.pk, compute)
+
     def __len__(self):
         """
         :return: The number of documents associated with this `Corpus` object as an int.
         """
-        return self.documents.count()
+        return len(self.document_ids())
 
     def __iter__(self):
         """
         Yields each `Document` associated with the `Corpus` object.
         """
-        for doc_id in self.documents.values_list('pk', flat=True):
-            yield self.documents.get(pk=doc_id)
+        for doc_id in self.document_ids():
+            yield Document.objects.get(pk=doc_id)
 
     def __eq__(self, other):
         """
-        :return: True if both of the corpora are associated with the same `Document`s.
+        Compares the fingerprints of two corpora, so no membership needs to be loaded.
+
+        :return: True if both of the corpora are associated with `Document`s with the same contents.
         """
         if not isinstance(other, Corpus):
             raise NotImplementedError("Only a Corpus can be compared to another Corpus.")
 
-        if len(self) != len(other):
-            return False
-
-        return list(self.documents.values_list('pk', flat=True)) == list(other.documents.values_list('pk', flat=True))
+        return self.get_fingerprint() == other.get_fingerprint()
 
     def __hash__(self):
         return super().__hash__()
 
+    @staticmethod
+    def combine_fingerprint(fingerprint, added=(), removed=()):
+        """
+        Adds and removes content hashes from a fingerprint. The fingerprint of a Corpus is the sum
+        of the content hashes of its `Document`s, so it does not depend on their order and can be
+        updated without looking at the other `Document`s.
+
+        :param fingerprint: a hex-encoded fingerprint
+        :param added: an iterable of hex-encoded content hashes to add to the fingerprint
+        :param removed: an iterable of hex-encoded content hashes to remove from the fingerprint
+        :return: The new hex-encoded fingerprint
+        """
+        value = int(fingerprint, 16)
+        value += sum(int(content_hash, 16) for content_hash in added)
+        value -= sum(int(content_hash, 16) for content_hash in removed)
+        return f'{value % FINGERPRINT_MODULUS:064x}'
 
-class ProximityAnalysis(models.Model):
+    def update_fingerprint(self, added=(), removed=()):
+        """
+        Updates and saves the fingerprint of the Corpus after `Document`s were added or removed.
+
+        :param added: the content hashes of the added `Document`s
+        :param removed: the content hashes of the removed `Document`s
+        :return: None
+        """
+        current = Corpus.objects.values_list('fingerprint', flat=True).get(pk=self.pk)
+        self.fingerprint = self.combine_fingerprint(current, added, removed)
+        Corpus.bump_revisions(Corpus.objects.filter(pk=self.pk), fingerprint=self.fingerprint)
+
+
+class ProximityAnalysis(RevisionedModel):
     """
     This model will persist the results from various proximity analysis functions.
     """
 
     corpus = models.ForeignKey(Corpus, related_name='proximity_analyses', on_delete=models.CASCADE)
     genders = models.ManyToManyField(Gender, related_name='proximity_analyses')
-    word_window = models.PositiveIntegerField()
-    results = models.JSONField()
+    # The number of words on each side of the pronouns, or of sentences around their sentences
+    word_window = models.PositiveIntegerField(null=True, blank=True)
+    sentence_window = models.PositiveIntegerField(null=True, blank=True)
+    # The pruning of the results: the number of words kept per part of speech tag, the minimum number of
+    # occurrences of the words kept and the part of speech tags counted (None for no limit)
+    top_k = models.PositiveIntegerField(null=True, blank=True)
+    min_count = models.PositiveIntegerField(default=1)
+    pos_filter = models.JSONField(null=True, blank=True, default=None)
+    results = CompressedJSONField()
 
     class Meta:
         verbose_name_plural = 'proximity analyses'
 
-class FrequencyAnalysis(models.Model):
+class FrequencyAnalysis(RevisionedModel):
     """
     This model will persist the results from the frequency analysis functions.
     """
 
     corpus = models.ForeignKey(Corpus, related_name='frequency_analyses', on_delete=models.CASCADE)
     genders = models.ManyToManyField(Gender, related_name='frequency_analyses')
-    results = models.JSONField()
+    results = CompressedJSONField()
 
     class Meta:
         verbose_name_plural = 'Frequency Analyses'
+
+
+class ProximityResult(models.Model):
+    """
+    This model holds a row of the results of a `ProximityAnalysis`: the number of occurrences of a word with a
+    part of speech tag around the pronouns of a type of a `Gender` in a `Document`. The rows are written along
+    with the analysis, so that slices and sums of its results are read with indexed queries instead of
+    loading its whole `results`.
+    """
+
+    analysis = models.ForeignKey(ProximityAnalysis, related_name='rows', on_delete=models.CASCADE)
+    document = models.ForeignKey(Document, related_name='proximity_results', on_delete=models.CASCADE)
+    gender = models.ForeignKey(Gender, related_name='proximity_results', on_delete=models.CASCADE)
+    pronoun_type = models.CharField(max_length=20)
+    pos = models.CharField(max_length=20)
+    word = models.CharField(max_length=255)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['analysis', 'document', 'gender', 'pronoun_type', 'pos']),
+            models.Index(fields=['analysis', 'word']),
+        ]
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of a `ProximityResult` object.
+        """
+        return (
+            f'<ProximityResult {self.analysis_id}: {self.document_id} {self.gender_id} {self.pronoun_type} '
+            f'{self.pos} {self.word!r} {self.count}>'
+        )
+
+
+class FrequencyResult(models.Model):
+    """
+    This model holds a row of the results of a `FrequencyAnalysis`: the count, frequency and relative frequency
+    of a pronoun of a `Gender` in a `Document`, like `ProximityResult`.
+    """
+
+    analysis = models.ForeignKey(FrequencyAnalysis, related_name='rows', on_delete=models.CASCADE)
+    document = models.ForeignKey(Document, related_name='frequency_results', on_delete=models.CASCADE)
+    gender = models.ForeignKey(Gender, related_name='frequency_results', on_delete=models.CASCADE)
+    pronoun = models.CharField(max_length=40)
+    count = models.PositiveIntegerField()
+    frequency = models.FloatField()
+    relative = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['analysis', 'document', 'gender']),
+            models.Index(fields=['analysis', 'pronoun']),
+        ]
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of a `FrequencyResult` object.
+        """
+        return (
+            f'<FrequencyResult {self.analysis_id}: {self.document_id} {self.gender_id} {self.pronoun!r} '
+            f'{self.count}>'
+        )
+
+
+class CooccurrenceMatrix(models.Model):
+    """
+    This model persists the counts of the words within a window of the pronouns of every `Gender`, summed over
+    the `Document`s of a `Corpus`, as a sparse matrix: each row is a (Gender, pronoun type) pair, each column a
+    (word, part of speech tag) pair, and only the non-zero cells are stored (as parallel lists of row indices,
+    column indices and counts). It records the `Document`s it counted and the version of their tokens, so that
+    it can be brought up to date by counting only the `Document`s added to the `Corpus` since (see
+    `analysis.cooccurrence`).
+    """
+
+    # The windows the matrices are built for by default
+    DEFAULT_WINDOWS = [1, 2, 3, 5, 10]
+
+    corpus = models.ForeignKey(Corpus, related_name='cooccurrence_matrices', on_delete=models.CASCADE)
+    word_window = models.PositiveIntegerField()
+    # [gender_id, pronoun_type] pairs, and the sorted pronouns each of them had when they were counted
+    rows = models.JSONField(default=list)
+    row_pronouns = models.JSONField(default=list)
+    # [word, part of speech tag] pairs
+    columns = models.JSONField(default=list)
+    row_indices = models.JSONField(default=list)
+    column_indices = models.JSONField(default=list)
+    counts = models.JSONField(default=list)
+    document_ids = models.JSONField(default=list)
+    # The [content hash, pipeline stages, tokenizer] of each counted Document, keyed by its ID
+    document_versions = models.JSONField(default=dict)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['corpus', 'word_window'], name='unique_corpus_word_window'),
+        ]
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of a `CooccurrenceMatrix` object.
+        """
+        return (
+            f'<CooccurrenceMatrix {self.corpus_id} ({self.word_window}): '
+            f'{len(self.rows)}x{len(self.columns)}, {len(self.counts)} cells>'
+        )
+
+    def get_cells(self):
+        """
+        :return: A dictionary keying the (row index, (word, tag)) pairs of the non-zero cells to their counts
+        """
+        return {
+            (row, tuple(self.columns[column])): count
+            for row, column, count in zip(self.row_indices, self.column_indices, self.counts)
+        }
+
+    def set_cells(self, cells):
+        """
+        Replaces the cells of the matrix, without saving it. The columns are the (word, tag) pairs of the
+        non-zero cells, in order.
+
+        :param cells: a dictionary keying (row index, (word, tag)) pairs to counts
+        :return: None
+        """
+        cells = {cell: count for cell, count in cells.items() if count}
+        columns = sorted({column for _, column in cells})
+        column_indices = {column: index for index, column in enumerate(columns)}
+        self.columns = [list(column) for column in columns]
+        self.row_indices, self.column_indices, self.counts = [], [], []
+        for (row, column), count in sorted(cells.items()):
+            self.row_indices.append(row)
+            self.column_indices.append(column_indices[column])
+            self.counts.append(count)
+
+    def get_counts(self, gender_id, pronoun_type, pos_tags=None):
+        """
+        Slices the row of a pronoun type of a Gender out of the matrix.
+
+        :param gender_id: the primary key of a Gender
+        :param pronoun_type: one of `PronounSeries.PRONOUN_TYPES`
+        :param pos_tags: an optional collection of part of speech tags to keep (every tag if None)
+        :return: A dict mapping part of speech tags to a `Counter` of the words with that tag, like
+                 `analysis.proximity.generate_token_counter`
+        """
+        try:
+            row = self.rows.index([gender_id, pronoun_type])
+        except ValueError:
+            return {}
+
+        output = {}
+        for row_index, column_index, count in zip(self.row_indices, self.column_indices, self.counts):
+            if row_index != row:
+                continue
+            word, tag = self.columns[column_index]
+            if pos_tags is None or tag in pos_tags:
+                output.setdefault(tag, Counter())[word] = count
+        return output
+
+
+class AnalysisJob(models.Model):
+    """
+    This model tracks a long-running analysis: its parameters, its progress through the corpus
+    and, once it finishes, the analysis instance holding its results.
+    """
+
+    FREQUENCY = 'frequency'
+    PROXIMITY = 'proximity'
+    ANALYSIS_TYPES = [FREQUENCY, PROXIMITY]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETE = 'complete'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+    STATUSES = [PENDING, RUNNING, COMPLETE, CANCELLED, FAILED]
+    FINISHED_STATUSES = [COMPLETE, CANCELLED, FAILED]
+
+    analysis_type = models.CharField(max_length=20, choices=[(name, name) for name in ANALYSIS_TYPES])
+    corpus = models.ForeignKey(Corpus, related_name='analysis_jobs', on_delete=models.CASCADE)
+    genders = models.ManyToManyField(Gender, related_name='analysis_jobs', blank=True)
+    word_window = models.PositiveIntegerField(null=True, blank=True)
+    # Several word windows counted in one pass, each giving its own ProximityAnalysis (see `proximity_analyses`)
+    word_windows = models.JSONField(null=True, blank=True, default=None)
+    sentence_window = models.PositiveIntegerField(null=True, blank=True)
+    top_k = models.PositiveIntegerField(null=True, blank=True)
+    min_count = models.PositiveIntegerField(default=1)
+    pos_filter = models.JSONField(null=True, blank=True, default=None)
+    status = models.CharField(max_length=20, choices=[(name, name) for name in STATUSES], default=PENDING)
+    cancel_requested = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    documents_total = models.PositiveIntegerField(default=0)
+    documents_processed = models.PositiveIntegerField(default=0)
+    tokens_processed = models.PositiveIntegerField(default=0)
+    tokens_per_second = models.FloatField(null=True, blank=True)
+    eta_seconds = models.FloatField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    frequency_analysis = models.ForeignKey(FrequencyAnalysis, null=True, blank=True, on_delete=models.SET_NULL)
+    proximity_analysis = models.ForeignKey(ProximityAnalysis, null=True, blank=True, on_delete=models.SET_NULL)
+    proximity_analyses = models.ManyToManyField(ProximityAnalysis, related_name='multi_window_jobs', blank=True)
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of an `AnalysisJob` object.
+        """
+        return f'<AnalysisJob {self.pk}: {self.analysis_type} ({self.status})>'
+
+    @property
+    def is_finished(self):
+        """
+        :return: True if the job has stopped running, whether or not it completed.
+        """
+        return self.status in self.FINISHED_STATUSES
+
+
+class ImportRun(models.Model):
+    """
+    This model tracks the import of a directory of text files as Documents, and records how far it got
+    after each committed batch, so that an interrupted import can resume where it stopped.
+    """
+
+    RUNNING = 'running'
+    COMPLETE = 'complete'
+    FAILED = 'failed'
+    STATUSES = [RUNNING, COMPLETE, FAILED]
+
+    source_dir = models.CharField(max_length=500)
+    manifest = models.CharField(max_length=500, blank=True)
+    pipeline_stages = models.JSONField(null=True, blank=True, default=None)
+    tokenizer = models.CharField(max_length=20, default=DEFAULT_TOKENIZER)
+    batch_size = models.PositiveIntegerField(default=100)
+    status = models.CharField(max_length=20, choices=[(name, name) for name in STATUSES], default=RUNNING)
+    error = models.TextField(blank=True)
+    # The number of files (in manifest order) whose documents have been committed
+    position = models.PositiveIntegerField(default=0)
+    corpus = models.ForeignKey(Corpus, related_name='import_runs', null=True, blank=True, on_delete=models.SET_NULL)
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __repr__(self):
+        """
+        :return: A console-friendly representation of an `ImportRun` object.
+        """
+        return f'<ImportRun {self.pk}: {self.source_dir} ({self.status}, {self.position} files)>'
+
+    def get_pipeline(self):
+        """
+        :return: The `Pipeline` the imported documents are processed with
+        """
+        return Pipeline(self.pipeline_stages, self.tokenizer)
@@ -0,0 +1,314 @@
+"""
+The text processing pipeline that turns the text of a Document into its tokens and word counts.
+
+A pipeline is a tokenizer engine and a list of named stages of two kinds:
+- character stages map single characters to strings (e.g. smart quotes to ASCII quotes). All of the character
+  stages of a pipeline are merged into one `str.translate` table, so the text is normalized in a single pass.
+- token stages are generator functions that filter or transform the stream of tokens. They are chained
+  lazily, so each token goes through every stage before the next one is read and no intermediate lists are built.
+
+New tokenizers and stages are added with `register_tokenizer`, `register_char_stage` and `register_token_stage`,
+and corpora choose the tokenizer and stages their documents are processed with by name. A tokenizer may also
+register a sentence tokenizer with `register_sentence_tokenizer`, giving the same tokens one sentence at a
+time, from which the pipeline records where each sentence starts in the list of tokens.
+"""
+import re
+import string
+from collections import Counter
+
+import nltk
+
+TOKENIZERS = {}
+SENTENCE_TOKENIZERS = {}
+CHAR_STAGES = {}
+TOKEN_STAGES = {}
+
+
+def register_tokenizer(name):
+    """
+    Decorator registering a tokenizer engine: a function taking a normalized text (str) and returning an
+    iterable of its tokens.
+
+    :param name: the name of the tokenizer
+    """
+
+    def register(function):
+        TOKENIZERS[name] = function
+        return function
+
+    return register
+
+
+def register_sentence_tokenizer(name):
+    """
+    Decorator registering the sentence tokenizer of a tokenizer engine: a function taking a normalized text
+    (str) and returning an iterable of the lists of tokens of its sentences, whose concatenation is the
+    output of the tokenizer.
+
+    :param name: the name of the tokenizer
+    """
+
+    def register(function):
+        SENTENCE_TOKENIZERS[name] = function
+        return function
+
+    return register
+
+
+@register_tokenizer('nltk')
+def nltk_tokenize(text):
+    """
+    NLTK's Punkt sentence splitter followed by its Treebank word tokenizer: accurate, but slow.
+    """
+    return nltk.word_tokenize(text)
+
+
+@register_sentence_tokenizer('nltk')
+def nltk_tokenize_sentences(text):
+    """
+    The sentences `nltk.word_tokenize` splits the text into, tokenized like it tokenizes them.
+    """
+    return (nltk.word_tokenize(sentence, preserve_line=True) for sentence in nltk.sent_tokenize(text))
+
+
+WORD_PATTERN = re.compile(r"\w+(?:['-]\w+)*")
+# The end of a sentence: final punctuation (and any closing quotes or brackets) followed by white space,
+# or a blank line, which ends a paragraph
+SENTENCE_END_PATTERN = re.compile(r"[.!?]+['\")\]]*(?=\s)|\n\s*\n")
+
+
+@register_tokenizer('regex')
+def regex_tokenize(text):
+    """
+    A single compiled regular expression matching runs of word characters, allowing inner apostrophes and
+    hyphens. It is much faster than NLTK, never produces punctuation tokens, and keeps contractions such as
+    "don't" in one token where NLTK splits them ("do", "n't").
+    """
+    return WORD_PATTERN.findall(text)
+
+
+@register_sentence_tokenizer('regex')
+def regex_tokenize_sentences(text):
+    """
+    Splits the text after final punctuation followed by white space and at blank lines, then tokenizes the
+    sentences like `regex_tokenize`.
+    """
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        yield WORD_PATTERN.findall(text, start, match.end())
+        start = match.end()
+    yield WORD_PATTERN.findall(text, start)
+
+
+# A quotation: straight or curly double quotes around text that does not run over a blank line, since a
+# quote left open at the end of a paragraph is reopened at the start of the next one
+QUOTE_PATTERN = re.compile(r'"(?:[^"\n]|\n(?![ \t]*\n))*"|“(?:[^”\n]|\n(?![ \t]*\n))*”')
+# The number of characters searched for the next token of a text; the search window of a word is doubled
+# until the word is found, in case the token stages dropped a long run of text, up to QUOTE_RESYNC_WINDOW
+QUOTE_ALIGNMENT_WINDOW = 1000
+QUOTE_RESYNC_WINDOW = 64 * QUOTE_ALIGNMENT_WINDOW
+
+
+def find_quote_spans(text, tokens):
+    """
+    Finds the quotations of a text with one pass of `QUOTE_PATTERN`, and the tokens of the text inside each
+    of them. The tokens are located in the text in order, one search from the end of the previous token each,
+    so the token stages may have dropped or lowercased tokens; tokens the tokenizer rewrote (e.g. NLTK's ``
+    for opening quotes) are not found and are left out of the spans. Each search is bounded, so that the
+    tokens that are not found do not make the search quadratic in the length of the text.
+
+    :param text: a normalized str
+    :param tokens: the list of the tokens of the text
+    :return: a list of the [start, end) token index ranges of the quotations (quotations without any token
+             are left out)
+    """
+    # Lowercasing may change the length of the text (e.g. 'İ'), so the quotations are found in the same
+    # lowercased text the tokens are located in
+    text = text.lower()
+    quotes = [match.span() for match in QUOTE_PATTERN.finditer(text)]
+    if not quotes:
+        return []
+
+    spans = []
+    quote = 0
+    position = 0
+    for index, token in enumerate(tokens):
+        token = token.lower()
+        window = QUOTE_ALIGNMENT_WINDOW
+        found = text.find(token, position, position + window + len(token))
+        while found < 0 and window < QUOTE_RESYNC_WINDOW and any(char.isalnum() for char in token):
+            window *= 2
+            found = text.find(token, position, position + window + len(token))
+        if found < 0:
+            continue
+        position = found + len(token)
+
+        while quote < len(quotes) and quotes[quote][1] <= found:
+            quote += 1
+        if quote == len(quotes):
+            break
+        if quotes[quote][0] <= found:
+            if spans and spans[-1][2] == quote:
+                spans[-1][1] = index + 1
+            else:
+                spans.append([index, index + 1, quote])
+    return [[start, end] for start, end, _ in spans]
+
+
+def register_char_stage(name, mapping):
+    """
+    Registers a character stage.
+
+    :param name: the name of the stage
+    :param mapping: a dictionary keying single characters to their replacement strings; since the
+                    character stages of a pipeline are applied together, a stage's replacements are not
+                    seen by the other character stages
+    :return: None
+    """
+    CHAR_STAGES[name] = str.maketrans(mapping)
+
+
+def register_token_stage(name):
+    """
+    Decorator registering a token stage: a function taking an iterable of tokens (str) and returning an
+    iterable of tokens, preferably a generator.
+
+    :param name: the name of the stage
+    """
+
+    def register(function):
+        TOKEN_STAGES[name] = function
+        return function
+
+    return register
+
+
+register_char_stage('smart_quotes', {'‘': "'", '’': "'", '“': '"', '”': '"'})
+
+PUNCTUATION = frozenset(string.punctuation)
+
+
+@register_token_stage('drop_punctuation')
+def drop_punctuation(tokens):
+    """
+    Removes the tokens made of a single punctuation character.
+    """
+    return (token for token in tokens if token not in PUNCTUATION)
+
+
+@register_token_stage('lowercase')
+def lowercase(tokens):
+    """
+    Converts the tokens to lowercase.
+    """
+    return (token.lower() for token in tokens)
+
+
+@register_token_stage('drop_stopwords')
+def drop_stopwords(tokens):
+    """
+    Removes English stop words; expects lowercase tokens.
+    """
+    stop_words = frozenset(nltk.corpus.stopwords.words('english'))
+    return (token for token in tokens if token not in stop_words)
+
+
+DEFAULT_TOKENIZER = 'nltk'
+DEFAULT_STAGES = ['smart_quotes', 'drop_punctuation', 'lowercase']
+
+
+class Pipeline:
+    """
+    A configured tokenizer and sequence of character and token stages.
+    """
+
+    def __init__(self, stages=None, tokenizer=None):
+        """
+        :param stages: a list of registered stage names, in the order their token stages should run;
+                       `DEFAULT_STAGES` if None
+        :param tokenizer: the name of a registered tokenizer; `DEFAULT_TOKENIZER` if None
+        :raises ValueError: if the tokenizer or a stage is not registered
+        """
+        self.stages = list(DEFAULT_STAGES if stages is None else stages)
+        self.tokenizer = tokenizer or DEFAULT_TOKENIZER
+        if self.tokenizer not in TOKENIZERS:
+            raise ValueError(f'Unknown tokenizer {self.tokenizer!r}.')
+
+        self.translation = {}
+        self.token_stages = []
+        for name in self.stages:
+            if name in CHAR_STAGES:
+                self.translation.update(CHAR_STAGES[name])
+            elif name in TOKEN_STAGES:
+                self.token_stages.append(TOKEN_STAGES[name])
+            else:
+                raise ValueError(f'Unknown pipeline stage {name!r}.')
+
+    def __repr__(self):
+        return f'<Pipeline ({self.tokenizer}): {self.stages}>'
+
+    def normalize(self, text):
+        """
+        :param text: a str
+        :return: The text with every character stage applied, in one pass
+        """
+        return text.translate(self.translation)
+
+    def tokenize(self, text):
+        """
+        :param text: a normalized str
+        :return: A generator of the tokens of the text, with every token stage applied
+        """
+        tokens = iter(TOKENIZERS[self.tokenizer](text))
+        for stage in self.token_stages:
+            tokens = stage(tokens)
+        return tokens
+
+    def tokenize_sentences(self, text):
+        """
+        Tokenizes a text like `tokenize`, recording where its sentences start. Since every token goes through
+        all of the token stages before the next one is read, each token that comes out of the stages is
+        attributed to the sentence of the last token that went in.
+
+        :param text: a normalized str
+        :return: a tuple of the list of the tokens of the text, with every token stage applied, and the list
+                 of the indices of the first token of each sentence (sentences left without any token are
+                 skipped); a text whose tokenizer has no sentence tokenizer is a single sentence
+        """
+        if self.tokenizer not in SENTENCE_TOKENIZERS:
+            tokens = list(self.tokenize(text))
+            return tokens, [0] if tokens else []
+
+        sentence = -1
+
+        def sentence_tokens():
+            nonlocal sentence
+            for sentence_index, tokens in enumerate(SENTENCE_TOKENIZERS[self.tokenizer](text)):
+                for token in tokens:
+                    sentence = sentence_index
+                    yield token
+
+        tokens = sentence_tokens()
+        for stage in self.token_stages:
+            tokens = stage(tokens)
+
+        output = []
+        sentence_offsets = []
+        last_sentence = -1
+        for token in tokens:
+            if sentence != last_sentence:
+                sentence_offsets.append(len(output))
+                last_sentence = sentence
+            output.append(token)
+        return output, sentence_offsets
+
+    def run(self, text):
+        """
+        Normalizes, tokenizes and counts a text.
+
+        :param text: a str
+        :return: a tuple of the normalized text, its list of tokens and a Counter of the tokens
+        """
+        text = self.normalize(text)
+        tokens = list(self.tokenize(text))
+        return text, tokens, Counter(tokens)
@@ -4,6 +4,8 @@ in ways that can be transported across the backend/frontend divide, or
 allow the frontend to suggest changes to the backend/database.
 """
 # import json
+from collections import defaultdict
+
 from rest_framework import serializers
 from .models import (
     PronounSeries,
@@ -11,7 +13,8 @@ from .models import (
     Document,
     Corpus,
     ProximityAnalysis,
-    FrequencyAnalysis
+    FrequencyAnalysis,
+    AnalysisJob
 )
 
 
@@ -43,7 +46,7 @@ class DocumentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Document
-        fields = ['id', 'author', 'title', 'year', 'text', 'word_count', 'new_attributes']
+        fields = ['id', 'author', 'title', 'year', 'text', 'word_count', 'new_attributes', 'tokenizer']
 
 
 class SimpleDocumentSerializer(serializers.ModelSerializer):
@@ -60,10 +63,12 @@ class CorpusSerializer(serializers.ModelSerializer):
     """
     Serializes a Corpus object
     """
+    documents = serializers.ListField(source='document_ids', read_only=True)
+    fingerprint = serializers.CharField(source='get_fingerprint', read_only=True)
 
     class Meta:
         model = Corpus
-        fields = ['id', 'title', 'description', 'documents']
+        fields = ['id', 'title', 'description', 'documents', 'fingerprint', 'pipeline_stages', 'tokenizer', 'query']
 
 
 class ProximityAnalysisSerializer(serializers.ModelSerializer):
@@ -76,7 +81,8 @@ class ProximityAnalysisSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProximityAnalysis
-        fields = ['id', 'corpus', 'genders', 'word_window', 'results']
+        fields = ['id', 'corpus', 'genders', 'word_window', 'sentence_window', 'top_k', 'min_count', 'pos_filter',
+                  'results']
 
 
 class FrequencyAnalysisSerializer(serializers.ModelSerializer):
@@ -90,3 +96,96 @@ class FrequencyAnalysisSerializer(serializers.ModelSerializer):
     class Meta:
         model = FrequencyAnalysis
         fields = ['id', 'corpus', 'genders', 'results']
+
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """
+    Serializes an AnalysisJob object
+    """
+
+    genders = serializers.PrimaryKeyRelatedField(read_only=True, many=True)
+    proximity_analyses = serializers.PrimaryKeyRelatedField(read_only=True, many=True)
+
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'analysis_type', 'corpus', 'genders', 'word_window', 'word_windows', 'sentence_window',
+                  'top_k', 'min_count', 'pos_filter', 'status', 'cancel_requested', 'error', 'documents_total',
+                  'documents_processed', 'tokens_processed', 'tokens_per_second', 'eta_seconds', 'created',
+                  'started', 'finished', 'frequency_analysis', 'proximity_analysis', 'proximity_analyses']
+
+
+def serialize_rows(queryset, fields):
+    """
+    Serializes the rows of a QuerySet straight from `values_list` tuples, without building model
+    instances or running DRF's field pipeline for each row. This is the fast path for bulk listings,
+    and produces the same output as a ModelSerializer with the same (concrete, non-relational) fields.
+
+    :param queryset: a QuerySet
+    :param fields: a list of field names
+    :return: a list of dictionaries keying the field names to their values
+    """
+    return [dict(zip(fields, row)) for row in queryset.values_list(*fields)]
+
+
+def _related_ids(through, source, target):
+    """
+    :return: A dictionary keying the source ids of a many-to-many through model to lists of target ids
+    """
+    related = defaultdict(list)
+    for source_id, target_id in through.objects.order_by(source, target).values_list(source, target):
+        related[source_id].append(target_id)
+    return related
+
+
+def serialize_pronoun_series_rows(queryset):
+    """
+    Fast path equivalent of `PronounSeriesSerializer(queryset, many=True).data`.
+    """
+    rows = serialize_rows(queryset, ['id', 'identifier', *PronounSeries.PRONOUN_TYPES])
+    for row in rows:
+        row['all_pronouns'] = {row[pronoun_type] for pronoun_type in PronounSeries.PRONOUN_TYPES}
+    return rows
+
+
+def serialize_gender_rows(queryset):
+    """
+    Fast path equivalent of `GenderSerializer(queryset, many=True).data`.
+    """
+    series_by_id = {row['id']: row for row in serialize_pronoun_series_rows(PronounSeries.objects.all())}
+    series_ids = _related_ids(Gender.pronoun_series.through, 'gender_id', 'pronounseries_id')
+
+    rows = serialize_rows(queryset, ['id', 'label'])
+    for row in rows:
+        pronoun_series = [series_by_id[series_id] for series_id in series_ids[row['id']]]
+        row['pronoun_series'] = pronoun_series
+        row['pronouns'] = set().union(*(series['all_pronouns'] for series in pronoun_series))
+        row['subj'] = {series['subj'] for series in pronoun_series}
+        row['obj'] = {series['obj'] for series in pronoun_series}
+    return rows
+
+
+def serialize_simple_document_rows(queryset):
+    """
+    Fast path equivalent of `SimpleDocumentSerializer(queryset, many=True).data`.
+    """
+    return serialize_rows(queryset, SimpleDocumentSerializer.Meta.fields)
+
+
+def serialize_corpus_rows(queryset):
+    """
+    Fast path equivalent of `CorpusSerializer(queryset, many=True).data`.
+    """
+    document_ids = _related_ids(Corpus.documents.through, 'corpus_id', 'document_id')
+
+    rows = serialize_rows(
+        queryset, ['id', 'title', 'description', 'fingerprint', 'pipeline_stages', 'tokenizer', 'query']
+    )
+    for row in rows:
+        if row['query'] is None:
+            row['documents'] = document_ids[row['id']]
+        else:
+            corpus = Corpus(pk=row['id'], query=row['query'])
+            row['documents'] = corpus.document_ids()
+            row['fingerprint'] = corpus.get_fingerprint()
+    # In the order of the serializer's fields
+    return [{field: row[field] for field in CorpusSerializer.Meta.fields} for row in rows]
@@ -0,0 +1,157 @@
+"""
+Signal receivers that keep denormalized data of the gender analysis web app in sync.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from . import caching
+from .managers import CORE_METADATA_FIELDS
+from .models import (
+    EMPTY_FINGERPRINT,
+    Corpus,
+    Document,
+    FrequencyAnalysis,
+    Gender,
+    PronounSeries,
+    ProximityAnalysis,
+)
+
+# The Document fields that corpus queries can filter on
+METADATA_FIELDS = frozenset(CORE_METADATA_FIELDS + ['new_attributes'])
+
+# The Document fields of the artifacts computed lazily on read paths (see `Document.ensure_artifacts`), along
+# with the fields every save sets; saving only these leaves every cached value valid. The word count is left
+# out since serialized Documents include it.
+ARTIFACT_FIELDS = frozenset(
+    [field for field in Document.NLP_ARTIFACT_FIELDS if field != 'word_count']
+    + [f'{artifact}_status' for artifact in Document.ARTIFACTS]
+    + ['revision', 'modified']
+)
+
+# Models whose cached values must be invalidated when they change, keyed to the other models whose
+# cached values include them (e.g. a serialized Corpus includes the ids of its Documents)
+CACHED_MODELS = {
+    Document: [Corpus],
+    Corpus: [],
+    Gender: [],
+    PronounSeries: [Gender],
+    FrequencyAnalysis: [],
+    ProximityAnalysis: [],
+}
+
+
+@receiver(m2m_changed, sender=Corpus.documents.through)
+def update_corpus_fingerprints(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps `Corpus.fingerprint` up to date when documents are added to or removed from corpora,
+    from either side of the relation.
+    """
+    if not reverse:
+        if action == 'post_add':
+            added = Document.objects.filter(pk__in=pk_set).values_list('content_hash', flat=True)
+            instance.update_fingerprint(added=added)
+        elif action == 'pre_remove':
+            removed = instance.documents.filter(pk__in=pk_set).values_list('content_hash', flat=True)
+            instance.update_fingerprint(removed=removed)
+        elif action == 'post_clear':
+            Corpus.bump_revisions(Corpus.objects.filter(pk=instance.pk), fingerprint=EMPTY_FINGERPRINT)
+            instance.fingerprint = EMPTY_FINGERPRINT
+        return
+
+    if action == 'post_add':
+        corpora = Corpus.objects.filter(pk__in=pk_set)
+        for corpus in corpora:
+            corpus.update_fingerprint(added=[instance.content_hash])
+    elif action in ('pre_remove', 'pre_clear'):
+        corpora = instance.corpus_set.all()
+        if action == 'pre_remove':
+            corpora = corpora.filter(pk__in=pk_set)
+        for corpus in corpora:
+            corpus.update_fingerprint(removed=[instance.content_hash])
+
+
+@receiver(pre_delete, sender=Document)
+def remove_deleted_document_from_fingerprints(sender, instance, **kwargs):
+    """
+    Deleting a `Document` removes it from its corpora without sending m2m_changed.
+    """
+    for corpus in instance.corpus_set.all():
+        corpus.update_fingerprint(removed=[instance.content_hash])
+
+
+@receiver(m2m_changed, sender=Gender.pronoun_series.through)
+def bump_gender_revisions(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Changing the pronoun series of a `Gender` makes a new revision of it.
+    """
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        Gender.bump_revisions(Gender.objects.filter(pk=instance.pk))
+    elif action == 'post_clear':
+        # The cleared genders are no longer known after the fact, so every gender is bumped
+        Gender.bump_revisions()
+    else:
+        Gender.bump_revisions(Gender.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Document)
+def sync_document_metadata(sender, instance, update_fields, **kwargs):
+    """
+    Keeps the `DocumentMetadata` rows of a `Document` in sync with its `new_attributes`. Registered before
+    `invalidate_cached_model`, so that cached values are only invalidated once the rows are up to date.
+    """
+    if update_fields is None or 'new_attributes' in update_fields:
+        instance.sync_metadata()
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def bump_dynamic_corpus_revisions(sender, update_fields=None, **kwargs):
+    """
+    A `Document` may join or leave the corpora defined by a query when it is created, deleted or has its
+    metadata changed; their membership is resolved lazily, so only their revisions are bumped here.
+    """
+    if update_fields is None or not METADATA_FIELDS.isdisjoint(update_fields):
+        Corpus.bump_revisions(Corpus.objects.filter(query__isnull=False))
+
+
+@receiver(post_save, sender=PronounSeries)
+@receiver(post_delete, sender=PronounSeries)
+def reset_document_pronoun_counts(sender, **kwargs):
+    """
+    The pronoun counts of the `Document`s cover the pronouns of every `PronounSeries`, so they are computed
+    again, lazily, when a series changes.
+    """
+    Document.objects.filter(pronouns_status=Document.ARTIFACT_COMPLETE).update(
+        pronouns_status=Document.ARTIFACT_PENDING
+    )
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_model(sender, update_fields=None, **kwargs):
+    """
+    Invalidates the cached values computed from a model when one of its rows is saved or deleted, unless only
+    the artifacts of a `Document` were saved.
+    """
+    if sender is Document and update_fields is not None and ARTIFACT_FIELDS.issuperset(update_fields):
+        return
+    if sender in CACHED_MODELS:
+        caching.bump_model_version(sender, *CACHED_MODELS[sender])
+
+
+@receiver(m2m_changed, sender=Corpus.documents.through)
+@receiver(m2m_changed, sender=Gender.pronoun_series.through)
+def invalidate_cached_relation(sender, action, **kwargs):
+    """
+    Invalidates the cached values computed from a model when one of its many-to-many relations changes.
+    """
+    if action.startswith('post_'):
+        caching.bump_model_version(Corpus if sender is Corpus.documents.through else Gender)
@@ -0,0 +1,117 @@
+"""
+Part of speech tagging of long token lists in parallel.
+
+NLTK's perceptron tagger goes through the tokens in order, and the tag of each token depends on the two
+tokens before and after it and on the tags of the two tokens before it. A list of tokens can still be cut
+into chunks that are tagged independently, with the same output as tagging it in one go: each chunk
+starts right after two tokens that are in the tagger's tag dictionary, whose tags are therefore known
+without tagging what comes before them, and it is tagged along with the two tokens before and after it.
+"""
+from functools import lru_cache
+
+from joblib import (
+    Parallel,
+    delayed,
+    effective_n_jobs,
+)
+from nltk.tag.perceptron import PerceptronTagger
+
+# Token lists shorter than this are tagged serially, as starting the worker processes would take longer
+PARALLEL_THRESHOLD = 100000
+
+
+@lru_cache(maxsize=None)
+def get_tagger():
+    """
+    Loads NLTK's English perceptron tagger once per process; `nltk.pos_tag` loads it again on every call.
+
+    :return: a `PerceptronTagger`
+    """
+    return PerceptronTagger()
+
+
+def find_chunk_starts(tokens, tagdict, chunk_size):
+    """
+    :param tokens: a list of tokens (str)
+    :param tagdict: the tag dictionary of the tagger, keying tokens to the only tag they ever get
+    :param chunk_size: the approximate number of tokens per chunk
+    :return: a list of the indices the chunks start at, starting with 0; apart from the first one, each
+             chunk starts after two tokens of the tag dictionary
+    """
+    starts = [0]
+    start = chunk_size
+    while start < len(tokens):
+        start = max(start, 2)
+        while start < len(tokens) and not (tokens[start - 1] in tagdict and tokens[start - 2] in tagdict):
+            start += 1
+        if start >= len(tokens):
+            break
+        starts.append(start)
+        start += chunk_size
+    return starts
+
+
+def tag_chunk(before, chunk, after, tagger=None):
+    """
+    Tags a chunk of tokens exactly like `PerceptronTagger.tag` tags them as part of the whole list.
+
+    :param before: the (at most two) tokens before the chunk, which must be in the tag dictionary
+    :param chunk: the tokens to tag
+    :param after: the (at most two) tokens after the chunk
+    :param tagger: the `PerceptronTagger` to use (`get_tagger()` if None)
+    :return: a list of (token, tag) tuples, one per token of the chunk
+    """
+    tagger = tagger or get_tagger()
+    if before:
+        prev, prev2 = tagger.tagdict[before[-1]], tagger.tagdict[before[-2]]
+    else:
+        prev, prev2 = tagger.START
+
+    # The part of the context of the whole list that the features of the chunk's tokens look at
+    context = (
+        tagger.START[len(before):]
+        + [tagger.normalize(word) for word in before + chunk + after]
+        + tagger.END[:2 - len(after)]
+    )
+
+    output = []
+    for i, word in enumerate(chunk):
+        tag = tagger.tagdict.get(word)
+        if not tag:
+            features = tagger._get_features(i, word, context, prev, prev2)  # pylint: disable=protected-access
+            tag, _ = tagger.model.predict(features)
+        output.append((word, tag))
+        prev2 = prev
+        prev = tag
+    return output
+
+
+def pos_tag(tokens, n_jobs=None, chunk_size=None, tagger=None):
+    """
+    Tags a list of tokens with the same output as `nltk.pos_tag`, splitting long lists into chunks that are
+    tagged in a pool of processes.
+
+    :param tokens: a list of tokens (str)
+    :param n_jobs: the number of processes (all of the CPUs if None); 1 tags serially
+    :param chunk_size: the approximate number of tokens per chunk (the tokens split evenly across the
+                       processes if None)
+    :param tagger: the `PerceptronTagger` to use (`get_tagger()` if None); it is sent to every process
+    :return: a list of (token, tag) tuples
+    """
+    n_jobs = effective_n_jobs(-1 if n_jobs is None else n_jobs)
+    if chunk_size is None:
+        if n_jobs == 1 or len(tokens) < PARALLEL_THRESHOLD:
+            return (tagger or get_tagger()).tag(tokens)
+        chunk_size = -(-len(tokens) // n_jobs)
+
+    starts = find_chunk_starts(tokens, (tagger or get_tagger()).tagdict, chunk_size)
+    ends = starts[1:] + [len(tokens)]
+    chunks = [
+        (tokens[max(start - 2, 0):start], tokens[start:end], tokens[end:end + 2])
+        for start, end in zip(starts, ends)
+    ]
+    if len(chunks) == 1 or n_jobs == 1:
+        results = [tag_chunk(*chunk, tagger=tagger) for chunk in chunks]
+    else:
+        results = Parallel(n_jobs=n_jobs)(delayed(tag_chunk)(*chunk, tagger=tagger) for chunk in chunks)
+    return [tagged_token for result in results for tagged_token in result]
@@ -1,20 +1,78 @@
 """
 Tests for the gender analysis web app.
 """
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import zlib
 from collections import Counter
+from io import StringIO
 
+from django.db import connection
 from django.test import TestCase
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import FieldError, ObjectDoesNotExist
+from nltk.tag.perceptron import PerceptronTagger
 
 from .models import (
     PronounSeries,
     Document,
     Corpus,
     Gender,
+    AnalysisJob,
+    CooccurrenceMatrix,
+    CoreferenceAnnotation,
+    FrequencyAnalysis,
+    FrequencyResult,
+    ImportRun,
+    DocumentMetadata,
+    PronounAttribution,
 )
 from .analysis import (
+    cooccurrence,
+    density,
+    dialogue,
+    distinctiveness,
     proximity,
-    frequency
+    frequency,
+    jobs,
+    results,
+    timeseries,
+)
+from .serializers import (
+    CorpusSerializer,
+    GenderSerializer,
+    PronounSeriesSerializer,
+    SimpleDocumentSerializer,
+    serialize_corpus_rows,
+    serialize_gender_rows,
+    serialize_pronoun_series_rows,
+    serialize_simple_document_rows,
+)
+from .analysis.inputs import (
+    get_document_ids,
+    get_gender_pronoun_sets,
+)
+from .analysis.progress import ProgressTracker
+from . import (
+    caching,
+    coreference,
+    importer,
+    views,
+)
+from .management.commands.compare_tokenizers import count_divergence
+from .pipeline import (
+    DEFAULT_STAGES,
+    Pipeline,
+    find_quote_spans,
+)
+from .tagging import (
+    find_chunk_starts,
+    pos_tag,
 )
 
 
@@ -132,8 +190,10 @@ class DocumentTestCase(TestCase):
         self.assertEqual(doc_2.word_count, 6)
         self.assertEqual(doc_2.word_count_counter, counter_2)
         self.assertEqual(doc_3.word_count_counter, counter_3)
-        self.assertEqual(doc_9.part_of_speech_tags[:4], tags_1)
+        self.assertEqual(doc_9.tags_status, Document.ARTIFACT_PENDING)
+        self.assertEqual(doc_9.ensure_part_of_speech_tags()[:4], tags_1)
         self.assertEqual(doc_9.part_of_speech_tags[-4:], tags_2)
+        self.assertEqual(Document.objects.get(title='doc9').tags_status, Document.ARTIFACT_COMPLETE)
 
     def test_clean_quotes(self):
         doc = Document.objects.get(title='doc4')
@@ -200,6 +260,78 @@ class DocumentTestCase(TestCase):
         self.assertEqual(doc.word_count, 9)
 
 
+class DocumentDeduplicationTestCase(TestCase):
+    """
+    Test cases for reusing the NLP artifacts of documents with identical text
+    """
+
+    def setUp(self):
+        tokens = ['she', 'really', 'likes', 'to', 'eat', 'chocolate']
+        Document.objects.create(
+            title='first edition',
+            text='She really likes to eat chocolate!',
+            tokenized_text=tokens,
+            word_count=len(tokens),
+            word_count_counter=Counter(tokens),
+            part_of_speech_tags=[[token, 'TAG'] for token in tokens],
+            pronoun_counts={'she': 1},
+            sentence_offsets=[0],
+            quote_spans=[],
+            bigram_counts=Document.count_bigrams(tokens),
+            pipeline_stages=DEFAULT_STAGES,
+            tokens_status=Document.ARTIFACT_COMPLETE,
+            sentences_status=Document.ARTIFACT_COMPLETE,
+            quotes_status=Document.ARTIFACT_COMPLETE,
+            counts_status=Document.ARTIFACT_COMPLETE,
+            bigrams_status=Document.ARTIFACT_COMPLETE,
+            tags_status=Document.ARTIFACT_COMPLETE,
+            pronouns_status=Document.ARTIFACT_COMPLETE,
+        )
+
+    def test_create_duplicate_document(self):
+        # Runs without NLTK: the artifacts can only come from the first edition
+        doc = Document.objects.create_document(title='second edition', text='She really likes to eat chocolate!')
+        first = Document.objects.get(title='first edition')
+        self.assertEqual(doc.content_hash, first.content_hash)
+        for field in Document.NLP_ARTIFACT_FIELDS:
+            self.assertEqual(getattr(Document.objects.get(pk=doc.pk), field), getattr(first, field))
+
+    def test_different_pipeline(self):
+        first = Document.objects.get(title='first edition')
+        doc = Document.objects.create(title='second edition', text='She really likes to eat chocolate!')
+        doc.pipeline_stages = ['smart_quotes', 'lowercase']
+        self.assertFalse(doc._copy_duplicate_artifacts())
+        doc.pipeline_stages = DEFAULT_STAGES
+        self.assertTrue(doc._copy_duplicate_artifacts())
+        self.assertEqual(doc.tokenized_text, first.tokenized_text)
+
+    def test_lazy_tags(self):
+        # The tags are left pending at ingestion, unless a duplicate has them already
+        doc = Document.objects.create(title='draft', text='She really likes to eat chocolate!')
+        doc.get_tokenized_text_wc_and_pos(artifacts=['tokens'])
+        doc = Document.objects.get(pk=doc.pk)
+        self.assertEqual(doc.tags_status, Document.ARTIFACT_COMPLETE)
+
+        Document.objects.filter(title='first edition').update(tags_status=Document.ARTIFACT_PENDING)
+        doc = Document.objects.create(title='second draft', text='She really likes to eat chocolate!')
+        doc.get_tokenized_text_wc_and_pos()
+        doc = Document.objects.get(pk=doc.pk)
+        self.assertEqual(doc.counts_status, Document.ARTIFACT_COMPLETE)
+        self.assertEqual(doc.tags_status, Document.ARTIFACT_PENDING)
+        self.assertEqual(doc.part_of_speech_tags, [])
+
+        # Complete artifacts are never recomputed
+        revision = doc.revision
+        doc.ensure_artifacts('tokens', 'counts')
+        self.assertEqual(Document.objects.get(pk=doc.pk).revision, revision)
+
+    def test_update_metadata_duplicate_text(self):
+        doc = Document.objects.create(title='draft', text='Nothing to see here.')
+        doc.update_metadata({'text': 'She really likes to eat chocolate!'})
+        self.assertEqual(doc.word_count, 6)
+        self.assertEqual(doc.get_count_of_word('chocolate'), 1)
+
+
 class FrequencyTestCase(TestCase):
     """
     Test cases for the frequency analysis
@@ -291,6 +423,46 @@ class CorpusTestCase(TestCase):
         self.assertEqual(list(corpus1.documents.all()), [doc1, doc2, doc3])
 
 
+class CorpusFingerprintTestCase(TestCase):
+    """
+    Test cases for maintaining the content fingerprint of a Corpus
+    """
+
+    def setUp(self):
+        Corpus.objects.create(title='corpus1')
+        Corpus.objects.create(title='corpus2')
+        Document.objects.create(title='doc1', text='The quick brown fox jumped over the lazy dog.')
+        Document.objects.create(title='doc2', text='She really likes to eat chocolate!')
+        Document.objects.create(title='doc3', text='She really likes to eat chocolate!')
+
+    def test_corpus_fingerprint(self):
+        corpus1, corpus2 = Corpus.objects.all()
+        doc1, doc2, doc3 = Document.objects.all()
+
+        corpus1.documents.add(doc1, doc2)
+        corpus2.documents.add(doc2)
+        doc1.corpus_set.add(corpus2)
+        self.assertEqual(Corpus.objects.get(pk=corpus1.pk), Corpus.objects.get(pk=corpus2.pk))
+
+        # Documents with the same contents give the same fingerprint
+        corpus2.documents.set([doc1, doc3])
+        self.assertEqual(Corpus.objects.get(pk=corpus1.pk), Corpus.objects.get(pk=corpus2.pk))
+
+        doc3.text = 'She really likes to eat cake!'
+        doc3.save()
+        self.assertNotEqual(Corpus.objects.get(pk=corpus1.pk), Corpus.objects.get(pk=corpus2.pk))
+
+        doc3.delete()
+        corpus2.documents.add(doc2)
+        self.assertEqual(Corpus.objects.get(pk=corpus1.pk), Corpus.objects.get(pk=corpus2.pk))
+
+        corpus1.documents.clear()
+        doc1.corpus_set.clear()
+        doc2.corpus_set.remove(corpus2)
+        self.assertEqual(Corpus.objects.get(pk=corpus1.pk).fingerprint, '0' * 64)
+        self.assertEqual(Corpus.objects.get(pk=corpus2.pk).fingerprint, '0' * 64)
+
+
 class ProximityTestCase(TestCase):
     """
     Test Cases for the analysis functions in `proximity.py`
@@ -517,3 +689,1504 @@ class ProximityTestCase(TestCase):
         }
 
         self.assertEqual(results, expected)
+
+
+class AnalysisJobTestCase(TestCase):
+    """
+    Test cases for running analyses as jobs with progress reporting and cancellation
+    """
+
+    def setUp(self):
+        tokens = ['she', 'took', 'her', 'purse', 'and', 'handed', 'it', 'to', 'him']
+        corpus = Corpus.objects.create(title='Job Corpus')
+        for title in ['doc1', 'doc2']:
+            # The artifacts are filled in directly so that these tests do not depend on NLTK's models
+            doc = Document.objects.create(
+                title=title,
+                text=' '.join(tokens),
+                tokenized_text=tokens,
+                word_count=len(tokens),
+                word_count_counter=Counter(tokens),
+            )
+            corpus.documents.add(doc)
+        self.job = AnalysisJob.objects.create(analysis_type=AnalysisJob.FREQUENCY, corpus=corpus)
+        self.job.genders.set([1, 2])
+
+    def test_progress_tracker(self):
+        tracker = ProgressTracker()
+        frequency.run_analysis(self.job.corpus_id, [1, 2], progress=tracker)
+        self.assertEqual(tracker.documents_total, 2)
+        self.assertEqual(tracker.documents_processed, 2)
+        self.assertEqual(tracker.tokens_processed, 18)
+        self.assertEqual(tracker.eta_seconds, 0)
+
+    def test_run_job(self):
+        jobs.run_job(self.job.pk)
+        job = AnalysisJob.objects.get(pk=self.job.pk)
+        self.assertEqual(job.status, AnalysisJob.COMPLETE)
+        self.assertEqual(job.documents_processed, 2)
+        self.assertEqual(job.tokens_processed, 18)
+
+        analysis = FrequencyAnalysis.objects.get(pk=job.frequency_analysis_id)
+        doc_id = str(Document.objects.get(title='doc1').pk)
+        self.assertEqual(analysis.results[doc_id]['count']['2'], {'she': 1, 'her': 1, 'hers': 0, 'herself': 0})
+
+    def test_cancel_job(self):
+        self.job.cancel_requested = True
+        self.job.save()
+        jobs.run_job(self.job.pk)
+        job = AnalysisJob.objects.get(pk=self.job.pk)
+        self.assertEqual(job.status, AnalysisJob.CANCELLED)
+        self.assertEqual(job.documents_processed, 0)
+        self.assertIsNone(job.frequency_analysis)
+
+    def test_job_events(self):
+        jobs.run_job(self.job.pk)
+        response = self.client.get(f'/api/analysis_job/{self.job.pk}/events')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join(response.streaming_content).decode()
+        self.assertTrue(events.startswith('event: complete\ndata: '))
+
+    def test_job_events_stop(self):
+        # A job left running by a dead worker times out, and a deleted job ends the stream
+        events = list(views._analysis_job_events(self.job.pk, stall_timeout=0))
+        self.assertEqual([event.split('\n')[1] for event in events[:1]], ['event: progress'])
+        self.assertEqual([event.split('\n')[0] for event in events[1:]], ['event: timeout'])
+        job_id = self.job.pk
+        self.job.delete()
+        self.assertEqual(list(views._analysis_job_events(job_id)), ['event: deleted\ndata: {}\n\n'])
+
+    def test_job_events_reconnect(self):
+        # A stream of a running job ends after its duration, and the next one resumes from the last event
+        events = list(views._analysis_job_events(self.job.pk, duration=0))
+        self.assertEqual(len(events), 2)
+        event_id, event_name = events[0].split('\n')[:2]
+        self.assertEqual((event_id[:4], event_name), ('id: ', 'event: progress'))
+        self.assertEqual(events[1], f'retry: {views.ANALYSIS_JOB_RECONNECT_DELAY}\n\n')
+
+        last_event_id = event_id[4:]
+        events = list(views._analysis_job_events(self.job.pk, last_event_id, duration=0))
+        self.assertEqual(events, [f'retry: {views.ANALYSIS_JOB_RECONNECT_DELAY}\n\n'])
+
+        # The stall is timed from the last change, across streams
+        stalled_event_id = f'{time.time() - 3600:.3f}:{last_event_id.partition(":")[2]}'
+        events = list(views._analysis_job_events(self.job.pk, stalled_event_id, stall_timeout=600))
+        self.assertEqual([event.split('\n')[0] for event in events], ['event: timeout'])
+
+        response = self.client.get(f'/api/analysis_job/{self.job.pk}/events', HTTP_LAST_EVENT_ID=stalled_event_id)
+        self.assertTrue(b''.join(response.streaming_content).decode().startswith('event: timeout\n'))
+
+    def test_invalid_windows(self):
+        for windows in [{'word_window': -1}, {'word_window': 0}, {'word_window': '3'}, {'word_window': None},
+                        {'sentence_window': -1}, {'sentence_window': 1.5}]:
+            response = self.client.post('/api/add_analysis_job', {
+                'analysis_type': AnalysisJob.PROXIMITY, 'corpus_id': self.job.corpus_id, **windows
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 422, windows)
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+
+    def test_invalid_pruning(self):
+        for pruning in [{'top_k': -1}, {'top_k': 0}, {'top_k': '5'}, {'min_count': -2}, {'min_count': None}, {'min_count': True},
+                        {'pos_filter': 'NN'}, {'pos_filter': ['NN', 1]}]:
+            response = self.client.post('/api/add_analysis_job', {
+                'analysis_type': AnalysisJob.PROXIMITY, 'corpus_id': self.job.corpus_id, 'word_window': 2, **pruning
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 422, pruning)
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+
+
+class ConditionalGetTestCase(TestCase):
+    """
+    Test cases for answering conditional GET requests from revision counters
+    """
+
+    def setUp(self):
+        Document.objects.create(title='doc1', text='The quick brown fox jumped over the lazy dog.')
+        Corpus.objects.create(title='corpus1')
+
+    def tearDown(self):
+        # Rolling back the changes to the genders does not send signals, so their cached values are dropped
+        cache.clear()
+
+    def assert_not_modified(self, url, etag, expected=True):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304 if expected else 200)
+        return response
+
+    def test_document_etag(self):
+        doc = Document.objects.get(title='doc1')
+        response = self.client.get(f'/api/document/{doc.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        self.assert_not_modified(f'/api/document/{doc.pk}', etag)
+
+        doc.update_metadata({'author': 'Anonymous'})
+        response = self.assert_not_modified(f'/api/document/{doc.pk}', etag, expected=False)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag(self):
+        etag = self.client.get('/api/all_documents')['ETag']
+        self.assert_not_modified('/api/all_documents', etag)
+        Document.objects.create(title='doc2', text='She really likes to eat chocolate!')
+        self.assert_not_modified('/api/all_documents', etag, expected=False)
+
+    def test_corpus_etag(self):
+        corpus = Corpus.objects.get(title='corpus1')
+        etag = self.client.get(f'/api/corpus/{corpus.pk}')['ETag']
+        corpus.documents.add(Document.objects.get(title='doc1'))
+        self.assert_not_modified(f'/api/corpus/{corpus.pk}', etag, expected=False)
+
+    def test_gender_etag(self):
+        etag = self.client.get('/api/gender/1')['ETag']
+        self.assert_not_modified('/api/gender/1', etag)
+        Gender.objects.get(pk=1).pronoun_series.add(PronounSeries.objects.create(
+            identifier='Xe', subj='xe', obj='xem', pos_det='xyr', pos_pro='xyrs', reflex='xemself'
+        ))
+        self.assert_not_modified('/api/gender/1', etag, expected=False)
+
+    def test_missing_row(self):
+        self.assertEqual(self.client.get('/api/document/999').status_code, 404)
+
+
+class CachingTestCase(TestCase):
+    """
+    Test cases for the versioned cache of API responses and analysis inputs
+    """
+
+    def setUp(self):
+        cache.clear()
+        caching.reset_stats()
+        Document.objects.create(title='doc1', text='The quick brown fox jumped over the lazy dog.')
+        Corpus.objects.create(title='corpus1')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_response(self):
+        doc = Document.objects.get(title='doc1')
+        self.assertEqual(self.client.get(f'/api/document/{doc.pk}').data['title'], 'doc1')
+        self.assertEqual(self.client.get(f'/api/document/{doc.pk}').data['title'], 'doc1')
+        self.assertEqual(caching.get_stats()['namespaces']['document'], {'hits': 1, 'misses': 1})
+
+        doc.update_metadata({'title': 'renamed'})
+        self.assertEqual(self.client.get(f'/api/document/{doc.pk}').data['title'], 'renamed')
+        self.assertEqual(self.client.get('/api/cache_stats').data['hit_rate'], 1 / 3)
+
+    def test_cached_analysis_inputs(self):
+        corpus = Corpus.objects.get(title='corpus1')
+        doc = Document.objects.get(title='doc1')
+        self.assertEqual(get_document_ids(corpus.pk), [])
+        corpus.documents.add(doc)
+        self.assertEqual(get_document_ids(corpus.pk), [doc.pk])
+        self.assertEqual(self.client.get(f'/api/corpus/{corpus.pk}').data['documents'], [doc.pk])
+        doc.delete()
+        self.assertEqual(get_document_ids(corpus.pk), [])
+        self.assertEqual(self.client.get(f'/api/corpus/{corpus.pk}').data['documents'], [])
+
+        female = Gender.objects.get(pk=2)
+        self.assertEqual(get_gender_pronoun_sets([female])[2]['pos_pro'], {'hers'})
+        female.pronoun_series.add(PronounSeries.objects.create(
+            identifier='Xe', subj='xe', obj='xem', pos_det='xyr', pos_pro='xyrs', reflex='xemself'
+        ))
+        self.assertEqual(get_gender_pronoun_sets([female])[2]['pos_pro'], {'hers', 'xyrs'})
+
+    def test_artifact_saves(self):
+        doc = Document.objects.get(title='doc1')
+        version = caching.get_model_version(Document)
+        doc.tokenized_text = ['the', 'quick', 'brown', 'fox']
+        doc.tokens_status = Document.ARTIFACT_COMPLETE
+        doc.save(update_fields=['tokenized_text', 'tokens_status'])
+        self.assertEqual(caching.get_model_version(Document), version)
+        doc.ensure_artifacts('bigrams')
+        self.assertEqual(Document.objects.get(pk=doc.pk).bigrams_status, Document.ARTIFACT_COMPLETE)
+        self.assertEqual(caching.get_model_version(Document), version)
+
+        doc.word_count = 0
+        doc.save(update_fields=['word_count'])
+        self.assertGreater(caching.get_model_version(Document), version)
+
+
+class FastSerializationTestCase(TestCase):
+    """
+    Test cases checking that the fast serialization path of the list endpoints matches the serializers
+    """
+
+    def setUp(self):
+        doc1 = Document.objects.create(title='doc1', author='Anonymous', year=1850, word_count=9)
+        doc2 = Document.objects.create(title='doc2')
+        Corpus.objects.create(title='corpus1').documents.add(doc2, doc1)
+        Corpus.objects.create(title='corpus2')
+
+    def test_fast_serialization(self):
+        self.assertEqual(
+            serialize_simple_document_rows(Document.objects.all()),
+            SimpleDocumentSerializer(Document.objects.all(), many=True).data
+        )
+        self.assertEqual(
+            serialize_corpus_rows(Corpus.objects.all()),
+            CorpusSerializer(Corpus.objects.all(), many=True).data
+        )
+        self.assertEqual(
+            serialize_gender_rows(Gender.objects.all()),
+            GenderSerializer(Gender.objects.all(), many=True).data
+        )
+        self.assertEqual(
+            serialize_pronoun_series_rows(PronounSeries.objects.all()),
+            PronounSeriesSerializer(PronounSeries.objects.all(), many=True).data
+        )
+
+
+class PipelineTestCase(TestCase):
+    """
+    Test cases for the text processing pipeline
+    """
+
+    def test_normalize(self):
+        pipeline = Pipeline()
+        self.assertEqual(pipeline.normalize('This is a ‘very’ “smart” phrase'), 'This is a \'very\' "smart" phrase')
+
+    def test_token_stages(self):
+        tokens = iter(['She', ',', 'really', 'LIKES', '!'])
+        for stage in Pipeline().token_stages:
+            tokens = stage(tokens)
+        self.assertEqual(list(tokens), ['she', 'really', 'likes'])
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            Pipeline(['smart_quotes', 'not_a_stage'])
+        response = self.client.post('/api/add_corpus', {
+            'title': 'corpus', 'description': '', 'pipeline_stages': ['not_a_stage']
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+
+    def test_regex_tokenizer(self):
+        pipeline = Pipeline(tokenizer='regex')
+        text, tokens, counter = pipeline.run('“Don’t,” she said -- the well-known X-ray; he didn\'t.')
+        self.assertEqual(tokens, ["don't", 'she', 'said', 'the', 'well-known', 'x-ray', 'he', "didn't"])
+        self.assertEqual(counter['she'], 1)
+        self.assertEqual(repr(pipeline), f'<Pipeline (regex): {DEFAULT_STAGES}>')
+
+    def test_sentences(self):
+        pipeline = Pipeline(tokenizer='regex')
+        text = 'She smiled. "Hello!" he said, and left.\n\nA new paragraph . . . And the end'
+        tokens, sentence_offsets = pipeline.tokenize_sentences(text)
+        self.assertEqual(tokens, list(pipeline.tokenize(text)))
+        self.assertEqual(sentence_offsets, [0, 2, 3, 7, 10])
+
+        doc = Document.objects.create_document(title='sentences', text=text, pipeline=pipeline)
+        doc = Document.objects.get(pk=doc.pk)
+        self.assertEqual(doc.sentences_status, Document.ARTIFACT_COMPLETE)
+        self.assertEqual(doc.sentence_offsets, sentence_offsets)
+
+    def test_unknown_tokenizer(self):
+        with self.assertRaises(ValueError):
+            Pipeline(tokenizer='not_a_tokenizer')
+        response = self.client.post('/api/add_corpus', {
+            'title': 'corpus', 'description': '', 'tokenizer': 'not_a_tokenizer'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+
+    def test_corpus_tokenizer(self):
+        response = self.client.post('/api/add_corpus', {
+            'title': 'corpus', 'description': '', 'tokenizer': 'regex'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tokenizer'], 'regex')
+        corpus = Corpus.objects.get(pk=response.data['id'])
+        self.assertEqual(corpus.get_pipeline().tokenizer, 'regex')
+
+    def test_document_tokenizer(self):
+        attributes = {'title': 'doc', 'author': '', 'year': '', 'text': 'He said so.', 'newAttributes': []}
+        response = self.client.post(
+            '/api/add_document', {**attributes, 'tokenizer': 'regex'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        doc = Document.objects.get(pk=response.data['id'])
+        self.assertEqual(doc.tokenizer, 'regex')
+        self.assertEqual(doc.tokenized_text, ['he', 'said', 'so'])
+        response = self.client.post(
+            '/api/add_document', {**attributes, 'tokenizer': 'not_a_tokenizer'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_artifacts_record_tokenizer(self):
+        Document.objects.create(
+            title='nltk', text='He said so.', pipeline_stages=DEFAULT_STAGES, tokenizer='nltk',
+            tokenized_text=['he', 'said', 'so'], word_count=3,
+            word_count_counter={'he': 1, 'said': 1, 'so': 1},
+            tokens_status=Document.ARTIFACT_COMPLETE, counts_status=Document.ARTIFACT_COMPLETE
+        )
+        doc = Document(title='regex', text='He said so.', pipeline_stages=DEFAULT_STAGES, tokenizer='regex')
+        self.assertFalse(doc._copy_duplicate_artifacts())
+        doc.tokenizer = 'nltk'
+        self.assertTrue(doc._copy_duplicate_artifacts())
+
+    def test_count_divergence(self):
+        self.assertEqual(count_divergence(Counter(a=2, b=2), Counter(a=1, b=1)), (0, 1.0))
+        distance, jaccard = count_divergence(Counter(a=1, b=1), Counter(a=1, c=1))
+        self.assertAlmostEqual(distance, 0.5)
+        self.assertAlmostEqual(jaccard, 1 / 3)
+
+
+class ParallelTaggingTestCase(TestCase):
+    """
+    Test cases for tagging long token lists in chunks
+    """
+
+    def setUp(self):
+        # A small hand-made model, so that the tests do not need NLTK's pickled tagger
+        self.tagger = PerceptronTagger(load=False)
+        self.tagger.tagdict = {'the': 'DT', 'a': 'DT', 'and': 'CC'}
+        self.tagger.model.classes = {'NN', 'VB', 'JJ'}
+        self.tagger.model.weights = {
+            'bias': {'NN': 0.1},
+            'i-1 tag DT': {'NN': 2.0},
+            'i-1 tag NN': {'VB': 1.5},
+            'i-1 tag VB': {'JJ': 1.2},
+            'i-2 tag DT': {'JJ': 1.0},
+            'i tag+i-2 tag JJ NN': {'VB': 4.0},
+            'i+1 word dog': {'JJ': 3.0},
+            'i+2 word ran': {'VB': 2.5},
+        }
+        words = ['the', 'and', 'a', 'dog', 'ran', 'cat', 'big', 'slowly', '1999', 'sat']
+        generator = random.Random(0)
+        self.tokens = [generator.choice(words) for _ in range(2000)]
+
+    def test_chunk_starts(self):
+        starts = find_chunk_starts(self.tokens, self.tagger.tagdict, 100)
+        self.assertEqual(starts[0], 0)
+        self.assertGreater(len(starts), 10)
+        for start in starts[1:]:
+            self.assertIn(self.tokens[start - 1], self.tagger.tagdict)
+            self.assertIn(self.tokens[start - 2], self.tagger.tagdict)
+
+    def test_identical_to_serial(self):
+        serial = self.tagger.tag(self.tokens)
+        for chunk_size in [1, 7, 100, 5000]:
+            self.assertEqual(pos_tag(self.tokens, n_jobs=1, chunk_size=chunk_size, tagger=self.tagger), serial)
+        self.assertEqual(pos_tag(self.tokens, n_jobs=2, chunk_size=250, tagger=self.tagger), serial)
+
+
+class ImportTestCase(TestCase):
+    """
+    Test cases for importing directories of text files
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.texts = {
+            'a.txt': 'She really likes to eat chocolate!',
+            'b.txt': 'He lit his cigarette.',
+            'c.txt': 'They refuse to permit us to obtain the refuse permit.',
+            'd.txt': 'Do you like ice cream as much as I do?',
+            'e.txt': 'She really likes to eat chocolate!',
+        }
+        for filename, text in self.texts.items():
+            with open(os.path.join(self.directory.name, filename), 'w', encoding='utf-8') as text_file:
+                text_file.write(text)
+
+        self.manifest = os.path.join(self.directory.name, 'manifest.csv')
+        with open(self.manifest, 'w', encoding='utf-8') as manifest_file:
+            manifest_file.write('filename,author,year,title,genre\n')
+            for i, filename in enumerate(sorted(self.texts)):
+                manifest_file.write(f'{filename},Author {i},{1850 + i},Title {i},novel\n')
+
+    def test_parse_metadata(self):
+        self.assertEqual(importer.parse_metadata({'author': ' Eliot ', 'year': 'c. 1871', 'genre': 'novel'}), {
+            'author': 'Eliot',
+            'title': '',
+            'year': None,
+            'new_attributes': {'year': 'c. 1871', 'genre': 'novel'},
+        })
+
+    def test_import_with_manifest(self):
+        run = ImportRun.objects.create(
+            source_dir=self.directory.name, manifest=self.manifest, tokenizer='regex', batch_size=2
+        )
+        positions = []
+        importer.run_import(run, progress=lambda run: positions.append(run.position))
+        self.assertEqual(positions, [2, 4, 5])
+        self.assertEqual(run.status, ImportRun.COMPLETE)
+
+        doc = run.documents.get(title='Title 2')
+        self.assertEqual(doc.author, 'Author 2')
+        self.assertEqual(doc.year, 1852)
+        self.assertEqual(doc.new_attributes, {'genre': 'novel'})
+        self.assertEqual(doc.tokenizer, 'regex')
+        self.assertEqual(doc.word_count, 10)
+
+    def test_resume(self):
+        os.rename(os.path.join(self.directory.name, 'd.txt'), os.path.join(self.directory.name, 'd.bak'))
+        run = ImportRun.objects.create(
+            source_dir=self.directory.name, manifest=self.manifest, tokenizer='regex', batch_size=2
+        )
+        with self.assertRaises(FileNotFoundError):
+            importer.run_import(run)
+        run.refresh_from_db()
+        self.assertEqual(run.status, ImportRun.FAILED)
+        # The batch holding the missing file was rolled back along with its checkpoint
+        self.assertEqual(run.position, 2)
+        self.assertEqual(run.documents.count(), 2)
+
+        os.rename(os.path.join(self.directory.name, 'd.bak'), os.path.join(self.directory.name, 'd.txt'))
+        importer.run_import(run)
+        self.assertEqual(run.status, ImportRun.COMPLETE)
+        self.assertEqual(
+            sorted(run.documents.values_list('title', flat=True)), [f'Title {i}' for i in range(5)]
+        )
+
+    def test_attach_to_corpus(self):
+        run = ImportRun.objects.create(source_dir=self.directory.name, tokenizer='regex')
+        importer.run_import(run)
+        self.assertEqual(sorted(run.documents.values_list('title', flat=True)), ['a', 'b', 'c', 'd', 'e'])
+
+        corpus = importer.attach_to_corpus(run, 'imported')
+        self.assertEqual(corpus.tokenizer, 'regex')
+        self.assertEqual(ImportRun.objects.get(pk=run.pk).corpus, corpus)
+        self.assertEqual(set(corpus.documents.all()), set(run.documents.all()))
+        self.assertEqual(
+            Corpus.objects.get(pk=corpus.pk).fingerprint,
+            Corpus.combine_fingerprint('0' * 64, run.documents.values_list('content_hash', flat=True))
+        )
+
+
+class DocumentMetadataTestCase(TestCase):
+    """
+    Test cases for the indexed metadata of documents
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.middlemarch = Document.objects.create(
+            title='Middlemarch', author='George Eliot', year=1871,
+            new_attributes={'author_gender': 'female', 'genre': 'novel', 'volumes': 4}
+        )
+        self.dracula = Document.objects.create(
+            title='Dracula', author='Bram Stoker', year=1897,
+            new_attributes={'author_gender': 'male', 'genre': 'novel', 'volumes': 1}
+        )
+        self.essays = Document.objects.create(
+            title='Essays', author='George Eliot', year=1884,
+            new_attributes={'author_gender': 'female', 'genre': 'essays'}
+        )
+
+    def test_sync(self):
+        self.assertEqual(
+            sorted(self.middlemarch.metadata.values_list('key', 'value_text', 'value_number')),
+            [('author_gender', 'female', None), ('genre', 'novel', None), ('volumes', '4', 4.0)]
+        )
+        self.middlemarch.update_metadata({'volumes': 8, 'publisher': 'Blackwood'})
+        self.assertEqual(self.middlemarch.metadata.get(key='volumes').value_number, 8.0)
+        self.assertEqual(self.middlemarch.metadata.get(key='publisher').value_text, 'Blackwood')
+
+        del self.middlemarch.new_attributes['genre']
+        self.middlemarch.save()
+        self.assertFalse(self.middlemarch.metadata.filter(key='genre').exists())
+
+        self.middlemarch.delete()
+        self.assertFalse(DocumentMetadata.objects.filter(key='publisher').exists())
+
+    def test_filter_by_metadata(self):
+        def titles(criteria):
+            return sorted(Document.objects.filter_by_metadata(criteria).values_list('title', flat=True))
+
+        self.assertEqual(titles({'genre': 'novel', 'year__gte': 1850, 'year__lte': 1900}), ['Dracula', 'Middlemarch'])
+        self.assertEqual(titles({'author_gender': 'female', 'genre': 'novel'}), ['Middlemarch'])
+        self.assertEqual(titles({'author': 'George Eliot'}), ['Essays', 'Middlemarch'])
+        self.assertEqual(titles({'volumes__gt': 2}), ['Middlemarch'])
+        self.assertEqual(titles({'genre__in': ['essays', 'poetry']}), ['Essays'])
+        self.assertEqual(titles({'title__startswith': 'Dr'}), ['Dracula'])
+        self.assertEqual(titles({'genre__startswith': 'nov'}), ['Dracula', 'Middlemarch'])
+        self.assertEqual(titles({'title__startswith': ''}), titles({}))
+        # A prefix is looked up as a range of values, which the indexes resolve, rather than with LIKE
+        query = str(Document.objects.filter_by_metadata({'title__startswith': 'Dr', 'genre__startswith': 'n'}).query)
+        self.assertNotIn('LIKE', query)
+        with self.assertRaises(ValueError):
+            titles({'genre__contains': 'nov'})
+        # The values are not coerced into the type of the field
+        for criteria in [{'year__startswith': '18'}, {'year': '1871'}, {'year__in': 1871}, {'title': None},
+                         {'author__startswith': 18}, {'genre__startswith': None}, {'volumes__startswith': 4},
+                         {'genre': None}, {'genre__in': ['novel', None]}, {'genre': {'name': 'novel'}}]:
+            with self.assertRaises(ValueError, msg=criteria):
+                titles(criteria)
+
+    def test_filter_documents_endpoint(self):
+        response = self.client.post('/api/filter_documents', {
+            'criteria': {'author_gender': 'female', 'year__lt': 1880}
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'documents': [self.middlemarch.pk]})
+
+        # Cached results follow changes of the metadata
+        self.essays.update_metadata({'year': 1859})
+        response = self.client.post('/api/filter_documents', {
+            'criteria': {'author_gender': 'female', 'year__lt': 1880}
+        }, content_type='application/json')
+        self.assertEqual(response.data, {'documents': [self.middlemarch.pk, self.essays.pk]})
+
+        response = self.client.post('/api/filter_documents', {
+            'criteria': {'year__startswith': '18'}
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+
+        response = self.client.post('/api/filter_documents', {
+            'criteria': {'year__regex': '18'}
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+
+
+class DynamicCorpusTestCase(TestCase):
+    """
+    Test cases for corpora defined by a metadata query
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.middlemarch = Document.objects.create(
+            title='Middlemarch', year=1871, text='Middlemarch', new_attributes={'genre': 'novel'}
+        )
+        self.ulysses = Document.objects.create(
+            title='Ulysses', year=1922, text='Ulysses', new_attributes={'genre': 'novel'}
+        )
+        self.corpus = Corpus.objects.create(title='Victorian novels', query={'year__lt': 1900, 'genre': 'novel'})
+
+    def test_membership(self):
+        self.assertTrue(self.corpus.is_dynamic)
+        self.assertEqual(self.corpus.document_ids(), [self.middlemarch.pk])
+        self.assertEqual(get_document_ids(self.corpus.pk), [self.middlemarch.pk])
+
+        dracula = Document.objects.create(
+            title='Dracula', year=1897, text='Dracula', new_attributes={'genre': 'novel'}
+        )
+        self.assertEqual(self.corpus.document_ids(), [self.middlemarch.pk, dracula.pk])
+        self.assertEqual(len(self.corpus), 2)
+        self.assertEqual(list(self.corpus), [self.middlemarch, dracula])
+        self.assertFalse(self.corpus.documents.exists())
+
+        dracula.update_metadata({'genre': 'horror'})
+        self.assertEqual(self.corpus.document_ids(), [self.middlemarch.pk])
+
+    def test_fingerprint(self):
+        static = Corpus.objects.create(title='static')
+        static.documents.add(self.middlemarch)
+        self.assertEqual(self.corpus.get_fingerprint(), Corpus.objects.get(pk=static.pk).fingerprint)
+        self.assertEqual(self.corpus, Corpus.objects.get(pk=static.pk))
+
+    def test_serialization(self):
+        data = CorpusSerializer(self.corpus).data
+        self.assertEqual(data['documents'], [self.middlemarch.pk])
+        self.assertEqual(data['query'], {'year__lt': 1900, 'genre': 'novel'})
+        self.assertEqual(serialize_corpus_rows(Corpus.objects.filter(pk=self.corpus.pk)), [data])
+
+    def test_endpoints(self):
+        response = self.client.post('/api/add_corpus', {
+            'title': 'novels', 'description': '', 'query': {'genre': 'novel'}
+        }, content_type='application/json')
+        self.assertEqual(response.data['documents'], [self.middlemarch.pk, self.ulysses.pk])
+        response = self.client.post('/api/add_corpus', {
+            'title': 'novels', 'description': '', 'query': {'genre__regex': 'nov'}
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+        response = self.client.post('/api/update_corpus_docs', {
+            'id': self.corpus.pk, 'documents': [self.ulysses.pk]
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+
+        etag = self.client.get(f'/api/corpus/{self.corpus.pk}')['ETag']
+        Document.objects.create(title='Emma', year=1815, text='Emma', new_attributes={'genre': 'novel'})
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['documents']), 2)
+
+
+class TimeSeriesTestCase(TestCase):
+    """
+    Test cases for the pronoun counts of a corpus over time
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.corpus = Corpus.objects.create(title='corpus')
+        for title, year, counter in [
+            ('a', 1851, {'he': 2, 'she': 1, 'the': 7}),
+            ('b', 1858, {'she': 3, 'her': 1, 'a': 6}),
+            ('c', 1872, {'him': 1, 'they': 4, 'and': 5}),
+            ('d', None, {'he': 9, 'dog': 1}),
+        ]:
+            doc = Document.objects.create(
+                title=title, year=year, text=title, word_count=sum(counter.values()), word_count_counter=counter,
+                tokens_status=Document.ARTIFACT_COMPLETE, counts_status=Document.ARTIFACT_COMPLETE
+            )
+            self.corpus.documents.add(doc)
+        self.male = Gender.objects.get(label='Male')
+        self.female = Gender.objects.get(label='Female')
+
+    def test_decades(self):
+        result = timeseries.run_analysis(self.corpus.pk, [self.male.pk, self.female.pk], 'decade')
+        self.assertEqual(result['buckets'], [1850, 1870])
+        self.assertEqual(result['documents'], [2, 1])
+        self.assertEqual(result['word_counts'], [20, 10])
+        self.assertEqual(result['genders'][self.male.pk]['counts'], [2, 1])
+        self.assertEqual(result['genders'][self.female.pk]['counts'], [5, 0])
+        self.assertEqual(result['genders'][self.female.pk]['frequencies'], [0.25, 0.0])
+        self.assertEqual(result['genders'][self.female.pk]['pronouns']['she'], [4, 0])
+        self.assertEqual(Document.objects.get(title='a').pronoun_counts, {'he': 2, 'she': 1})
+
+        # Changing the pronoun series makes the pronoun counts pending again
+        PronounSeries.objects.create(identifier='A', subj='a', obj='a', pos_det='a', pos_pro='a', reflex='a')
+        self.assertEqual(Document.objects.get(title='b').pronouns_status, Document.ARTIFACT_PENDING)
+        self.female.pronoun_series.add(PronounSeries.objects.get(identifier='A'))
+        result = timeseries.run_analysis(self.corpus.pk, [self.female.pk], 'decade')
+        self.assertEqual(result['genders'][self.female.pk]['counts'], [11, 0])
+
+    def test_years(self):
+        result = timeseries.run_analysis(self.corpus.pk, [self.male.pk], 'year')
+        self.assertEqual(result['buckets'], [1851, 1858, 1872])
+        self.assertEqual(result['genders'][self.male.pk]['counts'], [2, 0, 1])
+
+        # The documents whose word counts are pending are counted from their tokens, without saving anything
+        Document.objects.filter(title='c').update(
+            counts_status=Document.ARTIFACT_PENDING, word_count_counter=None,
+            tokenized_text=['him'] + ['they'] * 4 + ['and'] * 5,
+        )
+        Document.objects.filter(title='a').update(
+            tokens_status=Document.ARTIFACT_PENDING, counts_status=Document.ARTIFACT_PENDING, tokenizer='regex',
+            text='He said he and she.'
+        )
+        result = timeseries.run_analysis(self.corpus.pk, [self.male.pk], 'year')
+        self.assertEqual(result['buckets'], [1851, 1858, 1872])
+        self.assertEqual(result['word_counts'], [5, 10, 10])
+        self.assertEqual(result['genders'][self.male.pk]['counts'], [2, 0, 1])
+        self.assertEqual(Document.objects.get(title='c').counts_status, Document.ARTIFACT_PENDING)
+        with self.assertRaises(ValueError):
+            timeseries.run_analysis(self.corpus.pk, [self.male.pk], 'week')
+
+    def test_endpoint(self):
+        response = self.client.get(
+            f'/api/corpus/{self.corpus.pk}/time_series', {'bucket': 'century', 'genders': f'{self.female.pk}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['buckets'], [1800])
+        self.assertEqual(response.data['genders'][self.female.pk]['counts'], [5])
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/time_series', {'bucket': 'week'})
+        self.assertEqual(response.status_code, 422)
+
+
+class CooccurrenceMatrixTestCase(TestCase):
+    """
+    Test cases for the persisted co-occurrence matrices of corpora
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.corpus = Corpus.objects.create(title='corpus')
+        self.texts = {
+            'a': 'She told him that her dog liked him and she laughed',
+            'b': 'He gave her his book because she asked him',
+            'c': 'They said that she was right about herself',
+        }
+        for title in 'ab':
+            self.corpus.documents.add(self.create_document(title))
+        self.female = Gender.objects.get(label='Female')
+
+    def create_document(self, title):
+        tokens = self.texts[title].split()
+        return Document.objects.create(
+            title=title,
+            text=self.texts[title],
+            tokenized_text=tokens,
+            word_count=len(tokens),
+            part_of_speech_tags=[[token, 'NN' if len(token) > 3 else 'XX'] for token in tokens],
+            tokens_status=Document.ARTIFACT_COMPLETE,
+            tags_status=Document.ARTIFACT_COMPLETE,
+        )
+
+    def assert_matches_proximity(self, matrix, titles):
+        genders = set(Gender.objects.all())
+        pronoun_sets = get_gender_pronoun_sets(genders)
+        for gender in genders:
+            for pronoun_type in PronounSeries.PRONOUN_TYPES:
+                expected = {}
+                for title in titles:
+                    pos_tags = Document.objects.get(title=title).part_of_speech_tags
+                    counts = proximity.generate_token_counter(
+                        pos_tags, pronoun_sets[gender.pk][pronoun_type], matrix.word_window
+                    )
+                    for tag, counter in counts.items():
+                        expected.setdefault(tag, Counter()).update(counter)
+                self.assertEqual(matrix.get_counts(gender.pk, pronoun_type), expected)
+
+    def test_count_cooccurrences(self):
+        pos_tags = Document.objects.get(title='a').part_of_speech_tags
+        row_pronouns = [['she'], ['him', 'her']]
+        counts = cooccurrence.count_cooccurrences(pos_tags, row_pronouns, [1, 3])
+        for word_window in [1, 3]:
+            for row, pronouns in enumerate(row_pronouns):
+                expected = proximity.generate_token_counter(pos_tags, set(pronouns), word_window)
+                self.assertEqual(
+                    Counter({(row, (word, tag)): count for tag, counter in expected.items()
+                             for word, count in counter.items()}),
+                    Counter({cell: count for cell, count in counts[word_window].items() if cell[0] == row})
+                )
+
+    def test_incremental_update(self):
+        matrices = cooccurrence.update_matrices(self.corpus.pk, [1, 4])
+        self.assertEqual(CooccurrenceMatrix.objects.filter(corpus=self.corpus).count(), 2)
+        for matrix in matrices.values():
+            self.assertEqual(matrix.document_ids, sorted(self.corpus.documents.values_list('pk', flat=True)))
+            self.assert_matches_proximity(CooccurrenceMatrix.objects.get(pk=matrix.pk), 'ab')
+
+        # Only the added document is counted
+        self.corpus.documents.add(self.create_document('c'))
+        tracker = ProgressTracker()
+        matrix = cooccurrence.update_matrices(self.corpus.pk, [4], progress=tracker)[4]
+        self.assertEqual(tracker.documents_total, 1)
+        self.assert_matches_proximity(CooccurrenceMatrix.objects.get(pk=matrix.pk), 'abc')
+        cooccurrence.update_matrices(self.corpus.pk, [4], progress=tracker)
+        self.assertEqual(tracker.documents_total, 0)
+
+        # Removing a document or changing the pronouns counts the matrix again
+        self.corpus.documents.remove(Document.objects.get(title='a'))
+        with self.assertRaises(cooccurrence.StaleMatrix):
+            cooccurrence.get_matrix(self.corpus.pk, 4)
+        cooccurrence.update_matrices(self.corpus.pk, [4])
+        self.assert_matches_proximity(cooccurrence.get_matrix(self.corpus.pk, 4), 'bc')
+        self.female.pronoun_series.add(
+            PronounSeries.objects.create(identifier='They', subj='they', obj='them', pos_det='their',
+                                         pos_pro='theirs', reflex='themselves')
+        )
+        with self.assertRaises(cooccurrence.StaleMatrix):
+            cooccurrence.get_matrix(self.corpus.pk, 4)
+        cooccurrence.update_matrices(self.corpus.pk, [4])
+        self.assert_matches_proximity(cooccurrence.get_matrix(self.corpus.pk, 4), 'bc')
+
+    def test_changed_document(self):
+        cooccurrence.update_matrices(self.corpus.pk, [2])
+        doc = Document.objects.get(title='b')
+        doc.text = self.texts['b'] = 'She saw her sister and she smiled at her'
+        doc.part_of_speech_tags = [[token, 'NN' if len(token) > 3 else 'XX'] for token in doc.text.split()]
+        doc.save()
+
+        tracker = ProgressTracker()
+        matrix = cooccurrence.update_matrices(self.corpus.pk, [2], progress=tracker)[2]
+        self.assertEqual(tracker.documents_total, 2)
+        self.assertEqual(matrix.document_versions[str(doc.pk)][0], doc.content_hash)
+        self.assert_matches_proximity(CooccurrenceMatrix.objects.get(pk=matrix.pk), 'ab')
+        cooccurrence.update_matrices(self.corpus.pk, [2], progress=tracker)
+        self.assertEqual(tracker.documents_total, 0)
+
+    def test_slice(self):
+        cooccurrence.update_matrices(self.corpus.pk, [1])
+        response = self.client.get(
+            f'/api/corpus/{self.corpus.pk}/cooccurrence',
+            {'word_window': 1, 'genders': str(self.female.pk), 'pronoun_types': 'subj', 'pos': 'NN'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['documents'], 2)
+        self.assertEqual(
+            response.data['genders'],
+            {self.female.pk: {'subj': {'NN': Counter({'told': 1, 'laughed': 1, 'because': 1, 'asked': 1})}}}
+        )
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/cooccurrence', {'word_window': 0})
+        self.assertEqual(response.status_code, 422)
+
+    def test_read_only(self):
+        # The endpoints never build a matrix: they answer 422 for windows out of range, 404 for a matrix never
+        # built and 409 for a matrix out of date
+        url = f'/api/corpus/{self.corpus.pk}/cooccurrence'
+        self.assertEqual(self.client.get(url, {'word_window': 100000}).status_code, 422)
+        self.assertEqual(self.client.get(url, {'word_window': 2}).status_code, 404)
+        self.assertFalse(CooccurrenceMatrix.objects.exists())
+        with self.assertRaises(ValueError):
+            cooccurrence.update_matrices(self.corpus.pk, [cooccurrence.get_max_window() + 1])
+
+        cooccurrence.update_matrices(self.corpus.pk, [2])
+        self.assertEqual(self.client.get(url, {'word_window': 2}).status_code, 200)
+        self.corpus.documents.add(self.create_document('c'))
+        self.assertEqual(self.client.get(url, {'word_window': 2}).status_code, 409)
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/distinctive_words', {'word_window': 2})
+        self.assertEqual(response.status_code, 409)
+        cooccurrence.update_matrices(self.corpus.pk, [2])
+        self.assertEqual(self.client.get(url, {'word_window': 2}).data['documents'], 3)
+
+    def test_distinctive_words(self):
+        cooccurrence.update_matrices(self.corpus.pk, [1])
+        url = f'/api/corpus/{self.corpus.pk}/distinctive_words'
+        response = self.client.get(url, {'word_window': 1, 'metric': 'log_odds', 'k': 2, 'pos': 'NN'})
+        self.assertEqual(response.status_code, 200)
+        female_words = response.data['genders'][self.female.pk]
+        self.assertEqual(len(female_words), 2)
+        self.assertEqual(set(female_words[0]), {'word', 'score', 'count'})
+        self.assertGreaterEqual(female_words[0]['score'], female_words[1]['score'])
+        response = self.client.get(url, {'word_window': 1, 'metric': 'chi2'})
+        self.assertEqual(response.status_code, 422)
+
+
+class DistinctivenessTestCase(TestCase):
+    """
+    Test cases for the statistics of the words distinctive of each gender
+    """
+
+    def setUp(self):
+        self.gender_counts = {
+            'female': {'dress': 10, 'said': 20, 'sword': 1},
+            'male': {'dress': 1, 'said': 25, 'sword': 12, 'horse': 3},
+        }
+
+    def test_log_likelihood(self):
+        keys, vocabulary, table = distinctiveness.get_count_table(self.gender_counts)
+        self.assertEqual(keys, ['female', 'male'])
+        self.assertEqual(vocabulary, ['dress', 'horse', 'said', 'sword'])
+        scores = distinctiveness.log_likelihood(table)
+
+        # Dunning's G² for 'dress', computed cell by cell
+        a, b, c, d = 10, 1, 31 - 10, 41 - 1
+        total = a + b + c + d
+        expected = [(a + b) * (a + c) / total, (a + b) * (b + d) / total,
+                    (c + d) * (a + c) / total, (c + d) * (b + d) / total]
+        g2 = 2 * sum(o * math.log(o / e) for o, e in zip([a, b, c, d], expected))
+        self.assertAlmostEqual(scores[0, 0], g2)
+        self.assertAlmostEqual(scores[1, 0], -g2)
+        self.assertAlmostEqual(scores[0, 1], -scores[1, 1])
+
+    def test_log_odds_and_pmi(self):
+        _, _, table = distinctiveness.get_count_table(self.gender_counts)
+        log_odds = distinctiveness.log_odds(table)
+        self.assertGreater(log_odds[0, 0], 0)
+        self.assertLess(log_odds[0, 3], 0)
+        self.assertAlmostEqual(log_odds[0, 0], -log_odds[1, 0])
+
+        pmi = distinctiveness.pmi(table)
+        self.assertAlmostEqual(pmi[0, 0], math.log(10 * 72 / (31 * 11)))
+        self.assertEqual(pmi[0, 1], -math.inf)
+
+    def test_top_k(self):
+        result = distinctiveness.run_analysis(self.gender_counts, 'log_likelihood', k=2)
+        self.assertEqual([word for word, _, _ in result['female']], ['dress', 'said'])
+        self.assertEqual([word for word, _, _ in result['male']], ['sword', 'horse'])
+        self.assertEqual(result['female'][0][2], 10)
+        result = distinctiveness.run_analysis(self.gender_counts, 'pmi', k=10, min_count=5)
+        self.assertEqual([word for word, _, _ in result['female']], ['dress', 'said', 'sword'])
+        with self.assertRaises(ValueError):
+            distinctiveness.run_analysis(self.gender_counts, 'chi2')
+
+    def test_proximity_inputs(self):
+        results = {
+            1: {'female': {'subj': {'NN': {'dress': 4}, 'VBD': {'said': 20}}, 'obj': {'NN': {'dress': 6}}}},
+            2: {'female': {'subj': {'NN': {'sword': 1}}}, 'male': {'subj': {'NN': {'sword': 12}}}},
+        }
+        self.assertEqual(
+            distinctiveness.merge_proximity_results(results),
+            {'female': {'dress': 10, 'said': 20, 'sword': 1}, 'male': {'sword': 12}}
+        )
+        self.assertEqual(
+            distinctiveness.merge_proximity_results(results, pos_tags={'VBD'}), {'female': {'said': 20}, 'male': {}}
+        )
+
+        matrix = CooccurrenceMatrix(
+            rows=[[1, 'subj'], [1, 'obj'], [2, 'subj']],
+            columns=[['dress', 'NN'], ['said', 'VBD'], ['sword', 'NN']],
+            row_indices=[0, 0, 1, 2],
+            column_indices=[0, 1, 0, 2],
+            counts=[4, 20, 6, 12],
+        )
+        keys, vocabulary, table = distinctiveness.get_matrix_count_table(matrix)
+        self.assertEqual((keys, vocabulary), ([1, 2], ['dress', 'said', 'sword']))
+        self.assertEqual(table.tolist(), [[10, 20, 0], [0, 0, 12]])
+        keys, vocabulary, table = distinctiveness.get_matrix_count_table(matrix, pronoun_types={'subj'}, min_count=5)
+        self.assertEqual(vocabulary, ['said', 'sword'])
+        self.assertEqual(table.tolist(), [[20, 0], [0, 12]])
+
+
+class CoreferenceTestCase(TestCase):
+    """
+    Test cases for the storage of coreference clusters and pronoun attributions
+    """
+
+    def setUp(self):
+        self.text = 'Emma Woodhouse smiled . She knew that her father loved her . They laughed .'
+        self.doc = self.create_document('Emma')
+        # Emma Woodhouse <- She, her, her; her father; They (pronouns only)
+        self.clusters = [[(0, 2), (4, 5), (7, 8), (10, 11)], [(7, 9)], [(12, 13)]]
+
+    def create_document(self, title):
+        tokens = self.text.split()
+        return Document.objects.create(
+            title=title,
+            text=self.text,
+            tokenized_text=tokens,
+            word_count=len(tokens),
+            tokens_status=Document.ARTIFACT_COMPLETE,
+        )
+
+    def test_find_chunk_starts(self):
+        sentence_offsets = [0, 4, 12]
+        self.assertEqual(coreference.find_chunk_starts(sentence_offsets, 2), [0, 4, 12])
+        self.assertEqual(coreference.find_chunk_starts(sentence_offsets, 5), [0, 12])
+        self.assertEqual(coreference.find_chunk_starts(sentence_offsets, 100), [0])
+        self.assertEqual(coreference.find_chunk_starts([], 2), [0])
+
+        # The default stages drop the punctuation, so the chunks are cut at the sentences found while tokenizing
+        text = ' '.join(f'Sentence number {index} ends here, she said.' for index in range(300))
+        tokens, sentence_offsets = Pipeline(tokenizer='regex').tokenize_sentences(text)
+        self.assertNotIn('.', tokens)
+        starts = coreference.find_chunk_starts(sentence_offsets, 100)
+        self.assertGreater(len(starts), 10)
+        self.assertTrue(set(starts) <= set(sentence_offsets))
+        self.assertTrue(all(end - start >= 100 for start, end in zip(starts, starts[1:])))
+
+    def test_attribute_pronouns(self):
+        attributions = coreference.attribute_pronouns(self.text.split(), self.clusters, {'she', 'her', 'they'})
+        self.assertEqual(attributions, [
+            (4, 'she', 'emma woodhouse', 0),
+            (7, 'her', 'emma woodhouse', 0),
+            (10, 'her', 'emma woodhouse', 0),
+        ])
+
+    def test_save_clusters(self):
+        annotation = coreference.save_clusters(self.doc, self.clusters)
+        annotation = CoreferenceAnnotation.objects.get(pk=annotation.pk)
+        self.assertEqual(annotation.get_clusters(), self.clusters)
+        self.assertTrue(annotation.is_current(self.doc))
+        self.assertEqual(PronounAttribution.objects.filter(document=self.doc).count(), 3)
+        female = Gender.objects.get(label='Female')
+        self.assertEqual(coreference.count_entity_pronouns([self.doc.pk], female.pronouns), {'emma woodhouse': 3})
+
+        # Saving again replaces the clusters and the attributions
+        coreference.save_clusters(self.doc, self.clusters[1:])
+        self.assertEqual(CoreferenceAnnotation.objects.get(document=self.doc).get_clusters(), self.clusters[1:])
+        self.assertFalse(PronounAttribution.objects.filter(document=self.doc).exists())
+
+        coreference.save_clusters(self.doc, self.clusters, pronouns=['her'])
+        self.assertEqual(PronounAttribution.objects.filter(document=self.doc).count(), 2)
+        coreference.reattribute_pronouns(CoreferenceAnnotation.objects.all())
+        self.assertEqual(PronounAttribution.objects.filter(document=self.doc).count(), 3)
+
+        self.doc.text = 'Someone else entirely .'
+        self.doc.save()
+        self.assertFalse(CoreferenceAnnotation.objects.get(document=self.doc).is_current(self.doc))
+
+    def test_annotate_duplicates(self):
+        # Runs without neuralcoref: the clusters can only come from the stored annotation
+        coreference.save_clusters(self.doc, self.clusters)
+        self.assertEqual(coreference.annotate_documents([self.doc.pk], n_jobs=1), 0)
+
+        duplicate = self.create_document('Emma, second edition')
+        self.assertEqual(coreference.annotate_documents([self.doc.pk, duplicate.pk], n_jobs=1), 1)
+        self.assertEqual(CoreferenceAnnotation.objects.get(document=duplicate).get_clusters(), self.clusters)
+        self.assertEqual(PronounAttribution.objects.filter(document=duplicate).count(), 3)
+
+
+class SentenceProximityTestCase(TestCase):
+    """
+    Test cases for proximity windows scoped by sentences
+    """
+
+    def setUp(self):
+        # She went out . It rained . Her dog barked and she ran .
+        self.pos_tags = [
+            ['She', 'PRP'], ['went', 'VBD'], ['out', 'RP'],
+            ['It', 'PRP'], ['rained', 'VBD'],
+            ['Her', 'PRP$'], ['dog', 'NN'], ['barked', 'VBD'], ['and', 'CC'], ['she', 'PRP'], ['ran', 'VBD'],
+        ]
+        self.sentence_offsets = [0, 3, 5]
+
+    def test_same_sentence(self):
+        output = proximity.generate_sentence_token_counter(self.pos_tags, self.sentence_offsets, {'she'}, 0)
+        self.assertEqual(output, {
+            'VBD': Counter({'went': 1, 'barked': 1, 'ran': 1}),
+            'RP': Counter({'out': 1}),
+            'PRP$': Counter({'her': 1}),
+            'NN': Counter({'dog': 1}),
+            'CC': Counter({'and': 1}),
+        })
+
+    def test_sentence_window(self):
+        output = proximity.generate_sentence_token_counter(self.pos_tags, self.sentence_offsets, {'her'}, 1)
+        self.assertEqual(output['VBD'], Counter({'rained': 1, 'barked': 1, 'ran': 1}))
+        self.assertEqual(output['PRP'], Counter({'it': 1, 'she': 1}))
+        output = proximity.generate_sentence_token_counter(self.pos_tags, self.sentence_offsets, {'it'}, 5)
+        self.assertEqual(sum(sum(counter.values()) for counter in output.values()), len(self.pos_tags) - 1)
+
+    def test_analysis(self):
+        doc = Document.objects.create(
+            title='sentences',
+            text='She went out. It rained. Her dog barked and she ran.',
+            tokenized_text=[word.lower() for word, _ in self.pos_tags],
+            part_of_speech_tags=self.pos_tags,
+            sentence_offsets=self.sentence_offsets,
+            tokens_status=Document.ARTIFACT_COMPLETE,
+            tags_status=Document.ARTIFACT_COMPLETE,
+            sentences_status=Document.ARTIFACT_COMPLETE,
+        )
+        corpus = Corpus.objects.create(title='sentences')
+        corpus.documents.add(doc)
+        female = Gender.objects.get(label='Female')
+        results = proximity.run_analysis(corpus.pk, None, sentence_window=0)
+        self.assertEqual(
+            results[doc.pk][female]['subj'],
+            proximity.generate_sentence_token_counter(self.pos_tags, self.sentence_offsets, {'she'}, 0)
+        )
+
+
+class DialogueTestCase(TestCase):
+    """
+    Test cases for the quotations found at ingestion and the dialogue and narration analyses
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.text = '"He told me, and I believed him," she said. He nodded.\n\n"Her turn now," he said.'
+        self.doc = Document.objects.create_document(
+            title='dialogue', text=self.text, pipeline=Pipeline(tokenizer='regex')
+        )
+        self.corpus = Corpus.objects.create(title='dialogue')
+        self.corpus.documents.add(self.doc)
+        self.male = Gender.objects.get(label='Male')
+        self.female = Gender.objects.get(label='Female')
+
+    def test_quote_spans(self):
+        doc = Document.objects.get(pk=self.doc.pk)
+        self.assertEqual(doc.quotes_status, Document.ARTIFACT_COMPLETE)
+        # he told me and i believed him | she said he nodded | her turn now | he said
+        self.assertEqual(doc.quote_spans, [[0, 7], [11, 14]])
+
+        # Tokens dropped or rewritten by the pipeline are skipped, and an unclosed quote ends with its paragraph
+        text = '“Wait,” she said . . . "Come back!\n\nShe left. "'
+        tokens = ['``', 'wait', "''", 'she', 'said', 'come', 'back', 'she', 'left']
+        self.assertEqual(find_quote_spans(text, tokens), [[1, 2]])
+        self.assertEqual(find_quote_spans('No quotes here.', ['no', 'quotes', 'here']), [])
+        # 'İ' lowercases to two characters, which shifts the tokens after it in the lowercased text
+        text = 'İİİİİİ said "go home" and left'
+        self.assertEqual(find_quote_spans(text, text.lower().replace('"', '').split()), [[2, 4]])
+        # The tokens after a long run of dropped text are found again, and the tokens missing from the text
+        # are skipped without searching the rest of it
+        text = 'She said ' + '. ' * 3000 + '"go home" and left'
+        tokens = ['she', 'said', 'cannot', 'go', 'home', 'and', 'left']
+        self.assertEqual(find_quote_spans(text, tokens), [[3, 5]])
+
+    def test_quote_index(self):
+        quote_index = dialogue.QuoteIndex([[0, 7], [11, 14]])
+        regions = [quote_index.region(index) for index in [0, 6, 7, 10, 11, 13, 14]]
+        self.assertEqual(regions, ['dialogue', 'dialogue', 'narration', 'narration', 'dialogue', 'dialogue',
+                                   'narration'])
+        self.assertEqual(quote_index.word_counts(16), {'dialogue': 10, 'narration': 6})
+
+    def test_analysis(self):
+        results = dialogue.run_analysis(self.corpus.pk, [self.male.pk, self.female.pk])
+        result = results[self.doc.pk]
+        self.assertEqual(result['dialogue']['word_count'], 10)
+        self.assertEqual(result['dialogue']['count'][self.male.pk], Counter({'he': 1, 'him': 1, 'his': 0,
+                                                                             'himself': 0}))
+        self.assertEqual(result['narration']['count'][self.male.pk]['he'], 2)
+        self.assertEqual(result['dialogue']['count'][self.female.pk]['her'], 1)
+        self.assertEqual(result['narration']['count'][self.female.pk]['she'], 1)
+        self.assertEqual(result['narration']['frequency'][self.female.pk]['she'], 1 / 6)
+        self.assertNotIn('proximity', result['dialogue'])
+
+        tokens = Document.objects.get(pk=self.doc.pk).tokenized_text
+        Document.objects.filter(pk=self.doc.pk).update(
+            part_of_speech_tags=[[token, 'TAG'] for token in tokens], tags_status=Document.ARTIFACT_COMPLETE
+        )
+        result = dialogue.run_analysis(self.corpus.pk, [self.female.pk], word_window=1)[self.doc.pk]
+        self.assertEqual(result['narration']['proximity'][self.female.pk]['subj'],
+                         {'TAG': Counter({'him': 1, 'said': 1})})
+        # The window of a pronoun in dialogue may reach into the narration
+        self.assertEqual(
+            result['dialogue']['proximity'][self.female.pk]['obj'], {'TAG': Counter({'nodded': 1, 'turn': 1})}
+        )
+
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/dialogue', {'genders': str(self.female.pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[self.doc.pk]['narration']['count'][self.female.pk]['she'], 1)
+
+
+class BigramTestCase(TestCase):
+    """
+    Test cases for the bigram counts behind `words_associated`
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        pipeline = Pipeline(tokenizer='regex')
+        self.first = Document.objects.create_document(
+            title='first', text='She said his name. His cigarette went out. His his speech.', pipeline=pipeline
+        )
+        self.second = Document.objects.create_document(
+            title='second', text='His speech was long, and his audience left.', pipeline=pipeline
+        )
+        self.corpus = Corpus.objects.create(title='bigrams')
+        self.corpus.documents.add(self.first, self.second)
+
+    def test_count_bigrams(self):
+        self.assertEqual(Document.count_bigrams(['a', 'b', 'a', 'b', 'c']), {'a': {'b': 2}, 'b': {'a': 1, 'c': 1}})
+        self.assertEqual(Document.count_bigrams(['a']), {})
+        self.assertEqual(Document.count_bigrams([]), {})
+
+    def test_words_associated(self):
+        doc = Document.objects.get(pk=self.first.pk)
+        self.assertEqual(doc.bigrams_status, Document.ARTIFACT_COMPLETE)
+        self.assertEqual(doc.words_associated('HIS'), Counter({'name': 1, 'cigarette': 1, 'his': 1, 'speech': 1}))
+        self.assertEqual(doc.words_associated('absent'), Counter())
+
+        # The words following those of the bigram counts left pending (e.g. by a migration) are counted from the
+        # tokens, without saving anything
+        Document.objects.filter(pk=doc.pk).update(bigrams_status=Document.ARTIFACT_PENDING, bigram_counts=None)
+        doc = Document.objects.get(pk=doc.pk)
+        self.assertEqual(doc.words_associated('HIS'), Counter({'name': 1, 'cigarette': 1, 'his': 1, 'speech': 1}))
+        self.assertEqual(Document.objects.get(pk=doc.pk).bigrams_status, Document.ARTIFACT_PENDING)
+
+        call_command('count_bigrams', stdout=StringIO())
+        doc = Document.objects.get(pk=doc.pk)
+        self.assertEqual(doc.bigrams_status, Document.ARTIFACT_COMPLETE)
+        self.assertEqual(doc.bigram_counts['his'], {'name': 1, 'cigarette': 1, 'his': 1, 'speech': 1})
+
+    def test_corpus_words_associated(self):
+        Document.objects.filter(pk=self.second.pk).update(bigrams_status=Document.ARTIFACT_PENDING)
+        expected = {
+            'his': Counter({'speech': 2, 'name': 1, 'cigarette': 1, 'his': 1, 'audience': 1}),
+            'absent': Counter(),
+        }
+        self.assertEqual(self.corpus.words_associated(['His', 'absent']), expected)
+        self.assertEqual(Document.objects.get(pk=self.second.pk).bigrams_status, Document.ARTIFACT_PENDING)
+
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/words_associated', {'words': 'his,absent'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/words_associated')
+        self.assertEqual(response.status_code, 422)
+
+    def test_number_words_associated(self):
+        # An all-digit token is an object key of the bigram counts, not an array index
+        self.corpus.documents.add(Document.objects.create_document(
+            title='numbers', text='In 1984 he read 1 book, and in 1984 his diary.', pipeline=Pipeline(tokenizer='regex')
+        ))
+        self.assertEqual(
+            self.corpus.words_associated(['1984', '1', '0']),
+            {'1984': Counter({'he': 1, 'his': 1}), '1': Counter({'book': 1}), '0': Counter()}
+        )
+
+
+class MultiWindowProximityTestCase(TestCase):
+    """
+    Test cases for proximity counts of several word windows computed in one pass
+    """
+
+    def setUp(self):
+        words = ['she', 'her', 'he', 'him', 'his', 'the', 'dog', 'ran', 'and', 'saw']
+        tags = {'she': 'PRP', 'her': 'PRP$', 'he': 'PRP', 'him': 'PRP', 'his': 'PRP$', 'dog': 'NN', 'ran': 'VBD',
+                'saw': 'VBD'}
+        generator = random.Random(12)
+        self.pos_tags = [[word, tags.get(word, 'DT')] for word in generator.choices(words, k=300)]
+        self.pos_tags[0][0] = 'She'
+        self.word_windows = [0, 1, 2, 3, 5, 10]
+
+    def test_token_counter(self):
+        for pronoun_set in [{'she'}, {'her', 'hers'}, {'absent'}]:
+            results = proximity.generate_multi_window_token_counter(self.pos_tags, pronoun_set, self.word_windows)
+            self.assertEqual(sorted(results), self.word_windows)
+            for word_window in self.word_windows:
+                expected = proximity.generate_token_counter(self.pos_tags, pronoun_set, word_window)
+                self.assertEqual(results[word_window], expected)
+
+    def create_corpus(self):
+        doc = Document.objects.create(
+            title='windows',
+            text=' '.join(word for word, _ in self.pos_tags),
+            tokenized_text=[word.lower() for word, _ in self.pos_tags],
+            part_of_speech_tags=self.pos_tags,
+            tokens_status=Document.ARTIFACT_COMPLETE,
+            tags_status=Document.ARTIFACT_COMPLETE,
+        )
+        corpus = Corpus.objects.create(title='windows')
+        corpus.documents.add(doc)
+        return corpus
+
+    def test_analysis(self):
+        corpus = self.create_corpus()
+        results = proximity.run_multi_window_analysis(corpus.pk, [3, 1, 3])
+        self.assertEqual(sorted(results), [1, 3])
+        for word_window in [1, 3]:
+            self.assertEqual(results[word_window], proximity.run_analysis(corpus.pk, word_window))
+
+        pruning = {'top_k': 2, 'min_count': 2, 'pos_filter': ['NN', 'VBD']}
+        results = proximity.run_multi_window_analysis(corpus.pk, [1, 3], **pruning)
+        for word_window in [1, 3]:
+            self.assertEqual(results[word_window], proximity.run_analysis(corpus.pk, word_window, **pruning))
+
+    def test_job(self):
+        corpus = self.create_corpus()
+        url = '/api/add_analysis_job'
+        for word_windows in [[], [0, 2], '1,2', [1, '2']]:
+            response = self.client.post(url, {
+                'analysis_type': AnalysisJob.PROXIMITY, 'corpus_id': corpus.pk, 'word_windows': word_windows
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 422, word_windows)
+
+        job = AnalysisJob.objects.create(analysis_type=AnalysisJob.PROXIMITY, corpus=corpus, word_windows=[1, 3])
+        jobs.run_job(job.pk)
+        job = AnalysisJob.objects.get(pk=job.pk)
+        self.assertEqual(job.status, AnalysisJob.COMPLETE)
+        analyses = list(job.proximity_analyses.order_by('word_window'))
+        self.assertEqual([analysis.word_window for analysis in analyses], [1, 3])
+        for analysis in analyses:
+            expected = jobs._jsonable_results(proximity.run_analysis(corpus.pk, analysis.word_window))
+            self.assertEqual(analysis.results, json.loads(json.dumps(expected)))
+            self.assertTrue(analysis.rows.exists())
+
+    def test_get_multi_word_windows(self):
+        doc = Document(tokenized_text=[word.lower() for word, _ in self.pos_tags])
+        for search_terms in ['she', ['dog', 'saw']]:
+            windows = doc.get_multi_word_windows(search_terms, self.word_windows)
+            for window_size in self.word_windows:
+                self.assertEqual(windows[window_size], doc.get_word_windows(search_terms, window_size))
+
+
+class PronounDensityTestCase(TestCase):
+    """
+    Test cases for the pronoun density curves along the documents of a corpus
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.male = Gender.objects.get(label='Male')
+        self.female = Gender.objects.get(label='Female')
+        tokens = ['she', 'ran', 'her', 'dog', 'ran', 'and', 'he', 'saw', 'him', 'go']
+        self.doc = Document.objects.create(
+            title='density', text=' '.join(tokens), tokenized_text=tokens, tokens_status=Document.ARTIFACT_COMPLETE
+        )
+        self.empty = Document.objects.create(
+            title='empty', text='', tokenized_text=[], tokens_status=Document.ARTIFACT_COMPLETE
+        )
+        self.corpus = Corpus.objects.create(title='density')
+        self.corpus.documents.add(self.doc, self.empty)
+
+    def test_ranges(self):
+        starts, ends = density.get_ranges(10, 4)
+        self.assertEqual(starts.tolist(), [0, 2, 5, 7])
+        self.assertEqual(ends.tolist(), [2, 5, 7, 10])
+        starts, ends = density.get_ranges(10, 2, window=4)
+        self.assertEqual(starts.tolist(), [0, 5])
+        self.assertEqual(ends.tolist(), [4, 9])
+
+    def test_analysis(self):
+        results = density.run_analysis(self.corpus.pk, [self.male.pk, self.female.pk], bins=2)
+        self.assertEqual(results['documents'][self.doc.pk], {self.female.pk: [0.4, 0.0], self.male.pk: [0.0, 0.4]})
+        self.assertEqual(results['documents'][self.empty.pk], {self.female.pk: [0.0, 0.0], self.male.pk: [0.0, 0.0]})
+        # The empty document is left out of the average
+        self.assertEqual(results['corpus'], results['documents'][self.doc.pk])
+
+        results = density.run_analysis(self.corpus.pk, [self.female.pk], bins=10, window=2)
+        # The first window is clipped to the start of the document: [0, 1) then [0, 2), [1, 3), [2, 4)
+        self.assertEqual(results['documents'][self.doc.pk][self.female.pk][:4], [1.0, 0.5, 0.5, 0.5])
+
+        # The curves are the same as counting the pronouns of each bin directly
+        tokens = self.doc.tokenized_text * 37
+        Document.objects.filter(pk=self.doc.pk).update(tokenized_text=tokens)
+        results = density.run_analysis(self.corpus.pk, [self.female.pk], bins=7)
+        starts, ends = density.get_ranges(len(tokens), 7)
+        expected = [
+            sum(token in {'she', 'her', 'hers', 'herself'} for token in tokens[start:end]) / (end - start)
+            for start, end in zip(starts, ends)
+        ]
+        for density_value, expected_value in zip(results['documents'][self.doc.pk][self.female.pk], expected):
+            self.assertAlmostEqual(density_value, expected_value)
+
+    def test_api(self):
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/pronoun_density', {'bins': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['corpus'][str(self.female.pk)], [0.4, 0.0])
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/pronoun_density', {'bins': 0})
+        self.assertEqual(response.status_code, 422)
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/pronoun_density', {'bins': 10 ** 9})
+        self.assertEqual(response.status_code, 422)
+        response = self.client.get(f'/api/corpus/{self.corpus.pk}/pronoun_density', {'genders': 'female'})
+        self.assertEqual(response.status_code, 422)
+        with self.assertRaises(ValueError):
+            density.run_analysis(self.corpus.pk, [self.female.pk], bins=10, window=0)
+
+
+class ProximityPruningTestCase(TestCase):
+    """
+    Test cases for pruning the results of proximity analyses as they are built
+    """
+
+    def setUp(self):
+        # She saw a tall man and a tall , dark , quiet tree . She ran .
+        self.pos_tags = [
+            ['She', 'PRP'], ['saw', 'VBD'], ['a', 'DT'], ['tall', 'JJ'], ['man', 'NN'], ['and', 'CC'], ['a', 'DT'],
+            ['tall', 'JJ'], [',', ','], ['dark', 'JJ'], [',', ','], ['quieter', 'JJR'], ['tree', 'NN'], ['.', '.'],
+            ['She', 'PRP'], ['ran', 'VBD'], ['.', '.'],
+        ]
+
+    def test_prune_token_counter(self):
+        counter = Counter({'a': 3, 'b': 1, 'c': 3, 'd': 2, 'e': 1})
+        self.assertEqual(proximity.prune_token_counter(counter, 2), Counter({'a': 3, 'c': 3}))
+        self.assertEqual(proximity.prune_token_counter(counter, 3), Counter({'a': 3, 'c': 3, 'd': 2}))
+        self.assertEqual(proximity.prune_token_counter(counter, min_count=2), Counter({'a': 3, 'c': 3, 'd': 2}))
+        self.assertEqual(proximity.prune_token_counter(counter, 10, min_count=3), Counter({'a': 3, 'c': 3}))
+        self.assertEqual(proximity.prune_token_counter(counter), counter)
+
+    def test_pos_filter(self):
+        adjectives = ['JJ', 'JJR', 'JJS']
+        # Both pronouns are within 20 words of every adjective
+        output = proximity.generate_token_counter(self.pos_tags, {'she'}, 20, adjectives)
+        self.assertEqual(output, {'JJ': Counter({'tall': 4, 'dark': 2}), 'JJR': Counter({'quieter': 2})})
+        output = proximity.generate_sentence_token_counter(self.pos_tags, [0, 14], {'she'}, 0, adjectives)
+        self.assertEqual(output, {'JJ': Counter({'tall': 2, 'dark': 1}), 'JJR': Counter({'quieter': 1})})
+
+    def test_analysis(self):
+        doc = Document.objects.create(
+            title='pruning',
+            text=' '.join(word for word, _ in self.pos_tags),
+            tokenized_text=[word.lower() for word, _ in self.pos_tags],
+            part_of_speech_tags=self.pos_tags,
+            tokens_status=Document.ARTIFACT_COMPLETE,
+            tags_status=Document.ARTIFACT_COMPLETE,
+        )
+        corpus = Corpus.objects.create(title='pruning')
+        corpus.documents.add(doc)
+        female = Gender.objects.get(label='Female')
+
+        results = proximity.run_analysis(corpus.pk, 20, top_k=1, min_count=2, pos_filter=['JJ', 'NN', 'DT'])
+        # 'man' and 'tree' are tied, and the tie is broken alphabetically
+        self.assertEqual(
+            results[doc.pk][female]['subj'],
+            {'JJ': Counter({'tall': 4}), 'DT': Counter({'a': 4}), 'NN': Counter({'man': 2})}
+        )
+        self.assertEqual(results[doc.pk][female]['obj'], {})
+
+        job = AnalysisJob.objects.create(
+            analysis_type=AnalysisJob.PROXIMITY, corpus=corpus, word_window=20, top_k=1, pos_filter=['NN']
+        )
+        jobs.run_job(job.pk)
+        analysis = AnalysisJob.objects.get(pk=job.pk).proximity_analysis
+        self.assertEqual((analysis.top_k, analysis.min_count, analysis.pos_filter), (1, 1, ['NN']))
+        self.assertEqual(analysis.results[str(doc.pk)][str(female.pk)]['subj'], {'NN': {'man': 2}})
+
+
+class AnalysisResultRowsTestCase(TestCase):
+    """
+    Test cases for the rows of the results of analyses and their slicing endpoints
+    """
+
+    def setUp(self):
+        tokens = ['she', 'took', 'her', 'purse', 'and', 'handed', 'it', 'to', 'him']
+        tags = ['PRP', 'VBD', 'PRP$', 'NN', 'CC', 'VBD', 'PRP', 'TO', 'PRP']
+        self.corpus = Corpus.objects.create(title='rows')
+        self.docs = []
+        for title in ['doc1', 'doc2']:
+            doc = Document.objects.create(
+                title=title,
+                text=' '.join(tokens),
+                tokenized_text=tokens,
+                word_count=len(tokens),
+                word_count_counter=Counter(tokens),
+                part_of_speech_tags=[[token, tag] for token, tag in zip(tokens, tags)],
+                tokens_status=Document.ARTIFACT_COMPLETE,
+                counts_status=Document.ARTIFACT_COMPLETE,
+                tags_status=Document.ARTIFACT_COMPLETE,
+            )
+            self.corpus.documents.add(doc)
+            self.docs.append(doc)
+        self.female = Gender.objects.get(label='Female')
+
+    def run_job(self, analysis_type, **kwargs):
+        job = AnalysisJob.objects.create(analysis_type=analysis_type, corpus=self.corpus, **kwargs)
+        job.genders.set([self.female])
+        jobs.run_job(job.pk)
+        return AnalysisJob.objects.get(pk=job.pk)
+
+    def test_proximity_rows(self):
+        analysis = self.run_job(AnalysisJob.PROXIMITY, word_window=2).proximity_analysis
+        self.assertEqual(analysis.rows.count(), len(list(results.iter_proximity_rows(analysis.results))))
+        row = analysis.rows.get(document=self.docs[0], gender=self.female, pronoun_type='subj', word='took')
+        self.assertEqual((row.pos, row.count), ('VBD', 1))
+
+        url = f'/api/proximity_analysis/{analysis.pk}/rows'
+        response = self.client.get(url, {'document': self.docs[1].pk, 'gender': self.female.pk, 'pos': 'NN,VBD'})
+        self.assertEqual(response.status_code, 200)
+        expected = [
+            {'document': self.docs[1].pk, 'gender': self.female.pk, 'pronoun_type': pronoun_type, 'pos': pos,
+             'word': word, 'count': count}
+            for pronoun_type, tag_counts in sorted(analysis.results[str(self.docs[1].pk)][str(self.female.pk)].items())
+            for pos, word_counts in sorted(tag_counts.items()) if pos in ('NN', 'VBD')
+            for word, count in sorted(word_counts.items())
+        ]
+        self.assertEqual(response.json(), {'count': len(expected), 'rows': expected})
+        response = self.client.get(url, {'gender': self.female.pk, 'offset': 1, 'limit': 2})
+        self.assertEqual(len(response.json()['rows']), 2)
+        self.assertEqual(self.client.get(url, {'document': 'first'}).status_code, 422)
+        self.assertEqual(self.client.get(url, {'offset': -1}).status_code, 422)
+        self.assertEqual(self.client.get(url, {'limit': -5}).status_code, 422)
+
+        url = f'/api/proximity_analysis/{analysis.pk}/aggregate'
+        response = self.client.get(url, {'group_by': 'pos,word', 'pronoun_type': 'subj', 'limit': 2})
+        self.assertEqual(
+            response.json(), [{'pos': 'PRP$', 'word': 'her', 'total': 2}, {'pos': 'VBD', 'word': 'took', 'total': 2}]
+        )
+        self.assertEqual(self.client.get(url, {'group_by': 'results'}).status_code, 422)
+        self.assertEqual(self.client.get(url, {'limit': -1}).status_code, 422)
+        self.assertEqual(self.client.get('/api/proximity_analysis/0/rows').status_code, 404)
+
+    def test_frequency_rows(self):
+        analysis = self.run_job(AnalysisJob.FREQUENCY).frequency_analysis
+        self.assertEqual(analysis.rows.count(), 8)
+        row = analysis.rows.get(document=self.docs[0], pronoun='she')
+        self.assertEqual((row.count, row.frequency, row.relative), (1, 1 / 9, 0.5))
+
+        response = self.client.get(f'/api/frequency_analysis/{analysis.pk}/aggregate', {'pronoun': 'she,her'})
+        self.assertEqual(response.json(), [{'pronoun': 'her', 'total': 2}, {'pronoun': 'she', 'total': 2}])
+        response = self.client.get(f'/api/frequency_analysis/{analysis.pk}/rows', {'pronoun': 'hers'})
+        self.assertEqual(response.json()['count'], 2)
+
+        # The rows go with their analysis
+        analysis.delete()
+        self.assertFalse(FrequencyResult.objects.exists())
+
+
+class CompressedFieldTestCase(TestCase):
+    """
+    Test cases for the text and JSON columns stored compressed
+    """
+
+    def test_round_trip(self):
+        tokens = ['she', 'said', 'café'] * 1000
+        doc = Document.objects.create(
+            title='compressed',
+            text=' '.join(tokens),
+            tokenized_text=tokens,
+            part_of_speech_tags=[[token, 'NN'] for token in tokens],
+        )
+        doc = Document.objects.get(pk=doc.pk)
+        self.assertEqual(doc.text, ' '.join(tokens))
+        self.assertEqual(doc.tokenized_text, tokens)
+        pos_tags = Document.objects.values_list('part_of_speech_tags', flat=True).get(pk=doc.pk)
+        self.assertEqual(pos_tags[2], ['café', 'NN'])
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT text, tokenized_text FROM app_document WHERE id = %s', [doc.pk])
+            text, tokenized_text = cursor.fetchone()
+        self.assertLess(len(text), len(doc.text) / 10)
+        self.assertEqual(json.loads(zlib.decompress(tokenized_text)), tokens)
+
+        empty = Document.objects.create(title='empty', text='', tokenized_text=None)
+        self.assertIsNone(Document.objects.get(pk=empty.pk).tokenized_text)
+        self.assertEqual(Document.objects.filter(tokenized_text__isnull=True).get(), empty)
+
+    def test_lookups(self):
+        # Only null lookups can be made on the compressed bytes
+        Document.objects.create(title='lookups', text='She said.', tokenized_text=['she', 'said'])
+        self.assertEqual(Document.objects.filter(text__isnull=False).count(), 1)
+        for lookup in ['text__icontains', 'text__startswith', 'tokenized_text__0', 'tokenized_text__contains']:
+            with self.assertRaises(FieldError):
+                Document.objects.filter(**{lookup: 'she'}).count()
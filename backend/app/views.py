@@ -20,26 +20,110 @@ context = {
     'component_name': 'ExampleId'
 }
 """
+import hashlib
+import json
+import time
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
+from django.db.models import (
+    Count,
+    Max,
+    Sum,
+)
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import render
+from django.views.decorators.http import condition
 from .models import (
     Document,
     PronounSeries,
     Gender,
-    Corpus
+    Corpus,
+    AnalysisJob,
+    CooccurrenceMatrix,
+    FrequencyAnalysis,
+    FrequencyResult,
+    ProximityAnalysis,
+    ProximityResult,
 )
 from .serializers import (
     DocumentSerializer,
-    SimpleDocumentSerializer,
     GenderSerializer,
     PronounSeriesSerializer,
-    CorpusSerializer
+    CorpusSerializer,
+    AnalysisJobSerializer,
+    FrequencyAnalysisSerializer,
+    ProximityAnalysisSerializer,
+    serialize_simple_document_rows,
+    serialize_gender_rows,
+    serialize_pronoun_series_rows,
+    serialize_corpus_rows,
+    serialize_rows,
+)
+from .pipeline import (
+    DEFAULT_TOKENIZER,
+    Pipeline,
 )
+from .analysis import (
+    cooccurrence,
+    density,
+    dialogue,
+    distinctiveness,
+    jobs,
+    results,
+    timeseries,
+)
+from . import caching
+
+# Number of seconds between two polls of an analysis job by its progress event stream
+ANALYSIS_JOB_POLL_INTERVAL = 0.5
+# Number of seconds without any progress after which the stream gives up on a job, e.g. when its worker died
+ANALYSIS_JOB_STALL_TIMEOUT = 600
+# Number of seconds a progress event stream stays open, since it holds a server worker while it is; the client
+# then reconnects, after ANALYSIS_JOB_RECONNECT_DELAY milliseconds, and the stream resumes from its last event
+ANALYSIS_JOB_STREAM_DURATION = 30
+ANALYSIS_JOB_RECONNECT_DELAY = 1000
+
+
+def _conditional_get(get_queryset, related=(), extra=()):
+    """
+    Decorator that answers conditional GET requests (If-None-Match / If-Modified-Since) for an API view
+    with 304 Not Modified when the rows it serializes are unchanged. The ETag and Last-Modified headers are
+    derived from a single aggregate query over the `revision` and `modified` columns of those rows, so
+    answering a 304 never loads their heavy columns.
+
+    :param get_queryset: a function taking the view's URL keyword arguments and returning the QuerySet of
+                         rows that the view serializes
+    :param related: names of relations whose rows are serialized along with each row
+    :param extra: names of other columns that identify the contents of a row (e.g. a Corpus fingerprint)
+    """
+
+    def version_stamp(request, **kwargs):
+        if not hasattr(request, 'version_stamp'):
+            aggregates = {'count': Count('pk', distinct=True)}
+            for prefix in [''] + [f'{name}__' for name in related]:
+                aggregates[f'{prefix}revision'] = Sum(f'{prefix}revision')
+                aggregates[f'{prefix}modified'] = Max(f'{prefix}modified')
+            for name in extra:
+                aggregates[name] = Max(name)
+            request.version_stamp = get_queryset(**kwargs).aggregate(**aggregates)
+        return request.version_stamp
+
+    def etag(request, **kwargs):
+        stamp = version_stamp(request, **kwargs)
+        if not stamp['count']:
+            return None
+        return hashlib.md5(repr(sorted(stamp.items())).encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        stamp = version_stamp(request, **kwargs)
+        dates = [value for key, value in stamp.items() if key.endswith('modified') and value is not None]
+        return max(dates, default=None)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
 
 
 @api_view(['GET'])
@@ -104,7 +188,8 @@ def example_id(request, example_id):
 @api_view(['POST'])
 def add_document(request):
     """
-    API endpoint for adding a piece of document
+    API endpoint for adding a piece of document, processed with the pipeline of the corpus it is added to
+    (if any), and with the given `tokenizer` engine (if any)
     """
     attributes = request.data
     new_attributes = {}
@@ -124,30 +209,51 @@ def add_document(request):
         content = {'detail': f'Attribute {err} not found.'}
         return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-    new_text_obj = Document.objects.create_document(**fields)
+    # A document added to a corpus is processed with that corpus' pipeline
+    corpus_obj = None
+    pipeline = None
+    if attributes.get('corpus_id') is not None:
+        corpus_obj = get_object_or_404(Corpus, pk=attributes['corpus_id'])
+        pipeline = corpus_obj.get_pipeline()
+    if attributes.get('tokenizer'):
+        try:
+            pipeline = Pipeline(pipeline.stages if pipeline else None, attributes['tokenizer'])
+        except ValueError as err:
+            content = {'detail': str(err)}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    new_text_obj = Document.objects.create_document(pipeline=pipeline, **fields)
+    # A corpus defined by a query includes the document if it matches the query
+    if corpus_obj and not corpus_obj.is_dynamic:
+        corpus_obj.documents.add(new_text_obj)
     serializer = DocumentSerializer(new_text_obj)
     return Response(serializer.data)
 
 
 @api_view(['GET'])
+@_conditional_get(lambda: Document.objects.all())
 def all_documents(request):
     """
     API Endpoint to get all the documents
     """
-    doc_objs = Document.objects.all()
-    serializer = SimpleDocumentSerializer(doc_objs, many=True)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [Document], 'all_documents', 'all',
+        lambda: serialize_simple_document_rows(Document.objects.all())
+    )
+    return Response(data)
 
 
 @api_view(['GET'])
+@_conditional_get(lambda doc_id: Document.objects.filter(pk=doc_id))
 def get_document(request, doc_id):
     """
     API Endpoint to get a document based on the ID
     """
-    doc_obj = get_object_or_404(Document, pk=doc_id)
-
-    serializer = DocumentSerializer(doc_obj)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [Document], 'document', doc_id,
+        lambda: DocumentSerializer(get_object_or_404(Document, pk=doc_id)).data
+    )
+    return Response(data)
 
 
 def documents(request):
@@ -184,24 +290,29 @@ def single_document(request, doc_id):
 
 
 @api_view(['GET'])
+@_conditional_get(lambda: Gender.objects.all(), related=['pronoun_series'])
 def all_genders(request):
     """
     API Endpoint to get all gender instances.
     """
-    gender_objs = Gender.objects.all()
-    serializer = GenderSerializer(gender_objs, many=True)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [Gender], 'all_genders', 'all',
+        lambda: serialize_gender_rows(Gender.objects.all())
+    )
+    return Response(data)
 
 
 @api_view(['GET'])
+@_conditional_get(lambda gender_id: Gender.objects.filter(pk=gender_id), related=['pronoun_series'])
 def get_gender(request, gender_id):
     """
     API Endpoint to get a gender based on the ID
     """
-    gender_obj = get_object_or_404(Gender, pk=gender_id)
-
-    serializer = GenderSerializer(gender_obj)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [Gender], 'gender', gender_id,
+        lambda: GenderSerializer(get_object_or_404(Gender, pk=gender_id)).data
+    )
+    return Response(data)
 
     
 @api_view(['POST'])
@@ -246,24 +357,29 @@ def delete_gender(request):
 
 
 @api_view(['GET'])
+@_conditional_get(lambda: PronounSeries.objects.all())
 def all_pronoun_series(request):
     """
     API Endpoint to get all pronoun series instances.
     """
-    pronoun_series_objs = PronounSeries.objects.all()
-    serializer = PronounSeriesSerializer(pronoun_series_objs, many=True)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [PronounSeries], 'all_pronoun_series', 'all',
+        lambda: serialize_pronoun_series_rows(PronounSeries.objects.all())
+    )
+    return Response(data)
 
 
 @api_view(['GET'])
+@_conditional_get(lambda pronoun_series_id: PronounSeries.objects.filter(pk=pronoun_series_id))
 def get_pronoun_series(request, pronoun_series_id):
     """
     API Endpoint to get a pronoun series based on the ID
     """
-    pronoun_series_obj = get_object_or_404(PronounSeries, pk=pronoun_series_id)
-
-    serializer = PronounSeriesSerializer(pronoun_series_obj)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [PronounSeries], 'pronoun_series', pronoun_series_id,
+        lambda: PronounSeriesSerializer(get_object_or_404(PronounSeries, pk=pronoun_series_id)).data
+    )
+    return Response(data)
 
 
 @api_view(['POST'])
@@ -315,12 +431,26 @@ def add_corpus(request):
     try:
         fields = {
             'title': attributes['title'],
-            'description': attributes['description']
+            'description': attributes['description'],
+            'pipeline_stages': attributes.get('pipeline_stages'),
+            'tokenizer': attributes.get('tokenizer') or DEFAULT_TOKENIZER,
+            'query': attributes.get('query')
         }
     except KeyError as err:
         content = {'detail': f'Attribute {err} not found.'}
         return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
+    if fields['query'] is not None and not isinstance(fields['query'], dict):
+        content = {'detail': 'Query must be an object.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    try:
+        Pipeline(fields['pipeline_stages'], fields['tokenizer'])
+        if fields['query'] is not None:
+            Document.objects.filter_by_metadata(fields['query'])
+    except ValueError as err:
+        content = {'detail': str(err)}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
     new_corpus_obj = Corpus.objects.create(**fields)
     serializer = CorpusSerializer(new_corpus_obj)
     return Response(serializer.data)
@@ -336,6 +466,9 @@ def update_corpus_docs(request):
         corpus_id = corpus_data['id']
         doc_ids = corpus_data['documents']
         corpus_obj = get_object_or_404(Corpus, pk=corpus_id)
+        if corpus_obj.is_dynamic:
+            content = {'detail': 'The documents of a corpus defined by a query cannot be set.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
         corpus_obj.documents.set(Document.objects.filter(id__in=doc_ids))
     except KeyError as err:
         content = {'detail': f'Attribute {err} not found.'}
@@ -364,26 +497,586 @@ def delete_corpus(request):
 
 
 @api_view(['GET'])
+@_conditional_get(lambda: Corpus.objects.all(), extra=['fingerprint'])
 def all_corpora(request):
     """
     API endpoint to get all the corpora
     """
-    corpus_objs = Corpus.objects.all()
-    serializer = CorpusSerializer(corpus_objs, many=True)
-    return Response(serializer.data)
+    data = caching.get_or_set(
+        [Corpus], 'all_corpora', 'all',
+        lambda: serialize_corpus_rows(Corpus.objects.all())
+    )
+    return Response(data)
 
 
 @api_view(['GET'])
+@_conditional_get(lambda corpus_id: Corpus.objects.filter(pk=corpus_id), extra=['fingerprint'])
 def get_corpus(request, corpus_id):
     """
     API endpoint to get a corpus based on id
     """
-    corpus_obj = get_object_or_404(Corpus, pk=corpus_id)
+    data = caching.get_or_set(
+        [Corpus], 'corpus', corpus_id,
+        lambda: CorpusSerializer(get_object_or_404(Corpus, pk=corpus_id)).data
+    )
+    return Response(data)
+
+
+def _is_count(value, minimum=0):
+    """
+    :param value: a value parsed from a request body
+    :param minimum: the smallest accepted value
+    :return: True if the value is an int (not a bool) of at least `minimum`
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
 
-    serializer = CorpusSerializer(corpus_obj)
+
+@api_view(['POST'])
+def add_analysis_job(request):
+    """
+    API endpoint for starting a frequency or proximity analysis of a corpus in the background; a proximity
+    analysis looks at the words within a `word_window` of the pronouns, within each of a list of `word_windows`
+    (counted in a single pass, giving one analysis per window), or within a `sentence_window` of the sentences
+    of the pronouns (0 for the same sentence), and its results may be pruned to the `top_k` most frequent words
+    occurring at least `min_count` times, with the part of speech tags in `pos_filter`
+    """
+    attributes = request.data
+    sentence_window = None
+    word_windows = None
+    pruning = {}
+    try:
+        analysis_type = attributes['analysis_type']
+        corpus_obj = get_object_or_404(Corpus, pk=attributes['corpus_id'])
+        if analysis_type == AnalysisJob.FREQUENCY:
+            gender_ids = attributes['gender_ids']
+            word_window = None
+        elif analysis_type == AnalysisJob.PROXIMITY:
+            gender_ids = []
+            if attributes.get('sentence_window') is not None:
+                word_window = None
+                sentence_window = attributes['sentence_window']
+            elif attributes.get('word_windows') is not None:
+                word_window = None
+                word_windows = attributes['word_windows']
+            else:
+                word_window = attributes['word_window']
+            pruning = {
+                'top_k': attributes.get('top_k'),
+                'min_count': attributes.get('min_count', 1),
+                'pos_filter': attributes.get('pos_filter'),
+            }
+        else:
+            content = {'detail': f'Unknown analysis type {analysis_type!r}.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except KeyError as err:
+        content = {'detail': f'Attribute {err} not found.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    if analysis_type == AnalysisJob.PROXIMITY:
+        if sentence_window is not None and not _is_count(sentence_window):
+            content = {'detail': 'The sentence window must be a non-negative integer.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if word_windows is not None:
+            if not (isinstance(word_windows, list) and word_windows and all(_is_count(w, 1) for w in word_windows)):
+                content = {'detail': 'The word windows must be a list of positive integers.'}
+                return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            word_windows = sorted(set(word_windows))
+        elif sentence_window is None and not _is_count(word_window, 1):
+            content = {'detail': 'The word window must be a positive integer.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if not (pruning['top_k'] is None or _is_count(pruning['top_k'], 1)) or not _is_count(pruning['min_count']):
+            content = {'detail': 'top_k must be a positive integer and min_count a non-negative integer.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        pos_filter = pruning['pos_filter']
+        if pos_filter is not None and not (
+            isinstance(pos_filter, list) and all(isinstance(tag, str) for tag in pos_filter)
+        ):
+            content = {'detail': 'pos_filter must be a list of part of speech tags.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    job_obj = AnalysisJob.objects.create(
+        analysis_type=analysis_type,
+        corpus=corpus_obj,
+        word_window=word_window,
+        word_windows=word_windows,
+        sentence_window=sentence_window,
+        **pruning
+    )
+    job_obj.genders.set(Gender.objects.filter(id__in=gender_ids))
+    jobs.start_job(job_obj)
+
+    serializer = AnalysisJobSerializer(job_obj)
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+def get_analysis_job(request, job_id):
+    """
+    API endpoint to get the state of an analysis job based on the ID
+    """
+    job_obj = get_object_or_404(AnalysisJob, pk=job_id)
+
+    serializer = AnalysisJobSerializer(job_obj)
+    return Response(serializer.data)
+
+
+@api_view(['POST'])
+def cancel_analysis_job(request):
+    """
+    API endpoint for asking a running analysis job to stop; the job stops before its next document
+    """
+    try:
+        job_id = request.data['id']
+    except KeyError as err:
+        content = {'detail': f'Attribute {err} not found.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    job_obj = get_object_or_404(AnalysisJob, pk=job_id)
+    if not job_obj.is_finished:
+        job_obj.cancel_requested = True
+        job_obj.save(update_fields=['cancel_requested'])
+
+    serializer = AnalysisJobSerializer(job_obj)
     return Response(serializer.data)
 
 
+def _analysis_job_events(job_id, last_event_id=None, stall_timeout=ANALYSIS_JOB_STALL_TIMEOUT,
+                         duration=ANALYSIS_JOB_STREAM_DURATION):
+    """
+    Yields a server-sent event each time the progress of an analysis job changes, and a last
+    event named after the job's final status once it stops running, `deleted` if the job is
+    deleted, or `timeout` if its progress has not changed for `stall_timeout` seconds.
+
+    A stream of a running job ends after `duration` seconds without a last event, so that the client
+    reconnects. The progress events are identified by the time of the change and a digest of the job's
+    data: given the last event ID the client received, the stream only sends the changes after it, and
+    keeps timing the stall from that change.
+    """
+    last_digest = None
+    last_change = time.time()
+    if last_event_id:
+        timestamp, _, last_digest = last_event_id.partition(':')
+        try:
+            last_change = min(float(timestamp), last_change)
+        except ValueError:
+            last_digest = None
+    end = time.monotonic() + duration
+    while True:
+        try:
+            job_obj = AnalysisJob.objects.get(pk=job_id)
+        except AnalysisJob.DoesNotExist:
+            yield 'event: deleted\ndata: {}\n\n'
+            return
+        data = json.dumps(AnalysisJobSerializer(job_obj).data)
+        if job_obj.is_finished:
+            yield f'event: {job_obj.status}\ndata: {data}\n\n'
+            return
+        digest = hashlib.md5(data.encode('utf-8')).hexdigest()
+        if digest != last_digest:
+            last_digest = digest
+            last_change = time.time()
+            yield f'id: {last_change:.3f}:{digest}\nevent: progress\ndata: {data}\n\n'
+        elif time.time() - last_change >= stall_timeout:
+            yield f'event: timeout\ndata: {data}\n\n'
+            return
+        if time.monotonic() >= end:
+            yield f'retry: {ANALYSIS_JOB_RECONNECT_DELAY}\n\n'
+            return
+        time.sleep(ANALYSIS_JOB_POLL_INTERVAL)
+
+
+def analysis_job_events(request, job_id):
+    """
+    Server-sent events stream of an analysis job's progress (documents processed, tokens per second and
+    estimated time remaining). This is a plain Django view, since EventSource clients only accept
+    text/event-stream, which the API views do not render. Each stream holds a worker of a synchronous
+    server for at most `ANALYSIS_JOB_STREAM_DURATION` seconds; EventSource clients then reconnect with
+    the `Last-Event-ID` header, and the next stream carries on from there.
+    """
+    get_object_or_404(AnalysisJob, pk=job_id)
+
+    events = _analysis_job_events(job_id, request.headers.get('Last-Event-ID'))
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+@_conditional_get(lambda analysis_id: FrequencyAnalysis.objects.filter(pk=analysis_id))
+def get_frequency_analysis(request, analysis_id):
+    """
+    API endpoint to get the results of a frequency analysis based on the ID
+    """
+    data = caching.get_or_set(
+        [FrequencyAnalysis, Corpus], 'frequency_analysis', analysis_id,
+        lambda: FrequencyAnalysisSerializer(get_object_or_404(FrequencyAnalysis, pk=analysis_id)).data
+    )
+    return Response(data)
+
+
+@api_view(['GET'])
+@_conditional_get(lambda analysis_id: ProximityAnalysis.objects.filter(pk=analysis_id))
+def get_proximity_analysis(request, analysis_id):
+    """
+    API endpoint to get the results of a proximity analysis based on the ID
+    """
+    data = caching.get_or_set(
+        [ProximityAnalysis, Corpus], 'proximity_analysis', analysis_id,
+        lambda: ProximityAnalysisSerializer(get_object_or_404(ProximityAnalysis, pk=analysis_id)).data
+    )
+    return Response(data)
+
+
+# The default and maximum numbers of result rows per page
+RESULT_ROWS_LIMIT = 1000
+RESULT_ROWS_MAX_LIMIT = 10000
+# The maximum number of position bins of the pronoun density curves
+DENSITY_MAX_BINS = 1000
+
+
+def _get_result_criteria(request, dimensions):
+    """
+    :return: a dictionary keying the dimensions given in the query parameters to the lists of their values
+             (comma separated)
+    """
+    return {
+        name: request.query_params[name].split(',') for name in dimensions if name in request.query_params
+    }
+
+
+def _result_rows(request, analysis_model, row_model, analysis_id, dimensions, fields):
+    get_object_or_404(analysis_model.objects.only('pk'), pk=analysis_id)
+    try:
+        offset = int(request.query_params.get('offset', 0))
+        limit = min(int(request.query_params.get('limit', RESULT_ROWS_LIMIT)), RESULT_ROWS_MAX_LIMIT)
+        if offset < 0 or limit < 0:
+            content = {'detail': 'The offset and limit must not be negative.'}
+            return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        rows = results.filter_rows(
+            row_model.objects.filter(analysis_id=analysis_id), dimensions, _get_result_criteria(request, dimensions)
+        ).order_by(*dimensions)
+        data = {'count': rows.count(), 'rows': serialize_rows(rows[offset:offset + limit], fields)}
+    except ValueError:
+        content = {'detail': 'The documents, genders, offset and limit must be integers.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(data)
+
+
+def _result_aggregate(request, analysis_model, row_model, analysis_id, dimensions):
+    get_object_or_404(analysis_model.objects.only('pk'), pk=analysis_id)
+    group_by = request.query_params.get('group_by', 'word' if 'word' in dimensions else dimensions[-1]).split(',')
+    try:
+        limit = request.query_params.get('limit')
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 0:
+            raise ValueError('The limit must not be negative.')
+        rows = results.filter_rows(
+            row_model.objects.filter(analysis_id=analysis_id), dimensions, _get_result_criteria(request, dimensions)
+        )
+        data = results.aggregate_rows(rows, dimensions, group_by, limit)
+    except ValueError as err:
+        content = {'detail': str(err)}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(data)
+
+
+@api_view(['GET'])
+def get_proximity_rows(request, analysis_id):
+    """
+    API endpoint to get a page of the rows of the results of a proximity analysis, read from its result table
+    rather than its results; the rows are filtered by the optional `document`, `gender`, `pronoun_type`, `pos`
+    and `word` query parameters (comma separated lists) and paged by the `offset` and `limit` query parameters
+    """
+    return _result_rows(
+        request, ProximityAnalysis, ProximityResult, analysis_id, results.PROXIMITY_DIMENSIONS,
+        results.PROXIMITY_FIELDS
+    )
+
+
+@api_view(['GET'])
+def get_proximity_aggregate(request, analysis_id):
+    """
+    API endpoint to get the sums of the counts of the results of a proximity analysis, grouped by the fields in
+    the `group_by` query parameter (`word` if omitted) and filtered like `get_proximity_rows`, in decreasing
+    order, up to the optional `limit` query parameter
+    """
+    return _result_aggregate(request, ProximityAnalysis, ProximityResult, analysis_id, results.PROXIMITY_DIMENSIONS)
+
+
+@api_view(['GET'])
+def get_frequency_rows(request, analysis_id):
+    """
+    API endpoint to get a page of the rows of the results of a frequency analysis, filtered by the optional
+    `document`, `gender` and `pronoun` query parameters, like `get_proximity_rows`
+    """
+    return _result_rows(
+        request, FrequencyAnalysis, FrequencyResult, analysis_id, results.FREQUENCY_DIMENSIONS,
+        results.FREQUENCY_FIELDS
+    )
+
+
+@api_view(['GET'])
+def get_frequency_aggregate(request, analysis_id):
+    """
+    API endpoint to get the sums of the pronoun counts of the results of a frequency analysis, grouped by the
+    fields in the `group_by` query parameter (`pronoun` if omitted), like `get_proximity_aggregate`
+    """
+    return _result_aggregate(request, FrequencyAnalysis, FrequencyResult, analysis_id, results.FREQUENCY_DIMENSIONS)
+
+
+def _get_gender_ids(request):
+    """
+    :return: the list of the Gender ids in the `genders` query parameter (a comma separated list), or of every
+             Gender if it is omitted
+    :raises ValueError: if an id is not an integer
+    """
+    if 'genders' not in request.query_params:
+        return list(Gender.objects.order_by('pk').values_list('pk', flat=True))
+    return [int(gender_id) for gender_id in request.query_params['genders'].split(',')]
+
+
+@api_view(['GET'])
+def get_time_series(request, corpus_id):
+    """
+    API endpoint to get the pronoun counts of a corpus per year or decade; the genders are given as a comma
+    separated list of ids in the `genders` query parameter (every gender if omitted), and the bucket size
+    in the `bucket` query parameter (`year`, `decade` or `century`)
+    """
+    get_object_or_404(Corpus, pk=corpus_id)
+    bucket = request.query_params.get('bucket', 'year')
+    try:
+        gender_ids = _get_gender_ids(request)
+    except ValueError:
+        content = {'detail': 'Genders must be a comma separated list of ids.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if bucket not in timeseries.BUCKET_SIZES:
+        content = {'detail': f'Unknown bucket {bucket!r}.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    data = caching.get_or_set(
+        [Corpus, Gender, PronounSeries], 'time_series',
+        f'{corpus_id}:{bucket}:{",".join(map(str, sorted(gender_ids)))}',
+        lambda: timeseries.run_analysis(corpus_id, gender_ids, bucket)
+    )
+    return Response(data)
+
+
+@api_view(['GET'])
+def get_dialogue_analysis(request, corpus_id):
+    """
+    API endpoint to get the pronoun counts of the documents of a corpus split between dialogue and narration;
+    the genders are given as a comma separated list of ids in the `genders` query parameter (every gender if
+    omitted), and the proximity counts are included for the window in the optional `word_window` query parameter
+    """
+    get_object_or_404(Corpus, pk=corpus_id)
+    try:
+        gender_ids = _get_gender_ids(request)
+        word_window = request.query_params.get('word_window')
+        word_window = int(word_window) if word_window else None
+    except ValueError:
+        content = {'detail': 'The genders and the word window must be integers.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    data = caching.get_or_set(
+        [Corpus, Document, Gender, PronounSeries], 'dialogue_analysis',
+        f'{corpus_id}:{word_window}:{",".join(map(str, sorted(gender_ids)))}',
+        lambda: dialogue.run_analysis(corpus_id, gender_ids, word_window)
+    )
+    return Response(data)
+
+
+@api_view(['GET'])
+def get_pronoun_density(request, corpus_id):
+    """
+    API endpoint to get the density of the pronouns of each gender along the documents of a corpus, and its
+    average over the corpus, in the number of position bins in the `bins` query parameter (100 if omitted, and
+    at most `DENSITY_MAX_BINS`), optionally over a sliding window of the number of tokens in the `window` query
+    parameter; the genders are given as a comma separated list of ids in the `genders` query parameter (every
+    gender if omitted)
+    """
+    get_object_or_404(Corpus, pk=corpus_id)
+    try:
+        gender_ids = _get_gender_ids(request)
+        bins = int(request.query_params.get('bins', 100))
+        window = request.query_params.get('window')
+        window = int(window) if window else None
+    except ValueError:
+        content = {'detail': 'The genders, the number of bins and the window must be integers.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if bins < 1 or (window is not None and window < 1):
+        content = {'detail': 'The number of bins and the window must be positive.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if bins > DENSITY_MAX_BINS:
+        content = {'detail': f'The number of bins must be at most {DENSITY_MAX_BINS}.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    data = caching.get_or_set(
+        [Corpus, Document, Gender, PronounSeries], 'pronoun_density',
+        f'{corpus_id}:{bins}:{window}:{",".join(map(str, sorted(gender_ids)))}',
+        lambda: density.run_analysis(corpus_id, gender_ids, bins, window)
+    )
+    return Response(data)
+
+
+@api_view(['GET'])
+def get_words_associated(request, corpus_id):
+    """
+    API endpoint to get the words found after each of the words in the `words` query parameter (a comma
+    separated list) in the documents of a corpus, with their counts
+    """
+    corpus = get_object_or_404(Corpus, pk=corpus_id)
+    words = sorted({word.lower() for word in request.query_params.get('words', '').split(',') if word})
+    if not words:
+        content = {'detail': 'At least one word is required.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    identifier = hashlib.md5(json.dumps(words).encode('utf-8')).hexdigest()
+    data = caching.get_or_set(
+        [Corpus, Document], 'words_associated', f'{corpus_id}:{identifier}',
+        lambda: corpus.words_associated(words)
+    )
+    return Response(data)
+
+
+def _read_cooccurrence_matrix(corpus_id, word_window):
+    """
+    Reads a co-occurrence matrix without building it: matrices are built in the background by the
+    `build_cooccurrence_matrices` command.
+
+    :return: a tuple of the up to date `CooccurrenceMatrix` of the corpus for the window and None, or of None and
+             the error Response: 422 for a window out of range, 404 for a matrix never built and 409 for a
+             matrix out of date
+    """
+    if not 1 <= word_window <= cooccurrence.get_max_window():
+        content = {'detail': f'The word window must be between 1 and {cooccurrence.get_max_window()}.'}
+        return None, Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    try:
+        return cooccurrence.get_matrix(corpus_id, word_window), None
+    except CooccurrenceMatrix.DoesNotExist:
+        content = {'detail': f'No co-occurrence matrix was built for the word window {word_window}.'}
+        return None, Response(content, status=status.HTTP_404_NOT_FOUND)
+    except cooccurrence.StaleMatrix as err:
+        content = {'detail': str(err)}
+        return None, Response(content, status=status.HTTP_409_CONFLICT)
+
+
+@api_view(['GET'])
+def get_cooccurrence(request, corpus_id):
+    """
+    API endpoint slicing the co-occurrence matrix of a corpus for the word window in the `word_window` query
+    parameter (see `_read_cooccurrence_matrix`). The rows are selected by the optional `genders`,
+    `pronoun_types` and `pos` query parameters, comma separated lists of gender ids, pronoun types and part
+    of speech tags.
+    """
+    get_object_or_404(Corpus, pk=corpus_id)
+    try:
+        word_window = int(request.query_params['word_window'])
+        gender_ids = _get_gender_ids(request)
+    except KeyError as err:
+        content = {'detail': f'Attribute {err} not found.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except ValueError:
+        content = {'detail': 'The word window and the genders must be integers.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    pronoun_types = request.query_params.get('pronoun_types')
+    pronoun_types = pronoun_types.split(',') if pronoun_types else PronounSeries.PRONOUN_TYPES
+    pos_tags = request.query_params.get('pos')
+    pos_tags = set(pos_tags.split(',')) if pos_tags else None
+
+    matrix, error = _read_cooccurrence_matrix(corpus_id, word_window)
+    if error:
+        return error
+
+    genders = {}
+    for gender_id, pronoun_type in matrix.rows:
+        if gender_id in gender_ids and pronoun_type in pronoun_types:
+            genders.setdefault(gender_id, {})[pronoun_type] = matrix.get_counts(gender_id, pronoun_type, pos_tags)
+    return Response({'word_window': word_window, 'documents': len(matrix.document_ids), 'genders': genders})
+
+
+@api_view(['GET'])
+def get_distinctive_words(request, corpus_id):
+    """
+    API endpoint to get the words most distinctive of each gender within the window in the `word_window` query
+    parameter of its pronouns in a corpus, scored by the `metric` query parameter (see
+    `distinctiveness.METRICS`); `k` (20 by default) words are returned per gender, among the words occurring
+    at least `min_count` times, optionally only counting the pronoun types and part of speech tags given as
+    comma separated lists in the `pronoun_types` and `pos` query parameters
+    """
+    get_object_or_404(Corpus, pk=corpus_id)
+    metric = request.query_params.get('metric', 'log_likelihood')
+    try:
+        word_window = int(request.query_params['word_window'])
+        k = int(request.query_params.get('k', 20))
+        min_count = int(request.query_params.get('min_count', 1))
+    except KeyError as err:
+        content = {'detail': f'Attribute {err} not found.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except ValueError:
+        content = {'detail': 'The word window, k and the minimum count must be integers.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if metric not in distinctiveness.METRICS:
+        content = {'detail': f'Unknown metric {metric!r}.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    pronoun_types = request.query_params.get('pronoun_types')
+    pronoun_types = set(pronoun_types.split(',')) if pronoun_types else None
+    pos_tags = request.query_params.get('pos')
+    pos_tags = set(pos_tags.split(',')) if pos_tags else None
+
+    matrix, error = _read_cooccurrence_matrix(corpus_id, word_window)
+    if error:
+        return error
+    keys, vocabulary, table = distinctiveness.get_matrix_count_table(matrix, pronoun_types, pos_tags, min_count)
+    scores = distinctiveness.METRICS[metric](table)
+    words = distinctiveness.top_k(keys, vocabulary, table, scores, max(k, 0))
+    return Response({
+        'word_window': word_window,
+        'metric': metric,
+        'genders': {
+            gender_id: [{'word': word, 'score': score, 'count': count} for word, score, count in gender_words]
+            for gender_id, gender_words in words.items()
+        },
+    })
+
+
+@api_view(['POST'])
+def filter_documents(request):
+    """
+    API endpoint resolving metadata criteria (see `DocumentManager.filter_by_metadata`) to the ids of the
+    matching documents, e.g. for building a corpus from them
+    """
+    try:
+        criteria = request.data['criteria']
+    except KeyError as err:
+        content = {'detail': f'Attribute {err} not found.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    if not isinstance(criteria, dict):
+        content = {'detail': 'Criteria must be an object.'}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    try:
+        queryset = Document.objects.filter_by_metadata(criteria)
+    except ValueError as err:
+        content = {'detail': str(err)}
+        return Response(content, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    identifier = hashlib.md5(json.dumps(criteria, sort_keys=True).encode('utf-8')).hexdigest()
+    doc_ids = caching.get_or_set(
+        [Document], 'filter_documents', identifier,
+        lambda: list(queryset.order_by('pk').values_list('pk', flat=True))
+    )
+    return Response({'documents': doc_ids})
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    """
+    API endpoint reporting the hit rate of the response and analysis input caches of this server process
+    """
+    return Response(caching.get_stats())
+
+
 def corpora(request):
     """
     Corpora page
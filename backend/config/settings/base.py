@@ -89,6 +89,36 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Local memory by default; set CACHE_DIR to share a file-based cache between server processes.
+# Cached values are invalidated by bumping model versions in the cache (see app/caching.py), so with the local
+# memory cache a change made in one process does not invalidate what the other processes cached: a server
+# running several processes (e.g. gunicorn workers) must set CACHE_DIR or configure another shared backend,
+# or the other processes serve stale values until CACHE_TIMEOUT expires them.
+
+CACHE_DIR = os.environ.get('CACHE_DIR')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    } if CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gender-analysis',
+    }
+}
+
+# Number of seconds before cached responses expire; they are also invalidated whenever their data changes
+CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 60 * 60))
+
+# The largest word window co-occurrence matrices are built and read for (see app/analysis/cooccurrence.py)
+COOCCURRENCE_MAX_WINDOW = int(os.environ.get('COOCCURRENCE_MAX_WINDOW', 10))
+
+# The spaCy model neuralcoref resolves coreferences with (see app/coreference.py)
+COREF_SPACY_MODEL = os.environ.get('COREF_SPACY_MODEL', 'en_core_web_sm')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -42,6 +42,24 @@ urlpatterns = [
     path('api/update_corpus_docs', views.update_corpus_docs),
     path('api/delete_corpus', views.delete_corpus),
     path('api/corpus/<int:corpus_id>', views.get_corpus),
+    path('api/corpus/<int:corpus_id>/time_series', views.get_time_series),
+    path('api/corpus/<int:corpus_id>/dialogue', views.get_dialogue_analysis),
+    path('api/corpus/<int:corpus_id>/pronoun_density', views.get_pronoun_density),
+    path('api/corpus/<int:corpus_id>/words_associated', views.get_words_associated),
+    path('api/corpus/<int:corpus_id>/cooccurrence', views.get_cooccurrence),
+    path('api/corpus/<int:corpus_id>/distinctive_words', views.get_distinctive_words),
+    path('api/add_analysis_job', views.add_analysis_job),
+    path('api/cancel_analysis_job', views.cancel_analysis_job),
+    path('api/analysis_job/<int:job_id>', views.get_analysis_job),
+    path('api/analysis_job/<int:job_id>/events', views.analysis_job_events),
+    path('api/frequency_analysis/<int:analysis_id>', views.get_frequency_analysis),
+    path('api/frequency_analysis/<int:analysis_id>/rows', views.get_frequency_rows),
+    path('api/frequency_analysis/<int:analysis_id>/aggregate', views.get_frequency_aggregate),
+    path('api/proximity_analysis/<int:analysis_id>', views.get_proximity_analysis),
+    path('api/proximity_analysis/<int:analysis_id>/rows', views.get_proximity_rows),
+    path('api/proximity_analysis/<int:analysis_id>/aggregate', views.get_proximity_aggregate),
+    path('api/filter_documents', views.filter_documents),
+    path('api/cache_stats', views.cache_stats),
 
     # View paths
     path('', views.index, name='index'),